@@ -1,14 +1,20 @@
 import os
 from unittest.mock import MagicMock
 
+import boto3
 import pandas as pd
 import pytest
 from pydantic import SecretStr
 from pytest_mock import MockFixture
 
-from toucan_connectors.awsathena.awsathena_connector import AwsathenaConnector, AwsathenaDataSource
+from toucan_connectors.awsathena.awsathena_connector import (
+    AwsathenaConnector,
+    AwsathenaDataSource,
+    _track_query_executions,
+)
 from toucan_connectors.common import ConnectorStatus
 from toucan_connectors.pagination import OffsetLimitInfo
+from toucan_connectors.query_manager import RunningQuery
 
 
 @pytest.fixture
@@ -43,7 +49,7 @@ def mocked_boto_session(mocker):
     # Mocking because the comparison of two boto3.Session objects is always false
     # We cannot mock get_session on the athena_connector instance directly, because
     # pydantic models alter getattr behaviour
-    return mocker.patch.object(AwsathenaConnector, "get_session", return_value={"a": "b"})
+    return mocker.patch.object(AwsathenaConnector, "get_session", return_value=mocker.MagicMock(spec=boto3.Session))
 
 
 @pytest.fixture
@@ -76,7 +82,7 @@ def test_get_df(
         "SELECT * FROM beers;",
         params=None,
         database="mydatabase",
-        boto3_session={"a": "b"},
+        boto3_session=mocked_boto_session.return_value,
         s3_output="s3://test/results/",
         ctas_approach=use_ctas,
         paramstyle="named",
@@ -104,7 +110,7 @@ def test_get_slice(mocker, athena_connector, data_source, mocked_read_sql_query,
         "SELECT * FROM (SELECT * FROM beers) OFFSET 10 LIMIT 110;",
         params=None,
         database="mydatabase",
-        boto3_session={"a": "b"},
+        boto3_session=mocked_boto_session.return_value,
         s3_output="s3://test/results/",
         ctas_approach=False,
         paramstyle="named",
@@ -284,3 +290,15 @@ def test_no_sql_injection(athena_connector, mocker):
         ctas_approach=mocker.ANY,
         paramstyle="named",
     )
+
+
+def test_track_query_executions(mocker, athena_connector):
+    session = athena_connector.get_session()
+    running_query = RunningQuery("id", "test", "SELECT 1")
+    _track_query_executions(session, running_query)
+    session.events.emit("after-call.athena.StartQueryExecution", parsed={"QueryExecutionId": "qid"})
+    assert running_query.backend_query_id == "qid"
+
+    client = mocker.patch.object(session, "client")
+    running_query.cancel()
+    client.return_value.stop_query_execution.assert_called_once_with(QueryExecutionId="qid")
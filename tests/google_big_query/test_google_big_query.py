@@ -1,12 +1,14 @@
 import json
 from collections.abc import Generator
+from decimal import Decimal
 from os import environ
 from typing import Any
-from unittest.mock import patch
+from unittest.mock import ANY, patch
 
 import numpy as np
 import pandas
 import pandas as pd
+import pyarrow as pa
 import pytest
 import requests
 from google.api_core.exceptions import NotFound
@@ -27,6 +29,7 @@ from toucan_connectors.google_big_query.google_big_query_connector import (
     _define_query_param,
 )
 from toucan_connectors.google_credentials import GoogleCredentials, JWTCredentials
+from toucan_connectors.query_manager import RunningQuery, get_query_manager
 
 import_path = "toucan_connectors.google_big_query.google_big_query_connector"
 
@@ -279,6 +282,43 @@ def test_retrieve_data(execute, connect, credentials, fixture_credentials):
     assert_frame_equal(pandas.DataFrame({"a": [1, 1], "b": [2, 2]}), result)
 
 
+@patch(
+    "toucan_connectors.google_big_query.google_big_query_connector.GoogleBigQueryConnector._get_google_credentials",
+    return_value=Credentials,
+)
+@patch(
+    "toucan_connectors.google_big_query.google_big_query_connector.GoogleBigQueryConnector._connect",
+    return_value=Client,
+)
+@patch(
+    "toucan_connectors.google_big_query.google_big_query_connector.GoogleBigQueryConnector._execute_arrow_query",
+    return_value=pa.table(
+        {
+            "a": [1, None],
+            "b": [True, False],
+            "c": pa.array([Decimal("1.5"), None], pa.decimal128(38, 9)),
+            "d": pa.array([None, None], pa.decimal256(76, 38)),
+        }
+    ),
+)
+def test_get_slice_arrow(execute_arrow, connect, credentials, fixture_credentials):
+    connector = GoogleBigQueryConnector(name="MyGBQ", credentials=fixture_credentials)
+    datasource = GoogleBigQueryDataSource(name="MyGBQ", domain="wiki", query="SELECT a, b FROM my_table")
+
+    result = connector.get_slice(datasource, limit=1)
+
+    execute_arrow.assert_called_once_with(Client, "SELECT a, b FROM my_table", [], ANY)
+    assert isinstance(execute_arrow.call_args.args[3], RunningQuery)
+    assert result.table.column_names == ["a", "b", "c", "d"]
+    assert result.df.dtypes["a"] == pd.Int64Dtype()
+    assert result.df.dtypes["b"] == pd.BooleanDtype()
+    # NUMERIC and BIGNUMERIC columns are floats, as with `get_df`
+    assert result.df.dtypes["c"] == "float64"
+    assert result.df.dtypes["d"] == "float64"
+    assert result.df["c"].tolist() == [1.5]
+    assert result.pagination_info.pagination_info.total_rows == 2
+
+
 def test_get_model(mocker: MockFixture, fixture_credentials) -> None:
     class FakeResponse:
         def __init__(self) -> None: ...
@@ -1031,3 +1071,38 @@ def test_get_status_no_creds() -> None:
         error="Either google credentials or a JWT token must be provided",
         details=[("Credentials provided", False), ("Sample BigQuery job", False)],
     )
+
+
+def test_start_query_registers_job(mocker: MockFixture):
+    client = mocker.MagicMock()
+    job = client.query.return_value
+    job.job_id = "job-id"
+    running_query = RunningQuery("id", "MyGBQ", "SELECT 1")
+
+    assert GoogleBigQueryConnector._start_query(client, "SELECT 1", [], running_query) is job
+    assert running_query.backend_query_id == "job-id"
+    running_query.cancel()
+    job.cancel.assert_called_once()
+
+
+def test_retrieve_batches_tracks_query(mocker: MockFixture, gbq_connector_with_jwt: GoogleBigQueryConnector):
+    client = mocker.MagicMock()
+    mocker.patch.object(GoogleBigQueryConnector, "_get_bigquery_client", return_value=client)
+    job = client.query.return_value
+    job.job_id = "job-id"
+    result = job.result.return_value
+    result.schema = []
+    result.to_dataframe_iterable.return_value = iter([pd.DataFrame({"a": [1, 2]}), pd.DataFrame({"a": [3]})])
+    data_source = GoogleBigQueryDataSource(name="coucou", query="SELECT a FROM t", domain="test-domain")
+
+    batches = gbq_connector_with_jwt.iter_batches(data_source, batch_size=2)
+    assert next(batches)["a"].tolist() == [1, 2]
+    job.result.assert_called_once_with(page_size=2)
+    # The job is tracked while its pages are fetched, so that it can be cancelled
+    [running_query] = get_query_manager().running()
+    assert running_query.backend_query_id == "job-id"
+    assert get_query_manager().cancel(running_query.query_id)
+    job.cancel.assert_called_once()
+
+    batches.close()
+    assert get_query_manager().running() == []
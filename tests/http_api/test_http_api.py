@@ -181,6 +181,31 @@ def test_get_df_with_offset_pagination(
     assert len(responses.calls) == 3
 
 
+@responses.activate
+def test_iter_batches_with_offset_pagination(
+    connector: HttpAPIConnector, data_source: HttpAPIDataSource, offset_pagination: OffsetLimitPaginationConfig
+) -> None:
+    responses.add(
+        responses.GET,
+        "https://jsonplaceholder.typicode.com/comments?super_offset=0&super_limit=5",
+        json=[{"a": 1}, {"a": 2}, {"a": 3}, {"a": 4}, {"a": 5}],
+    )
+    responses.add(
+        responses.GET,
+        "https://jsonplaceholder.typicode.com/comments?super_offset=5&super_limit=5",
+        json=[{"a": 6}],
+    )
+
+    data_source.http_pagination_config = offset_pagination
+    batches = connector.iter_batches(data_source, batch_size=3)
+
+    # pages are requested lazily
+    assert next(batches)["a"].tolist() == [1, 2, 3]
+    assert len(responses.calls) == 1
+    assert [batch["a"].tolist() for batch in batches] == [[4, 5], [6]]
+    assert len(responses.calls) == 2
+
+
 @responses.activate
 def test_get_df_with_offset_pagination_and_flatten_option(
     connector: HttpAPIConnector, data_source: HttpAPIDataSource, offset_pagination: OffsetLimitPaginationConfig
@@ -890,7 +915,7 @@ def test_get_cache_key(connector, auth, data_source):
     data_source.headers = {"name": "%(first_name)s"}
     data_source.parameters = {"first_name": "raphael"}
     key = connector.get_cache_key(data_source)
-    assert key == "3080d595-0918-3278-b230-ed3fd0c282ee"
+    assert key == "85e5abd5-0ea3-6c76-2573-75fe88a3bb80"
 
     data_source.headers = {"name": "{{ first_name }}"}  # change the templating style
     key2 = connector.get_cache_key(data_source)
@@ -240,6 +240,24 @@ def test_get_df_with_permissions(mongo_connector, mongo_datasource):
     assert df[["country", "language", "value", "name"]].equals(expected)
 
 
+@pytest.mark.asyncio
+async def test_aget_df_and_aget_slice(
+    mongo_connector: MongoConnector, mongo_datasource: Callable[..., MongoDataSource]
+):
+    datasource = mongo_datasource(collection="test_col", query={"domain": "domain1"})
+    permissions = {"column": "country", "operator": "eq", "value": "France"}
+    df = await mongo_connector.aget_df(datasource, permissions)
+    assert df.equals(mongo_connector.get_df(datasource.model_copy(deep=True), permissions))
+
+    res = await mongo_connector.aget_slice(datasource, offset=1, limit=2)
+    expected = mongo_connector.get_slice(datasource, offset=1, limit=2)
+    assert res.df.equals(expected.df)
+    assert res.pagination_info == expected.pagination_info
+
+    with pytest.raises(UnkwownMongoCollection):
+        await mongo_connector.aget_df(mongo_datasource(collection="unknown", query={}))
+
+
 def test_get_slice(mongo_connector: MongoConnector, mongo_datasource: Callable[..., MongoDataSource]):
     datasource = mongo_datasource(collection="test_col", query={"domain": "domain1"})
     res = mongo_connector.get_slice(datasource)
@@ -12,6 +12,7 @@ from sqlalchemy.orm import Session
 
 from tests.conftest import DockerContainer, ServiceContainerStarter
 from toucan_connectors.mssql.mssql_connector import MSSQLConnector, MSSQLDataSource
+from toucan_connectors.sql_rewriter import build_slice_query
 
 
 @pytest.fixture(scope="module", params=["mssql2019", "mssql2022"])
@@ -73,6 +74,27 @@ def test_datasource():
     assert ds.query == "select * from test;"
 
 
+@pytest.mark.parametrize(
+    "query,expected",
+    [
+        (
+            "select * from test;",
+            "SELECT * FROM (select * from test) AS _toucan_slice "
+            "ORDER BY (SELECT NULL) OFFSET 10 ROWS FETCH NEXT 5 ROWS ONLY",
+        ),
+        ("select * from test order by name", "select * from test order by name OFFSET 10 ROWS FETCH NEXT 5 ROWS ONLY"),
+        (
+            "with t as (select 1 as a) select * from t",
+            "with t as (select 1 as a) SELECT * FROM (select * from t) AS _toucan_slice "
+            "ORDER BY (SELECT NULL) OFFSET 10 ROWS FETCH NEXT 5 ROWS ONLY",
+        ),
+        ("exec my_procedure", None),
+    ],
+)
+def test_build_slice_query(query: str, expected: str | None):
+    assert build_slice_query(query, 10, 5, dialect=MSSQLConnector._sql_dialect) == expected
+
+
 def assert_get_df(
     mocker: MockerFixture,
     mssql_connector: MSSQLConnector,
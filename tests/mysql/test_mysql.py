@@ -307,6 +307,43 @@ def test_get_df_with_dict_parameter(mysql_connector: MySQLConnector, mysql_datas
     assert df["today"].to_list() == ["2024-05-22 12:03:00"] * 24
 
 
+def test_get_df_with_server_side_cursors(mysql_connector: MySQLConnector, mysql_datasource: MySQLDataSource):
+    expected = mysql_connector.get_df(mysql_datasource)
+    cursor_connector = mysql_connector.model_copy(update={"server_side_cursors": True, "itersize": 5})
+    assert_frame_equal(cursor_connector.get_df(mysql_datasource), expected)
+
+    batches = list(cursor_connector.iter_batches(mysql_datasource, batch_size=10))
+    assert [len(batch) for batch in batches] == [10, 10, 4]
+    assert_frame_equal(pd.concat(batches, ignore_index=True), expected)
+
+
+def test_server_side_cursors(mocker: MockerFixture):
+    """Results are fetched with an unbuffered cursor, and converted chunk by chunk"""
+    connect = mocker.patch("pymysql.connect")
+    chunks = [pd.DataFrame({"name": [b"a", b"b"]}), pd.DataFrame({"name": [b"c"]})]
+    read_sql = mocker.patch("pandas.read_sql", return_value=iter(chunks))
+    connector = MySQLConnector(name="mycon", host="localhost", user="ubuntu", server_side_cursors=True, itersize=2)
+    data_source = MySQLDataSource(domain="test", name="test", database="mysql_db", query="SELECT name FROM City")
+
+    df = connector.get_df(data_source)
+    assert df["name"].tolist() == ["a", "b", "c"]
+    assert connect.call_args.kwargs["cursorclass"] is pymysql.cursors.SSCursor
+    assert read_sql.call_args.kwargs["chunksize"] == 2
+    connect.return_value.close.assert_called_once()
+    assert connector._can_slice_batches()
+
+
+def test_iter_batches_streams_results(mocker: MockerFixture):
+    """Batches are always read from an unbuffered cursor, even without server-side cursors"""
+    connect = mocker.patch("pymysql.connect")
+    mocker.patch("pandas.read_sql", return_value=iter([pd.DataFrame({"name": ["a"]})]))
+    connector = MySQLConnector(name="mycon", host="localhost", user="ubuntu")
+    data_source = MySQLDataSource(domain="test", name="test", database="mysql_db", query="SELECT name FROM City")
+
+    assert [batch["name"].tolist() for batch in connector.iter_batches(data_source, batch_size=2)] == [["a"]]
+    assert connect.call_args.kwargs["cursorclass"] is pymysql.cursors.SSCursor
+
+
 def test_decode_df():
     """It should decode the bytes columns"""
     df = pd.DataFrame(
@@ -327,6 +364,12 @@ def test_decode_df():
     res = MySQLConnector.decode_df(df2)
     assert res.equals(df2)
 
+    # Only the columns of bytes are decoded, NULL values are kept
+    df3 = pd.DataFrame({"blob": [None, b"pikka"], "text": ["b'x'", None]})
+    res = MySQLConnector.decode_df(df3)
+    assert res["blob"].tolist() == [None, "pikka"]
+    assert res["text"].tolist() == ["b'x'", None]
+
 
 def test_get_form_empty_query(mysql_connector):
     """It should give suggestions of the databases without changing the rest"""
@@ -364,6 +407,45 @@ def test_handle_date_0():
     assert df.dtypes.astype(str)["DATE"] == "datetime64[ns]"
     assert list(df["DATE"]) == [pd.Timestamp("2021-06-23 12:34:56"), pd.NaT]
 
+    # The types of the other object columns are inferred too
+    df = pd.DataFrame(
+        {
+            "DATE": date_mixed_series,
+            "NAME": ["2021-06-23", None],
+            "ID": [1, 2],
+            "SCORE": pd.Series([1, 2], dtype=object),
+        }
+    )
+    df = handle_date_0(df)
+    assert df.dtypes.astype(str).to_dict() == {
+        "DATE": "datetime64[ns]",
+        "NAME": "object",
+        "ID": "int64",
+        "SCORE": "int64",
+    }
+
+
+def test_iter_batches_dtypes(mocker: MockerFixture):
+    """The dtypes of the batches are the ones of the first batch where the column is not null"""
+    mocker.patch("pymysql.connect")
+    chunks = [
+        pd.DataFrame(
+            {"DATE": [pd.Timestamp("2021-06-23"), "0000-00-00 00:00:00"], "PRICE": [1.5, 2.0], "N": [None, None]}
+        ),
+        pd.DataFrame({"DATE": ["0000-00-00 00:00:00", "0000-00-00 00:00:00"], "PRICE": [1, 2], "N": [1.0, 2.0]}),
+        pd.DataFrame({"DATE": [pd.Timestamp("2021-06-24"), None], "PRICE": [3, 4], "N": [None, 3.0]}),
+    ]
+    mocker.patch("pandas.read_sql", return_value=iter(chunks))
+    connector = MySQLConnector(name="mycon", host="localhost", user="ubuntu")
+    data_source = MySQLDataSource(domain="test", name="test", database="mysql_db", query="SELECT * FROM City")
+
+    batches = list(connector.iter_batches(data_source, batch_size=2))
+    assert [batch.dtypes.astype(str).to_dict() for batch in batches] == [
+        {"DATE": "datetime64[ns]", "PRICE": "float64", "N": "object"},
+        {"DATE": "datetime64[ns]", "PRICE": "float64", "N": "float64"},
+        {"DATE": "datetime64[ns]", "PRICE": "float64", "N": "float64"},
+    ]
+
 
 @pytest.mark.parametrize("db_name", (None, "mysql_db"))
 def test_get_model(mysql_connector: Any, db_name: str | None) -> None:
@@ -1,4 +1,8 @@
+from datetime import date
+
 import oracledb
+import pandas as pd
+import pyarrow as pa
 import pytest
 from pytest_mock import MockerFixture
 
@@ -191,3 +195,38 @@ def test_datasource():
 
     ds = OracleSQLDataSource(name="mycon", domain="mydomain", table="test")
     assert ds.query == "SELECT * FROM test"
+
+
+def test_oracle_get_slice(mocker: MockerFixture):
+    mocker.patch("oracledb.connect")
+    reasq = mocker.patch("pandas.read_sql", return_value=pd.DataFrame({"name": ["Paris", "Lyon"]}))
+    oracle_connector = OracleSQLConnector(
+        name="my_oracle_sql_con", user="system", password="oracle", dsn="localhost:22/xe"
+    )
+    datasource = OracleSQLDataSource(domain="Oracle test", name="my_oracle_sql_con", query="SELECT * FROM City;")
+
+    res = oracle_connector.get_slice(datasource, offset=4, limit=2)
+
+    reasq.assert_called_once_with(
+        "SELECT * FROM (SELECT * FROM City) OFFSET 4 ROWS FETCH NEXT 2 ROWS ONLY", con=mocker.ANY, params=[]
+    )
+    assert res.df["name"].tolist() == ["Paris", "Lyon"]
+
+
+def test_oracle_get_slice_arrow_same_as_get_df(mocker: MockerFixture):
+    # Duplicate column names, as returned by a join
+    columns = ["name", "created", "name"]
+    values = [["Paris", "Lyon"], [date(2024, 1, 1), date(2024, 1, 2)], ["FR", "FR"]]
+    connection = mocker.patch("oracledb.connect").return_value
+    connection.fetch_df_all.return_value = pa.table(values, names=columns)
+    mocker.patch("pandas.read_sql", return_value=pd.DataFrame(list(zip(*values, strict=True)), columns=columns))
+    oracle_connector = OracleSQLConnector(
+        name="my_oracle_sql_con", user="system", password="oracle", dsn="localhost:22/xe"
+    )
+    datasource = OracleSQLDataSource(domain="Oracle test", name="my_oracle_sql_con", query="SELECT * FROM City;")
+
+    df = oracle_connector.get_df(datasource)
+    assert df.columns.tolist() == ["name_0", "created", "name_1"]
+    assert df["created"].dtype.kind == "M"
+    assert oracle_connector.get_arrow(datasource).column_names == df.columns.tolist()
+    pd.testing.assert_frame_equal(oracle_connector.get_slice(datasource).df, df)
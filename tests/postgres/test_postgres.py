@@ -1,16 +1,28 @@
 import pandas as pd
 import psycopg
 import pytest
+import sqlalchemy as sa
 from pandas.testing import assert_frame_equal
 from pydantic import ValidationError
 from pytest_mock import MockFixture
 from sqlalchemy.exc import OperationalError, SQLAlchemyError
 
 from toucan_connectors.common import ConnectorStatus
+from toucan_connectors.metrics import get_metrics
 from toucan_connectors.postgres.postgresql_connector import (
+    _PREPARED_STATEMENTS_INFO_KEY,
     PostgresConnector,
     PostgresDataSource,
+    _listen_prepared_statements,
+    _on_after_cursor_execute,
+    _on_checkin,
+    _on_reset,
+    _on_rollback,
+    _register_async_cancel,
+    _register_cancel,
 )
+from toucan_connectors.postgres.utils import CopyConversionError, PreparedStatementCache, read_copy_table
+from toucan_connectors.query_manager import RunningQuery
 from toucan_connectors.toucan_connector import MalformedVersion
 
 
@@ -312,6 +324,27 @@ def test_retrieve_response(postgres_connector):
     assert res.shape == (2, 3)
 
 
+@pytest.mark.asyncio
+async def test_aget_df_and_aget_slice(postgres_connector):
+    """It should retrieve the response to the query with psycopg's asyncio support"""
+    ds = PostgresDataSource(
+        domain="test",
+        name="test",
+        database="postgres_db",
+        query="SELECT Name, CountryCode, Population FROM City WHERE Population > %(min_pop)s ORDER BY Name",
+        parameters={"min_pop": 5000000},
+    )
+    df = await postgres_connector.aget_df(ds, permissions={"column": "countrycode", "operator": "eq", "value": "IND"})
+    assert df.equals(
+        postgres_connector.get_df(ds, permissions={"column": "countrycode", "operator": "eq", "value": "IND"})
+    )
+
+    res = await postgres_connector.aget_slice(ds, offset=1, limit=2, get_row_count=True)
+    expected = postgres_connector.get_slice(ds, offset=1, limit=2, get_row_count=True)
+    assert res.df.equals(expected.df)
+    assert res.pagination_info == expected.pagination_info
+
+
 def test_get_df_db(postgres_connector):
     """It should extract the table City and make some merge with some foreign key."""
     data_source_spec = {
@@ -648,3 +681,315 @@ def test_get_df_with_array_parameters(
     ds = PostgresDataSource(domain="test", name="test", database="postgres_db", query=query, parameters=params)
     df = postgres_connector.get_df(ds)
     assert_frame_equal(df, expected_df)
+
+
+def test_register_cancel(mocker: MockFixture):
+    conn = mocker.MagicMock()
+    dbapi_connection = conn.connection.dbapi_connection
+    dbapi_connection.info.backend_pid = 42
+    running_query = RunningQuery("id", "test", "SELECT 1")
+    _register_cancel(running_query, conn)
+    assert running_query.backend_query_id == "42"
+
+    # Cancelled with a cancel request, without using a connection of the pool
+    running_query.cancel()
+    dbapi_connection.cancel_safe.assert_called_once_with()
+
+
+def test_register_async_cancel(mocker: MockFixture):
+    conn = mocker.MagicMock()
+    driver_connection = conn.connection.driver_connection
+    driver_connection.info.backend_pid = 42
+    running_query = RunningQuery("id", "test", "SELECT 1")
+    _register_async_cancel(running_query, conn)
+    assert running_query.backend_query_id == "42"
+
+    running_query.cancel()
+    driver_connection.cancel.assert_called_once_with()
+
+
+@pytest.mark.parametrize(
+    "options", [{"copy_extraction": True}, {"server_side_cursors": True}, {"prepared_statements": True}]
+)
+@pytest.mark.asyncio
+async def test_aget_df_options_in_executor(mocker: MockFixture, options: dict):
+    """Options implemented with the sync engine only are not ignored by the async methods"""
+    retrieve_data = mocker.patch.object(PostgresConnector, "_retrieve_data", return_value=pd.DataFrame({"a": [1]}))
+    create_async_engine = mocker.patch.object(PostgresConnector, "create_async_engine")
+    connector = PostgresConnector(name="test", host="localhost", user="ubuntu", **options)
+    ds = PostgresDataSource(domain="test", name="test", query="SELECT 1")
+
+    df = await connector.aget_df(ds)
+    assert df["a"].tolist() == [1]
+    retrieve_data.assert_called_once()
+    create_async_engine.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "query,parameters",
+    [
+        ("SELECT * FROM City WHERE Population > %(min_pop)s ORDER BY Name;", {"min_pop": 5000000}),
+        ("SELECT * FROM City WHERE id = ANY({{ ids }}) AND Name NOT LIKE '%%x%%'", {"ids": [1, 2, 3]}),
+        ("SELECT * FROM City WHERE Name LIKE 'Z%' ORDER BY id", None),
+        ("SELECT * FROM City WHERE Population < 0", None),
+    ],
+)
+def test_get_df_with_copy(postgres_connector: PostgresConnector, query: str, parameters: dict | None):
+    ds = PostgresDataSource(domain="test", name="test", database="postgres_db", query=query, parameters=parameters)
+    expected = postgres_connector.get_df(ds)
+    copy_connector = postgres_connector.model_copy(update={"copy_extraction": True})
+    assert_frame_equal(copy_connector.get_df(ds), expected, check_dtype=False)
+
+
+def test_get_df_and_get_slice_with_server_side_cursors(postgres_connector: PostgresConnector):
+    ds = PostgresDataSource(
+        domain="test",
+        name="test",
+        database="postgres_db",
+        query="SELECT * FROM City WHERE Population > %(min_pop)s ORDER BY id",
+        parameters={"min_pop": 1000000},
+    )
+    expected = postgres_connector.get_df(ds)
+    cursor_connector = postgres_connector.model_copy(update={"server_side_cursors": True, "itersize": 7})
+    assert_frame_equal(cursor_connector.get_df(ds), expected)
+
+    batches = list(cursor_connector.iter_batches(ds, batch_size=10))
+    assert [len(batch) for batch in batches[:-1]] == [10] * (len(batches) - 1)
+    assert_frame_equal(pd.concat(batches, ignore_index=True), expected)
+
+    # Without pagination pushed down (e.g. with permissions), the slice is read from the cursor
+    permissions = {"column": "countrycode", "operator": "in", "value": ["BRA", "CHN", "IND"]}
+    expected_slice = postgres_connector.get_slice(ds, permissions=permissions, offset=2, limit=3)
+    data_slice = cursor_connector.get_slice(ds, permissions=permissions, offset=2, limit=3)
+    assert_frame_equal(data_slice.df, expected_slice.df)
+
+
+def test_server_side_cursors_options(mocker: MockFixture):
+    read_query = mocker.patch(
+        "toucan_connectors.postgres.postgresql_connector.pandas_read_sqlalchemy_query", return_value=pd.DataFrame()
+    )
+    mocker.patch.object(PostgresConnector, "create_engine")
+    ds = PostgresDataSource(domain="test", name="test", query="SELECT 1")
+
+    connector = PostgresConnector(name="test", host="localhost", user="ubuntu")
+    connector.get_df(ds)
+    assert read_query.call_args.kwargs["itersize"] is None
+    assert not connector._can_slice_batches()
+
+    connector = PostgresConnector(name="test", host="localhost", user="ubuntu", server_side_cursors=True, itersize=500)
+    connector.get_df(ds)
+    assert read_query.call_args.kwargs["itersize"] == 500
+    assert connector._can_slice_batches()
+
+
+def test_iter_batches_streams_results(mocker: MockFixture):
+    """Batches are always read from a server-side cursor, even when `server_side_cursors` is not set"""
+    iter_query = mocker.patch(
+        "toucan_connectors.postgres.postgresql_connector.pandas_iter_sqlalchemy_query",
+        return_value=iter([pd.DataFrame({"a": [1]})]),
+    )
+    mocker.patch.object(PostgresConnector, "create_engine")
+    ds = PostgresDataSource(domain="test", name="test", query="SELECT 1")
+
+    connector = PostgresConnector(name="test", host="localhost", user="ubuntu", itersize=500)
+    assert len(list(connector.iter_batches(ds, batch_size=10))) == 1
+    assert iter_query.call_args.kwargs["itersize"] == 500
+
+
+def test_get_df_with_prepared_statements(postgres_connector: PostgresConnector):
+    query = "SELECT * FROM City WHERE Population > %(min_pop)s ORDER BY id"
+    connector = postgres_connector.model_copy(update={"prepared_statements": True, "prepare_threshold": 0})
+    for min_pop in (1000000, 5000000, 1000000):
+        ds = PostgresDataSource(
+            domain="test", name="test", database="postgres_db", query=query, parameters={"min_pop": min_pop}
+        )
+        assert_frame_equal(connector.get_df(ds), postgres_connector.get_df(ds))
+
+    # The statement, prepared by the first request, is reused by the next ones on the same connection
+    engine = connector.create_engine(database="postgres_db")
+    with engine.connect() as conn:
+        cache = conn.connection.info[_PREPARED_STATEMENTS_INFO_KEY]
+        assert conn.connection.dbapi_connection.prepared_max == 100
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_use_prepared_statements(mocker: MockFixture):
+    connector = PostgresConnector(
+        name="test", host="localhost", user="ubuntu", prepared_statements=True, prepared_statements_max=10
+    )
+    conn, on_connect = mocker.MagicMock(), mocker.MagicMock()
+    conn.connection.info = {}
+    connector._use_prepared_statements("SELECT :a", "db", on_connect, conn)
+    connector._use_prepared_statements("SELECT :a", "db", on_connect, conn)
+
+    dbapi_connection = conn.connection.dbapi_connection
+    assert (dbapi_connection.prepare_threshold, dbapi_connection.prepared_max) == (1, 10)
+    conn.execution_options.assert_called_with(isolation_level="AUTOCOMMIT")
+    on_connect.assert_called_with(conn)
+    cache = conn.connection.info[_PREPARED_STATEMENTS_INFO_KEY]
+    assert "SELECT :a" in cache
+    assert (cache.hits, cache.misses) == (0, 2)
+
+    # Not with server-side cursors, whose statements are not prepared
+    read_query = mocker.patch(
+        "toucan_connectors.postgres.postgresql_connector.pandas_read_sqlalchemy_query", return_value=pd.DataFrame()
+    )
+    mocker.patch.object(PostgresConnector, "create_engine")
+    use_prepared_statements = mocker.patch.object(PostgresConnector, "_use_prepared_statements")
+    ds = PostgresDataSource(domain="test", name="test", query="SELECT 1")
+    connector.get_df(ds)
+    read_query.call_args.kwargs["on_connect"](conn)
+    assert use_prepared_statements.call_count == 1
+    connector.model_copy(update={"server_side_cursors": True}).get_df(ds)
+    read_query.call_args.kwargs["on_connect"](conn)
+    assert use_prepared_statements.call_count == 1
+
+
+def test_prepared_statements_kept_in_sync(mocker: MockFixture):
+    connector = PostgresConnector(name="test", host="localhost", user="ubuntu", prepared_statements=True)
+    conn, on_connect = mocker.MagicMock(), mocker.MagicMock()
+    conn.connection.info = {}
+    dbapi_connection = conn.connection.dbapi_connection
+    dbapi_connection.prepare_threshold, dbapi_connection.prepared_max = 5, 100
+    dbapi_connection.info.transaction_status = psycopg.pq.TransactionStatus.IDLE
+    for _ in range(3):
+        connector._use_prepared_statements("SELECT 1", "db", on_connect, conn)
+    cache = conn.connection.info[_PREPARED_STATEMENTS_INFO_KEY]
+    assert (cache.hits, len(cache)) == (1, 1)
+
+    # Rolling back an autocommit connection is a no-op for psycopg
+    _on_reset(dbapi_connection, conn.connection, None)
+    _on_rollback(conn)
+    assert len(cache) == 1
+    # psycopg deallocates its prepared statements when it rolls back a transaction
+    dbapi_connection.info.transaction_status = psycopg.pq.TransactionStatus.INTRANS
+    _on_rollback(conn)
+    assert len(cache) == 0
+
+    connector._use_prepared_statements("SELECT 1", "db", on_connect, conn)
+    _on_after_cursor_execute(conn, mocker.Mock(statusmessage="SELECT 1"), "SELECT 1", {}, None, False)
+    assert len(cache) == 1
+    _on_after_cursor_execute(conn, mocker.Mock(statusmessage="DISCARD ALL"), "DISCARD ALL", {}, None, False)
+    assert len(cache) == 0
+
+    # The settings of the connection are restored when it is checked in
+    assert (dbapi_connection.prepare_threshold, dbapi_connection.prepared_max) == (1, 100)
+    _on_checkin(dbapi_connection, conn.connection)
+    assert (dbapi_connection.prepare_threshold, dbapi_connection.prepared_max) == (5, 100)
+
+
+def test_listen_prepared_statements(mocker: MockFixture):
+    engine = sa.create_engine("sqlite://")
+    _listen_prepared_statements(engine)
+    _listen_prepared_statements(engine)
+    assert sa.event.contains(engine, "checkin", _on_checkin)
+
+    get_engine = mocker.patch(
+        "toucan_connectors.postgres.postgresql_connector.get_engine_registry"
+    ).return_value.get_engine
+    get_engine.return_value = mocker.MagicMock()
+    listen = mocker.patch("toucan_connectors.postgres.postgresql_connector._listen_prepared_statements")
+    PostgresConnector(name="test", host="localhost", user="ubuntu").create_engine("db")
+    listen.assert_not_called()
+    PostgresConnector(name="test", host="localhost", user="ubuntu", prepared_statements=True).create_engine("db")
+    listen.assert_called_once_with(get_engine.return_value)
+
+
+def test_prepared_statement_cache():
+    get_metrics().reset()
+    cache = PreparedStatementCache(prepare_threshold=1, max_size=2, database="db")
+    assert [cache.record("a") for _ in range(3)] == [False, False, True]
+    assert not cache.record("b")
+    assert cache.record("a")
+    # "b" is the least recently used query
+    assert not cache.record("c")
+    assert "b" not in cache and len(cache) == 2
+    assert (cache.hits, cache.misses, cache.evictions) == (2, 4, 1)
+
+    counters = get_metrics().snapshot()["counters"]
+    assert counters["postgres.prepared_statements.hits"] == [{"labels": {"database": "db"}, "value": 2}]
+    assert counters["postgres.prepared_statements.evictions"] == [{"labels": {"database": "db"}, "value": 1}]
+
+
+def test_read_copy_table(mocker: MockFixture):
+    cursor = mocker.MagicMock()
+    cursor.description = [mocker.Mock(type_code=type_code) for type_code in (23, 16, 701, 25, 1082, 1184, 3802, 1700)]
+    for column, name in zip(
+        cursor.description, ["id", "ok", "ratio", "name", "day", "at", "doc", "amount"], strict=True
+    ):
+        column.name = name
+    # Rows are split across the chunks sent by the server
+    chunks = [
+        b'1,t,0.5,"",2024-01-31,2024-01-31 10:00:00+01,"{""a"": 1}",1.25\n2,f,NaN,',
+        b'"a,""b""",,2024-01-31 10:00:00.5+00,,\n',
+        b",,,,,,,\n",
+    ]
+    cursor.copy.return_value.__enter__.return_value = iter(chunks)
+
+    table = read_copy_table(cursor, "SELECT * FROM t WHERE id = ANY(%(ids)s);", {"ids": [1, 2]})
+    cursor.execute.assert_called_once_with(
+        "SELECT * FROM (SELECT * FROM t WHERE id = ANY(%(ids)s)) AS q LIMIT 0", {"ids": [1, 2]}
+    )
+    cursor.copy.assert_called_once_with(
+        "COPY (SELECT * FROM t WHERE id = ANY(%(ids)s)) TO STDOUT (FORMAT csv)", {"ids": [1, 2]}
+    )
+    df = table.to_pandas()
+    assert df["id"].tolist()[:2] == [1, 2]
+    assert df["ok"].tolist() == [True, False, None]
+    assert df["name"].tolist() == ["", 'a,"b"', None]
+    assert df["doc"].tolist() == ['{"a": 1}', None, None]
+    assert df["amount"].tolist()[0] == 1.25
+    assert str(table.schema.field("day").type) == "date32[day]"
+    assert df["at"].tolist()[:2] == [
+        pd.Timestamp("2024-01-31 09:00:00", tz="UTC"),
+        pd.Timestamp("2024-01-31 10:00:00.5", tz="UTC"),
+    ]
+
+
+def test_read_copy_table_duplicate_names(mocker: MockFixture):
+    """Columns are typed by position, whatever their names"""
+    cursor = mocker.MagicMock()
+    cursor.description = [mocker.Mock(type_code=23), mocker.Mock(type_code=25), mocker.Mock(type_code=1082)]
+    for column in cursor.description:
+        column.name = "id"
+    cursor.copy.return_value.__enter__.return_value = iter([b"1,a,2024-01-31\n"])
+
+    table = read_copy_table(cursor, "SELECT a.id, b.id, c.id FROM a, b, c")
+    assert table.schema.names == ["id", "id", "id"]
+    assert [str(field.type) for field in table.schema] == ["int64", "string", "date32[day]"]
+
+
+def test_read_copy_table_conversion_error(mocker: MockFixture):
+    cursor = mocker.MagicMock()
+    cursor.description = [mocker.Mock(type_code=1082)]
+    cursor.description[0].name = "day"
+    cursor.copy.return_value.__enter__.return_value = iter([b"2024-01-31\ninfinity\n"])
+
+    with pytest.raises(CopyConversionError):
+        read_copy_table(cursor, "SELECT day FROM t")
+
+
+def test_get_df_with_copy_fallback(mocker: MockFixture):
+    """Results which cannot be converted from the COPY are retrieved row by row"""
+    mocker.patch.object(PostgresConnector, "create_engine")
+    mocker.patch.object(PostgresConnector, "_read_with_copy", side_effect=CopyConversionError("infinity"))
+    read_query = mocker.patch(
+        "toucan_connectors.postgres.postgresql_connector.pandas_read_sqlalchemy_query",
+        return_value=pd.DataFrame({"day": [None]}),
+    )
+    connector = PostgresConnector(name="test", host="localhost", user="ubuntu", copy_extraction=True)
+    df = connector.get_df(PostgresDataSource(domain="test", name="test", query="SELECT day FROM t"))
+    assert read_query.call_count == 1
+    assert df.columns.tolist() == ["day"]
+
+
+def test_read_copy_table_empty(mocker: MockFixture):
+    cursor = mocker.MagicMock()
+    cursor.description = [mocker.Mock(type_code=20), mocker.Mock(type_code=1043)]
+    cursor.description[0].name, cursor.description[1].name = "id", "name"
+    cursor.copy.return_value.__enter__.return_value = iter([])
+
+    table = read_copy_table(cursor, "SELECT id, name FROM t WHERE false")
+    assert table.num_rows == 0
+    assert table.schema.names == ["id", "name"]
+    assert str(table.schema.field("id").type) == "int64"
@@ -7,12 +7,16 @@ from urllib.error import HTTPError
 
 import jwt
 import pandas as pd
+import pyarrow as pa
 import pytest
 import snowflake
 from pandas import DataFrame
 from pandas.testing import assert_frame_equal
 from pydantic import SecretStr, ValidationError
 from pytest_mock import MockerFixture
+from snowflake.connector.cursor import ResultMetadata
+from snowflake.connector.errors import NotSupportedError
+from snowflake.connector.result_batch import ArrowResultBatch
 
 from toucan_connectors import DataSlice
 from toucan_connectors.common import ConnectorStatus
@@ -22,7 +26,7 @@ from toucan_connectors.snowflake import (
     SnowflakeConnector,
     SnowflakeDataSource,
 )
-from toucan_connectors.snowflake.snowflake_connector import SnowflakeConnection
+from toucan_connectors.snowflake.snowflake_connector import SnowflakeConnection, connection_manager, query_results
 
 OAUTH_TOKEN_ENDPOINT = "http://example.com/endpoint"
 OAUTH_TOKEN_ENDPOINT_CONTENT_TYPE = "application/x-www-form-urlencoded"
@@ -32,6 +36,13 @@ OAUTH_CLIENT_ID = "client_id"
 OAUTH_CLIENT_SECRET = "client_s3cr3t"
 
 
+@pytest.fixture(autouse=True)
+def clean_sessions():
+    yield
+    connection_manager.force_clean()
+    query_results.clear()
+
+
 @pytest.fixture
 def snowflake_connector_oauth(mocker):
     user_tokens_keeper = mocker.Mock(
@@ -101,6 +112,10 @@ class _SFCursor(MagicMock):
     def set_return_value(self, v: Any):
         self.execute.return_value.fetchall.return_value = v
 
+    def set_arrow_return_value(self, v: pa.Table):
+        self.execute.return_value.fetch_arrow_all.side_effect = None
+        self.execute.return_value.fetch_arrow_all.return_value = v
+
     def set_side_effect(self, v: Any):
         self.execute.return_value.fetchall.side_effect = v
 
@@ -111,6 +126,8 @@ class _SFCursor(MagicMock):
 @pytest.fixture
 def snowflake_cursor(mocker: MockerFixture, snowflake_connect: MagicMock) -> _SFCursor:
     cursor = _SFCursor()
+    # Results are not in the Arrow format unless specified
+    cursor.execute.return_value.fetch_arrow_all.side_effect = NotSupportedError
     mocker.patch.object(SnowflakeConnection, "cursor", return_value=cursor)
     return cursor
 
@@ -247,6 +264,44 @@ def test_retrieve_data_slice_too_much(
     assert 11 == len(df_result.df)
 
 
+def test_retrieve_data_arrow(
+    snowflake_connector: SnowflakeConnector, snowflake_datasource: SnowflakeDataSource, snowflake_cursor: _SFCursor
+):
+    table = pa.table({"name": ["a", "b", "c"], "value": [1, 2, 3]})
+    snowflake_cursor.set_arrow_return_value(table)
+
+    assert snowflake_connector.get_arrow(snowflake_datasource) is table
+    df = snowflake_connector.get_df(snowflake_datasource)
+    assert_frame_equal(df, pd.DataFrame({"name": ["a", "b", "c"], "value": [1, 2, 3]}))
+    snowflake_cursor.execute.return_value.fetchall.assert_not_called()
+
+
+def test_retrieve_data_slice_arrow(
+    snowflake_connector: SnowflakeConnector, snowflake_datasource: SnowflakeDataSource, snowflake_cursor: _SFCursor
+):
+    table = pa.table({"name": ["a", "b"]})
+    snowflake_cursor.set_arrow_return_value(table)
+
+    snowflake_cursor.execute.return_value.description = [ResultMetadata("name", 2, None, None, None, None, True)]
+
+    df_result: DataSlice = snowflake_connector.get_slice(snowflake_datasource, limit=2)
+    assert df_result.table is table
+    assert df_result.df["name"].tolist() == ["a", "b"]
+    assert df_result.query_metadata.columns == {"name": "text"}
+
+
+def test_iter_batches(
+    snowflake_connector: SnowflakeConnector, snowflake_datasource: SnowflakeDataSource, snowflake_cursor: _SFCursor
+):
+    snowflake_cursor.execute.return_value.fetch_arrow_batches.return_value = iter(
+        [pa.table({"value": [1, 2, 3]}), pa.table({"value": [4]})]
+    )
+
+    batches = list(snowflake_connector.iter_batches(snowflake_datasource, batch_size=2))
+    assert [batch["value"].tolist() for batch in batches] == [[1, 2], [3], [4]]
+    snowflake_cursor.execute.return_value.fetch_arrow_all.assert_not_called()
+
+
 @pytest.mark.usefixtures("snowflake_retrieve_data")
 def test_retrieve_data_fetch(snowflake_connector: SnowflakeConnector, snowflake_datasource: SnowflakeDataSource):
     df_result = snowflake_connector._fetch_data(snowflake_datasource)
@@ -569,6 +624,37 @@ def test_get_model_all_dbs(snowflake_connector: SnowflakeConnector, dbs: list[st
     assert res == [{**_EXPECTED_MODEL, "database": db} for db in dbs]
 
 
+def test_get_model_partial(
+    snowflake_connector: SnowflakeConnector,
+    snowflake_cursor: _SFCursor,
+    snowflake_connect: MagicMock,
+    mocker: MockerFixture,
+):
+    mocker.patch.object(SnowflakeConnector, "_get_databases", return_value=["DB_1", "BROKEN", "DB_2"])
+
+    def execute(query: str, parameters: Any):
+        if '"BROKEN".information_schema' in query:
+            raise snowflake.connector.errors.ProgrammingError("Insufficient privileges")
+        database = "DB_1" if '"DB_1".information_schema' in query else "DB_2"
+        result = MagicMock()
+        result.fetchall.return_value = [
+            {"DATABASE": database, "SCHEMA": "PUBLIC", "TYPE": "table", "NAME": "T", "COLUMNS": "[]"}
+        ]
+        return result
+
+    snowflake_cursor.execute.side_effect = execute
+    snowflake_connector.catalog_max_concurrency = 2
+
+    tables_info, metadata = snowflake_connector.get_model_with_info()
+    assert sorted(table["database"] for table in tables_info) == ["DB_1", "DB_2"]
+    assert metadata == {"info": {"Could not reach databases": ["BROKEN"]}}
+    assert sorted(table["database"] for table in snowflake_connector.get_model()) == ["DB_1", "DB_2"]
+    # Sessions of the default warehouse are shared by all the databases
+    assert 1 <= snowflake_connect.call_count <= 2
+    assert {call.kwargs["database"] for call in snowflake_connect.call_args_list} == {None}
+    assert {call.kwargs["warehouse"] for call in snowflake_connect.call_args_list} == {"warehouse_1"}
+
+
 def test_get_model_exception(snowflake_connector: SnowflakeConnector, snowflake_cursor: _SFCursor):
     snowflake_cursor.set_side_effect(Exception)
 
@@ -632,3 +718,136 @@ def test_instanciate_snowflake_connector_keypair_no_key() -> None:
             account="account",
             authentication_method=AuthenticationMethod.KEYPAIR,
         )
+
+
+def test_sessions_reused(
+    snowflake_connector: SnowflakeConnector, snowflake_connect: MagicMock, snowflake_cursor: _SFCursor
+):
+    snowflake_cursor.set_return_value([{"name": "database_1"}])
+    snowflake_connector._get_databases()
+    snowflake_connector._get_databases()
+    assert snowflake_connect.call_count == 1
+
+    # Sessions are not shared between warehouses
+    snowflake_connector._get_warehouses("warehouse_2")
+    assert snowflake_connect.call_count == 2
+
+
+def test_changed_sessions_not_reused(
+    mocker: MockerFixture, snowflake_connector: SnowflakeConnector, snowflake_connect: MagicMock
+):
+    snowflake_cursor = _SFCursor()
+    snowflake_cursor.set_return_value([{"status": "ok"}])
+
+    def cursor(connection: SnowflakeConnection, *args: Any) -> _SFCursor:
+        snowflake_cursor.connection = connection
+        return snowflake_cursor
+
+    mocker.patch.object(SnowflakeConnection, "cursor", autospec=True, side_effect=cursor)
+    mocker.patch.object(SnowflakeConnection, "close")
+    snowflake_connector._execute_query("SELECT 1", as_df=False)
+    snowflake_connector._execute_query("SELECT 1", as_df=False)
+    assert snowflake_connect.call_count == 1
+
+    # The role of the session is changed, so it is closed instead of being given to the next request
+    snowflake_connector._execute_query("USE ROLE ADMIN", as_df=False)
+    snowflake_connector._execute_query("SELECT 1", as_df=False)
+    assert snowflake_connect.call_count == 2
+
+
+def test_keypair_private_key_loaded_in_memory():
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.BestAvailableEncryption(b"passphrase"),
+    ).decode()
+    connector = SnowflakeConnector(
+        name="sf-connector",
+        user="user",
+        password="passphrase",
+        account="account",
+        private_key=pem,
+        authentication_method=AuthenticationMethod.KEYPAIR,
+    )
+
+    params = connector.get_connection_params()
+    assert params["authenticator"] == "SNOWFLAKE_JWT"
+    assert "private_key_file" not in params
+    assert serialization.load_der_private_key(params["private_key"], None).private_numbers() == key.private_numbers()
+    # The key is only parsed once
+    assert connector.get_connection_params()["private_key"] is params["private_key"]
+
+
+def _result_batch(table: pa.Table) -> MagicMock:
+    batch = MagicMock(spec=ArrowResultBatch)
+    batch.rowcount = table.num_rows
+    batch.to_arrow.return_value = table
+    return batch
+
+
+@pytest.fixture
+def snowflake_async_cursor(snowflake_cursor: _SFCursor) -> _SFCursor:
+    snowflake_cursor.sfqid = "01b2c3d4-0000-0001-0000-000000000001"
+    snowflake_cursor.connection.is_still_running.return_value = False
+    snowflake_cursor.description = [ResultMetadata("A", 0, None, None, None, None, None)]
+    snowflake_cursor.get_result_batches.return_value = [
+        _result_batch(pa.table({"A": [1, 2, 3]})),
+        _result_batch(pa.table({"A": [4, 5, 6]})),
+    ]
+    return snowflake_cursor
+
+
+def test_get_slice_from_query_result(
+    snowflake_connector: SnowflakeConnector,
+    snowflake_datasource: SnowflakeDataSource,
+    snowflake_async_cursor: _SFCursor,
+):
+    snowflake_connector.paginate_from_query_results = True
+    first_batch, second_batch = snowflake_async_cursor.get_result_batches.return_value
+
+    first_page = snowflake_connector.get_slice(snowflake_datasource, offset=0, limit=2)
+    assert first_page.df["A"].tolist() == [1, 2]
+    assert first_page.pagination_info.pagination_info.total_rows == 6
+    assert first_page.query_metadata.columns == {"A": "float"}
+    second_batch.to_arrow.assert_not_called()
+
+    second_page = snowflake_connector.get_slice(snowflake_datasource, offset=2, limit=2)
+    assert second_page.df["A"].tolist() == [3, 4]
+    assert second_page.pagination_info.next_page.offset == 4
+
+    last_page = snowflake_connector.get_slice(snowflake_datasource, offset=4, limit=2)
+    assert last_page.df["A"].tolist() == [5, 6]
+    assert last_page.pagination_info.pagination_info.is_last_page
+
+    # The query is executed once, for all the pages
+    snowflake_async_cursor.execute_async.assert_called_once()
+    snowflake_async_cursor.query_result.assert_called_once_with("01b2c3d4-0000-0001-0000-000000000001")
+    snowflake_async_cursor.execute.assert_not_called()
+
+    # Another query is executed
+    snowflake_connector.get_slice(snowflake_datasource.model_copy(update={"query": "SELECT 2"}), offset=0, limit=2)
+    assert snowflake_async_cursor.execute_async.call_count == 2
+
+
+def test_get_slice_from_query_result_scan(
+    snowflake_connector: SnowflakeConnector,
+    snowflake_datasource: SnowflakeDataSource,
+    snowflake_async_cursor: _SFCursor,
+):
+    snowflake_connector.paginate_from_query_results = True
+    for batch in snowflake_async_cursor.get_result_batches.return_value:
+        batch.to_arrow.side_effect = Exception("URL expired")
+    snowflake_async_cursor.set_arrow_return_value(pa.table({"A": [3, 4]}))
+
+    data_slice = snowflake_connector.get_slice(snowflake_datasource, offset=2, limit=2)
+    assert data_slice.df["A"].tolist() == [3, 4]
+    assert data_slice.pagination_info.pagination_info.total_rows == 6
+    snowflake_async_cursor.execute.assert_called_once_with(
+        "SELECT * FROM (SELECT * FROM TABLE(RESULT_SCAN('01b2c3d4-0000-0001-0000-000000000001')))"
+        " AS _toucan_slice LIMIT 2 OFFSET 2;",
+        [],
+    )
@@ -1,3 +1,5 @@
+import asyncio
+import sqlite3
 from datetime import date, datetime, timedelta
 from typing import Any
 
@@ -5,6 +7,7 @@ import jinja2
 import numpy as np
 import pandas as pd
 import pytest
+import sqlalchemy as sa
 from jinja2 import Undefined
 from pandas.testing import assert_frame_equal
 from pytest_mock import MockFixture
@@ -24,8 +27,12 @@ from toucan_connectors.common import (
     infer_datetime_dtype,
     is_interpolating_table_name,
     nosql_apply_parameters_to_query,
+    pandas_iter_sql,
+    pandas_iter_sqlalchemy_query,
     pandas_read_sql,
+    pandas_read_sqlalchemy_query,
     pyformat_params_to_jinja,
+    run_coroutine_sync,
     sanitize_query,
 )
 
@@ -454,6 +461,74 @@ def test_pandas_read_sql_error(mocker: MockFixture):
     assert "Some error" in str(e.value)
 
 
+def test_pandas_iter_sql():
+    con = sqlite3.connect(":memory:")
+    con.execute("CREATE TABLE city (name TEXT, population INTEGER)")
+    con.executemany(
+        "INSERT INTO city VALUES (?, ?)", [("Paris", 2_000_000), ("London", 9_000_000), ("Berlin", 3_500_000)]
+    )
+    chunks = list(
+        pandas_iter_sql(
+            "SELECT * FROM city WHERE population > {{ min_pop }} ORDER BY name",
+            con=con,
+            chunksize=1,
+            params={"min_pop": 2_500_000},
+            convert_to_qmark=True,
+        )
+    )
+    assert [chunk["name"].tolist() for chunk in chunks] == [["Berlin"], ["London"]]
+
+
+def test_pandas_iter_sql_forbidden_interpolation(mocker: MockFixture):
+    mocker.patch("pandas.read_sql", side_effect=pd.io.sql.DatabaseError("Some error"))
+    with pytest.raises(pd.io.sql.DatabaseError) as e:
+        next(
+            pandas_iter_sql(
+                query="SELECT * FROM %(tablename)s WHERE Population > 5000000",
+                con="sample_connexion",
+                chunksize=10,
+                params={"tablename": "City"},
+            )
+        )
+    assert "interpolating table name is forbidden" in str(e.value)
+
+
+def test_pandas_iter_sqlalchemy_query():
+    engine = sa.create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(sa.text("CREATE TABLE city (name TEXT, population INTEGER)"))
+        conn.execute(sa.text("INSERT INTO city VALUES ('Paris', 2000000), ('London', 9000000), ('Berlin', 3500000)"))
+    chunks = list(
+        pandas_iter_sqlalchemy_query(
+            query="SELECT name FROM city WHERE population > :min_pop ORDER BY name",
+            engine=engine,
+            chunksize=2,
+            params={"min_pop": 1_000_000},
+        )
+    )
+    assert [chunk["name"].tolist() for chunk in chunks] == [["Berlin", "London"], ["Paris"]]
+
+
+def test_pandas_sqlalchemy_query_itersize():
+    engine = sa.create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(sa.text("CREATE TABLE city (name TEXT, population INTEGER)"))
+        conn.execute(sa.text("INSERT INTO city VALUES ('Paris', 2000000), ('London', 9000000), ('Berlin', 3500000)"))
+    query = "SELECT name FROM city WHERE population > :min_pop ORDER BY name"
+
+    df = pandas_read_sqlalchemy_query(query=query, engine=engine, params={"min_pop": 1_000_000}, itersize=2)
+    assert df["name"].tolist() == ["Berlin", "London", "Paris"]
+    assert df.index.tolist() == [0, 1, 2]
+
+    df = pandas_read_sqlalchemy_query(query=query, engine=engine, params={"min_pop": 10_000_000}, itersize=2)
+    assert df.empty and df.columns.tolist() == ["name"]
+
+    chunks = pandas_iter_sqlalchemy_query(
+        query=query, engine=engine, chunksize=2, params={"min_pop": 1_000_000}, itersize=1
+    )
+    assert [chunk["name"].tolist() for chunk in chunks] == [["Berlin", "London"], ["Paris"]]
+
+
 def test_pandas_read_sql_duplicate_columns(mocker: MockFixture):
     duplicate_cols_df = pd.DataFrame(
         {
@@ -629,3 +704,17 @@ def test_convert_jinja_params_to_sqlalchemy_named(query: str, expected: str) ->
 )
 def test_pyformat_params_to_jinja(query: str, expected_query: str) -> None:
     assert pyformat_params_to_jinja(query) == expected_query
+
+
+async def _double(value: int) -> int:
+    await asyncio.sleep(0)
+    return value * 2
+
+
+def test_run_coroutine_sync():
+    assert run_coroutine_sync(_double(2)) == 4
+
+
+@pytest.mark.asyncio
+async def test_run_coroutine_sync_in_running_loop():
+    assert run_coroutine_sync(_double(3)) == 6
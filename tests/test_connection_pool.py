@@ -0,0 +1,288 @@
+import threading
+import time
+
+import pytest
+
+from toucan_connectors.connection_manager import ConnectionManager, ConnectionPool, PoolTimeoutError
+from toucan_connectors.metrics import get_metrics
+
+
+class Connection:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+OPENED: list[Connection] = []
+
+
+@pytest.fixture(autouse=True)
+def reset():
+    OPENED.clear()
+
+
+def connect():
+    connection = Connection()
+    OPENED.append(connection)
+    return connection
+
+
+def alive(connection):
+    return not connection.closed
+
+
+def close(connection):
+    connection.close()
+
+
+@pytest.fixture
+def connection_manager():
+    cm = ConnectionManager(name="test", time_between_clean=0.1, max_size=2, checkout_timeout=0.2)
+    yield cm
+    cm.shutdown()
+
+
+def test_checkout_checkin():
+    pool = ConnectionPool("id", max_size=2)
+    first = pool.checkout(connect, alive, close, timeout=1)
+    second = pool.checkout(connect, alive, close, timeout=1)
+    assert first.connection is not second.connection
+    assert pool.size == 2
+
+    pool.checkin(first)
+    assert pool.checkout(connect, alive, close, timeout=1) is first
+    assert len(OPENED) == 2
+
+
+def test_checkout_waits_for_checkin():
+    pool = ConnectionPool("id", max_size=1)
+    co = pool.checkout(connect, alive, close, timeout=1)
+
+    with pytest.raises(PoolTimeoutError):
+        pool.checkout(connect, alive, close, timeout=0.05)
+
+    threading.Timer(0.05, pool.checkin, args=(co,)).start()
+    assert pool.checkout(connect, alive, close, timeout=1) is co
+    assert len(OPENED) == 1
+
+
+def test_checkout_health_check():
+    pool = ConnectionPool("id", max_size=1, health_check_interval=0)
+    co = pool.checkout(connect, alive, close, timeout=1)
+    pool.checkin(co)
+    co.connection.closed = True
+
+    new_co = pool.checkout(connect, alive, close, timeout=1)
+    assert new_co is not co
+    assert new_co.connection is OPENED[1]
+
+
+def test_max_lifetime():
+    pool = ConnectionPool("id", max_size=1, max_lifetime=0.05)
+    co = pool.checkout(connect, alive, close, timeout=1)
+    time.sleep(0.1)
+    pool.checkin(co)
+    assert co.connection.closed
+    assert pool.is_empty()
+
+
+def test_reap():
+    pool = ConnectionPool("id", max_size=2)
+    first = pool.checkout(connect, alive, close, timeout=1)
+    second = pool.checkout(connect, alive, close, timeout=1)
+    pool.checkin(first)
+    pool.checkin(second)
+    first.t_get -= 10
+
+    assert pool.reap(first, time_keep_alive=5) is None
+    assert first.connection.closed
+    assert pool.reap(second, time_keep_alive=5) == second.t_get + 5
+    assert pool.idle == [second]
+
+
+def test_take_idle_and_release():
+    pool = ConnectionPool("id", max_size=1)
+    co = pool.checkout(connect, alive, close, timeout=1)
+    pool.checkin(co)
+
+    assert pool.take_idle() == [co]
+    # Taken connections are not handed out
+    with pytest.raises(PoolTimeoutError):
+        pool.checkout(connect, alive, close, timeout=0.05)
+    pool.release(co)
+    assert pool.idle == [co]
+
+
+def test_close_failure_retried():
+    def failing_close(connection):
+        raise TimeoutError
+
+    pool = ConnectionPool("id", max_size=1, max_lifetime=0)
+    pool.checkin(pool.checkout(connect, alive, failing_close, timeout=1))
+    assert len(pool.closing) == 1
+    assert pool.size == 0
+    for _ in range(3):
+        pool.retry_close()
+    assert pool.is_empty()
+
+
+def test_connection_manager_concurrent_gets(connection_manager):
+    with (
+        connection_manager.checkout("id", connect, alive, close) as first,
+        connection_manager.checkout("id", connect, alive, close) as second,
+    ):
+        assert first is not second
+        assert len(connection_manager.connection_list) == 1
+        with pytest.raises(PoolTimeoutError):
+            with connection_manager.checkout("id", connect, alive, close):
+                pass
+
+    with connection_manager.checkout("id", connect, alive, close) as connection:
+        assert connection in (first, second)
+    assert len(OPENED) == 2
+
+
+def test_connection_manager_force_clean(connection_manager):
+    with connection_manager.checkout("id", connect, alive, close) as connection:
+        connection_manager.force_clean()
+        assert connection_manager.connection_list == {}
+        assert not connection.closed
+    # Checked in after the pool was closed
+    assert connection.closed
+
+
+def test_connection_manager_not_saved(connection_manager):
+    with connection_manager.checkout("id", connect, alive, close, save=False) as connection:
+        assert connection_manager.connection_list == {}
+    assert connection.closed
+
+
+def test_connection_manager_get(connection_manager):
+    # `get` returns the connection itself, which stays available in the pool
+    connection = connection_manager.get("id", connect, alive, close)
+    assert connection_manager.get("id", connect, alive, close) is connection
+    with connection_manager.checkout("id", connect, alive, close) as checked_out:
+        assert checked_out is connection
+    assert connection_manager.stats() == {"id": {"idle": 1, "in_use": 0, "opening": 0, "closing": 0}}
+
+    not_saved = connection_manager.get("id", connect, alive, close, save=False)
+    assert not_saved is not connection
+    assert not not_saved.closed
+
+
+def test_connection_manager_reset(connection_manager):
+    def reset(connection):
+        # Dirty connections cannot be reset
+        if getattr(connection, "dirty", False):
+            return False
+        connection.reset = True
+        return True
+
+    with connection_manager.checkout("id", connect, alive, close, reset_method=reset) as connection:
+        pass
+    assert connection.reset and not connection.closed
+
+    with connection_manager.checkout("id", connect, alive, close, reset_method=reset) as reused:
+        assert reused is connection
+        reused.dirty = True
+    assert reused.closed
+
+    def failing_reset(connection):
+        raise RuntimeError("oops")
+
+    with connection_manager.checkout("id", connect, alive, close, reset_method=failing_reset) as connection:
+        assert connection is not reused
+    assert connection.closed
+    assert connection_manager.stats()["id"]["idle"] == 0
+
+
+def wait_until(predicate, timeout: float = 2) -> bool:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_reaper_idle_timeout(connection_manager):
+    connection_manager.time_between_clean = 60
+    connection_manager.time_keep_alive = 0.1
+    with (
+        connection_manager.checkout("id", connect, alive, close) as first,
+        connection_manager.checkout("id", connect, alive, close) as second,
+    ):
+        pass
+    # The most recently checked in connection is handed out first
+    with connection_manager.checkout("id", connect, alive, close) as connection:
+        assert connection is first
+
+    assert wait_until(lambda: first.closed)
+    assert wait_until(lambda: second.closed)
+    assert wait_until(lambda: connection_manager.connection_list == {})
+    assert connection_manager._idle_deadlines == []
+    assert [thread.name for thread in threading.enumerate()].count("test-reaper") == 1
+
+
+def test_reaper_probes_connections(connection_manager):
+    with (
+        connection_manager.checkout("id", connect, alive, close) as first,
+        connection_manager.checkout("id", connect, alive, close),
+    ):
+        pass
+    first.closed = True
+    assert wait_until(lambda: connection_manager.connection_list["id"].size == 1)
+    assert not OPENED[1].closed
+
+
+def test_shutdown(connection_manager):
+    with connection_manager.checkout("id", connect, alive, close) as connection:
+        pass
+    reaper = connection_manager._reaper
+    connection_manager.shutdown()
+    assert not reaper.is_alive()
+    assert connection.closed
+    assert connection_manager.connection_list == {}
+
+
+def _metric(kind: str, name: str, **labels) -> list:
+    return [
+        value for value in get_metrics().snapshot()[kind].get(name, []) if labels.items() <= value["labels"].items()
+    ]
+
+
+def test_metrics(connection_manager):
+    connection_manager.name = "test_metrics"
+    connection_manager.health_check_interval = 0
+    with connection_manager.checkout("id", connect, alive, close) as connection:
+        gauges = _metric("gauges", "connection_manager.connections", manager="test_metrics")
+        assert {gauge["labels"]["state"]: gauge["value"] for gauge in gauges} == {
+            "idle": 0,
+            "in_use": 1,
+            "opening": 0,
+            "closing": 0,
+        }
+    connection.closed = True
+    with connection_manager.checkout("id", connect, alive, close):
+        pass
+
+    assert _metric("counters", "connection_manager.connections_created", manager="test_metrics")[0]["value"] == 2
+    assert _metric("counters", "connection_manager.liveness_check_failures", manager="test_metrics") == [
+        {"labels": {"manager": "test_metrics", "identifier": "id", "phase": "checkout"}, "value": 1}
+    ]
+    [closed] = _metric("counters", "connection_manager.connections_closed", manager="test_metrics")
+    assert closed["labels"]["reason"] == "not_alive"
+    assert _metric("histograms", "connection_manager.checkout_wait_seconds", manager="test_metrics")[0]["count"] == 2
+    assert _metric("histograms", "connection_manager.connect_seconds", manager="test_metrics")[0]["count"] == 2
+
+
+def test_metrics_removed_with_pool(connection_manager):
+    connection_manager.name = "test_metrics_removed"
+    with connection_manager.checkout("id", connect, alive, close):
+        connection_manager.force_clean()
+        assert _metric("counters", "connection_manager.connections_created", manager="test_metrics_removed")
+    # The pool is closed with its last connection, so its metrics are not kept forever
+    assert not _metric("counters", "connection_manager.connections_created", manager="test_metrics_removed")
+    assert not _metric("histograms", "connection_manager.connect_seconds", manager="test_metrics_removed")
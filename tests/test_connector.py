@@ -1,20 +1,28 @@
-from time import time
+import threading
+from time import sleep, time
 
 import pandas as pd
+import pyarrow as pa
 import pytest
 import tenacity as tny
 from pydantic import create_model
+from pytest_mock import MockerFixture
 
 from toucan_connectors.common import ConnectorStatus
 from toucan_connectors.pagination import OffsetLimitInfo
 from toucan_connectors.toucan_connector import (
+    DfRequest,
     DiscoverableConnector,
     MalformedVersion,
+    SliceRequest,
     TableInfo,
     ToucanConnector,
     ToucanDataSource,
     UnavailableVersion,
     VersionableEngineConnector,
+    get_dfs,
+    iter_df_chunks,
+    run_batch,
     strlist_to_enum,
 )
 
@@ -131,6 +139,317 @@ def test_get_slice():
     assert res.pagination_info.pagination_info.total_rows == 5
 
 
+def test_iter_df_chunks():
+    df = pd.DataFrame({"A": [1, 2, 3, 4, 5]})
+    chunks = list(iter_df_chunks(df, 2))
+    assert [chunk["A"].tolist() for chunk in chunks] == [[1, 2], [3, 4], [5]]
+
+    # an empty dataframe is yielded once to keep its columns
+    chunks = list(iter_df_chunks(pd.DataFrame(columns=["A"]), 2))
+    assert len(chunks) == 1
+    assert chunks[0].columns.tolist() == ["A"]
+
+
+def test_iter_batches():
+    class DataConnector(ToucanConnector, data_source_model=DataSource):
+        type: str = "MyDB"
+
+        def _retrieve_data(self, datasource):
+            return pd.DataFrame({0: [1, 2, 3, 4, 5]})
+
+    connector = DataConnector(name="my_name")
+    ds = connector.data_source_model(domain="yo", name="my_name", query="")
+
+    batches = list(connector.iter_batches(ds, batch_size=2))
+    assert [batch["0"].tolist() for batch in batches] == [[1, 2], [3, 4], [5]]
+    assert pd.concat(batches).equals(connector.get_df(ds))
+
+    # permissions are applied on each batch
+    batches = list(connector.iter_batches(ds, permissions={"column": "0", "operator": "gt", "value": 2}, batch_size=2))
+    assert [batch["0"].tolist() for batch in batches] == [[], [3, 4], [5]]
+
+    with pytest.raises(ValueError):
+        next(connector.iter_batches(ds, batch_size=0))
+
+
+def test_iter_batches_streaming_connector():
+    class StreamingDataConnector(ToucanConnector, data_source_model=DataSource):
+        type: str = "MyDB"
+
+        def _retrieve_data(self, datasource):
+            raise NotImplementedError
+
+        def _retrieve_batches(self, datasource, batch_size):
+            for start in range(0, 5, batch_size):
+                yield pd.DataFrame({"A": list(range(start, min(start + batch_size, 5)))})
+
+    connector = StreamingDataConnector(name="my_name")
+    ds = connector.data_source_model(domain="yo", name="my_name", query="")
+    batches = connector.iter_batches(ds, batch_size=3)
+    assert next(batches)["A"].tolist() == [0, 1, 2]
+    assert next(batches)["A"].tolist() == [3, 4]
+    with pytest.raises(StopIteration):
+        next(batches)
+
+
+def test_get_slice_from_batches():
+    read_batches = []
+
+    class StreamingDataConnector(ToucanConnector, data_source_model=DataSource):
+        type: str = "MyDB"
+
+        def _retrieve_data(self, datasource):
+            raise NotImplementedError
+
+        def _retrieve_batches(self, datasource, batch_size):
+            for start in range(0, 10, 3):
+                read_batches.append(start)
+                yield pd.DataFrame({"A": list(range(start, min(start + 3, 10)))})
+
+        def _can_slice_batches(self):
+            return True
+
+    connector = StreamingDataConnector(name="my_name")
+    ds = connector.data_source_model(domain="yo", name="my_name", query="")
+
+    # The batches are not read anymore once the slice is complete
+    res = connector.get_slice(ds, offset=2, limit=3)
+    assert res.df["A"].tolist() == [2, 3, 4]
+    assert read_batches == [0, 3]
+    assert res.pagination_info.pagination_info.type == "unknown_size"
+    assert res.pagination_info.next_page == OffsetLimitInfo(offset=5, limit=3)
+
+    # ...unless the rows are counted
+    read_batches.clear()
+    res = connector.get_slice(ds, offset=2, limit=3, get_row_count=True)
+    assert res.df["A"].tolist() == [2, 3, 4]
+    assert read_batches == [0, 3, 6, 9]
+    assert res.pagination_info.pagination_info.total_rows == 10
+
+    res = connector.get_slice(ds, offset=8)
+    assert res.df["A"].tolist() == [8, 9]
+    assert res.pagination_info.pagination_info.total_rows == 10
+
+    res = connector.get_slice(ds, offset=20, limit=5)
+    assert res.df.empty and res.df.columns.tolist() == ["A"]
+    assert res.pagination_info.pagination_info.is_last_page
+
+    # Permissions are applied before slicing
+    res = connector.get_slice(ds, permissions={"column": "A", "operator": "gt", "value": 4}, offset=1, limit=2)
+    assert res.df["A"].tolist() == [6, 7]
+
+
+def test_get_arrow():
+    class DataConnector(ToucanConnector, data_source_model=DataSource):
+        type: str = "MyDB"
+
+        def _retrieve_data(self, datasource):
+            return pd.DataFrame({0: [1, 2, 3]})
+
+    connector = DataConnector(name="my_name")
+    ds = connector.data_source_model(domain="yo", name="my_name", query="")
+    assert not connector._has_native_arrow_support()
+    assert connector.get_arrow(ds).equals(pa.table({"0": [1, 2, 3]}))
+    assert connector.get_arrow(ds, permissions={"column": "0", "operator": "ne", "value": 2}).equals(
+        pa.table({"0": [1, 3]})
+    )
+
+
+def test_get_arrow_native():
+    class ArrowDataConnector(ToucanConnector, data_source_model=DataSource):
+        type: str = "MyDB"
+
+        def _retrieve_data(self, datasource):
+            return self._retrieve_arrow(datasource).to_pandas()
+
+        def _retrieve_arrow(self, datasource):
+            return pa.table({"A": [1, 2, 3, 4, 5]})
+
+    connector = ArrowDataConnector(name="my_name")
+    ds = connector.data_source_model(domain="yo", name="my_name", query="")
+    assert connector._has_native_arrow_support()
+    assert connector.get_arrow(ds).equals(pa.table({"A": [1, 2, 3, 4, 5]}))
+
+    res = connector.get_slice(ds, offset=1, limit=2)
+    assert res.table.equals(pa.table({"A": [2, 3]}))
+    assert res.df.equals(pd.DataFrame({"A": [2, 3]}))
+    assert res.pagination_info.parameters == OffsetLimitInfo(offset=1, limit=2)
+    assert res.pagination_info.pagination_info.total_rows == 5
+
+    # permissions are applied with pandas
+    res = connector.get_slice(ds, permissions={"column": "A", "operator": "gt", "value": 3})
+    assert res.table is None
+    assert res.df["A"].tolist() == [4, 5]
+
+
+def test_get_slice_arrow_native_retries():
+    class UnreliableArrowDataConnector(ToucanConnector, data_source_model=DataSource):
+        type: str = "MyDB"
+        attempts: int = 0
+
+        def _retrieve_data(self, datasource):
+            return self._retrieve_arrow(datasource).to_pandas()
+
+        def _retrieve_arrow(self, datasource):
+            self.attempts += 1
+            if self.attempts < 3:
+                raise RuntimeError("try again!")
+            return pa.table({"A": [1, 2, 3]})
+
+        @property
+        def retry_decorator(self):
+            return tny.retry(stop=tny.stop_after_attempt(3))
+
+    connector = UnreliableArrowDataConnector(name="my_name")
+    ds = connector.data_source_model(domain="yo", name="my_name", query="")
+    assert connector.get_slice(ds, limit=2).table.equals(pa.table({"A": [1, 2]}))
+    assert connector.attempts == 3
+
+
+@pytest.mark.asyncio
+async def test_aget_df_in_executor():
+    class DataConnector(ToucanConnector, data_source_model=DataSource):
+        def _retrieve_data(self, datasource):
+            return pd.DataFrame({"A": [1, 2, 3], "thread": threading.current_thread().name})
+
+    connector = DataConnector(name="my_name")
+    ds = connector.data_source_model(domain="yo", name="my_name", query="")
+    df = await connector.aget_df(ds, permissions={"column": "A", "operator": "ge", "value": 2})
+    assert df["A"].tolist() == [2, 3]
+    # Connectors without native async support are run in a thread
+    assert df["thread"][1].startswith("toucan-connectors")
+
+    res = await connector.aget_slice(ds, offset=1, limit=1)
+    assert res.df["A"].tolist() == [2]
+    assert res.pagination_info.pagination_info.total_rows == 3
+
+    assert await connector.aget_status() == ConnectorStatus()
+
+
+@pytest.mark.asyncio
+async def test_aget_df_native():
+    class AsyncDataConnector(ToucanConnector, data_source_model=DataSource):
+        def _retrieve_data(self, datasource):
+            raise NotImplementedError
+
+        async def _aretrieve_data(self, datasource):
+            return pd.DataFrame({"A": [1, 2, 3]})
+
+    connector = AsyncDataConnector(name="my_name")
+    ds = connector.data_source_model(domain="yo", name="my_name", query="")
+    df = await connector.aget_df(ds, permissions={"column": "A", "operator": "ne", "value": 2})
+    assert df["A"].tolist() == [1, 3]
+
+    res = await connector.aget_slice(ds, offset=1)
+    assert res.df["A"].tolist() == [2, 3]
+    assert res.pagination_info.pagination_info.total_rows == 3
+
+
+@pytest.mark.asyncio
+async def test_aget_df_native_retry():
+    class FlakyConnector(ToucanConnector, data_source_model=DataSource):
+        _retry_on = (ValueError,)
+        attempts: int = 0
+
+        def _retrieve_data(self, datasource):
+            raise NotImplementedError
+
+        async def _aretrieve_data(self, datasource):
+            self.attempts += 1
+            if self.attempts < 2:
+                raise ValueError("flaky")
+            return pd.DataFrame({"A": [1]})
+
+    connector = FlakyConnector(name="my_name", retry_policy={"max_attempts": 2})
+    ds = connector.data_source_model(domain="yo", name="my_name", query="")
+    assert (await connector.aget_df(ds))["A"].tolist() == [1]
+    assert connector.attempts == 2
+
+
+@pytest.mark.asyncio
+async def test_aget_df_in_executor_retry():
+    """The retry policy is applied once, by `get_df`"""
+
+    class FlakyConnector(ToucanConnector, data_source_model=DataSource):
+        _retry_on = (ValueError,)
+        attempts: int = 0
+
+        def _retrieve_data(self, datasource):
+            self.attempts += 1
+            raise ValueError("flaky")
+
+    connector = FlakyConnector(name="my_name", retry_policy={"max_attempts": 2})
+    ds = connector.data_source_model(domain="yo", name="my_name", query="")
+    with pytest.raises(ValueError):
+        await connector.aget_df(ds)
+    assert connector.attempts == 2
+
+
+def test_get_slices():
+    # All the requests must be running at the same time to cross the barrier
+    barrier = threading.Barrier(3, timeout=5)
+
+    class DataConnector(ToucanConnector, data_source_model=DataSource):
+        def _retrieve_data(self, datasource):
+            barrier.wait()
+            if datasource.query == "fail":
+                raise ValueError("oops")
+            return pd.DataFrame({"A": [1, 2, 3], "query": datasource.query})
+
+    connector = DataConnector(name="my_name")
+    results = connector.get_slices(
+        [
+            SliceRequest(connector.data_source_model(domain="yo", name="my_name", query="q1"), offset=1),
+            SliceRequest(connector.data_source_model(domain="yo", name="my_name", query="fail")),
+            SliceRequest(
+                connector.data_source_model(domain="yo", name="my_name", query="q2"),
+                permissions={"column": "A", "operator": "eq", "value": 3},
+            ),
+        ]
+    )
+    assert [result.ok for result in results] == [True, False, True]
+    assert results[0].result.df["A"].tolist() == [2, 3]
+    assert results[0].result.df["query"].tolist() == ["q1", "q1"]
+    assert isinstance(results[1].error, ValueError)
+    assert results[2].result.df["A"].tolist() == [3]
+
+
+def test_get_dfs_across_connectors():
+    class OtherDataConnector(ToucanConnector, data_source_model=DataSource):
+        def _retrieve_data(self, datasource):
+            return pd.DataFrame({"B": [datasource.query]})
+
+    class DataConnector(ToucanConnector, data_source_model=DataSource):
+        def _retrieve_data(self, datasource):
+            return pd.DataFrame({"A": [datasource.query]})
+
+    ds = DataSource(domain="yo", name="my_name", query="q")
+    results = get_dfs(
+        [(DataConnector(name="a"), DfRequest(ds)), (OtherDataConnector(name="b"), DfRequest(ds))], max_concurrency=1
+    )
+    assert [result.result.columns.tolist() for result in results] == [["A"], ["B"]]
+    assert DataConnector(name="a").get_dfs([]) == []
+
+
+def test_run_batch_max_concurrency():
+    running, max_running = 0, 0
+    lock = threading.Lock()
+
+    def call():
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        sleep(0.01)
+        with lock:
+            running -= 1
+
+    assert len(run_batch([call] * 10, max_concurrency=3)) == 10
+    assert max_running <= 3
+    with pytest.raises(ValueError, match="max_concurrency"):
+        run_batch([call], max_concurrency=0)
+
+
 def test_explain():
     class DataConnector(ToucanConnector, data_source_model=DataSource):
         type: str = "MyDB"
@@ -153,7 +472,7 @@ def test_get_cache_key():
     key = connector.get_cache_key(ds)
     # We should get a deterministic identifier:
     # /!\ the identifier will change if the model of the connector or the datasource changes
-    assert key == "cc66ddcd-e717-381f-838e-f960e6cb410e"
+    assert key == "d2fc3cd2-2f7d-78b1-5e6c-07066c8a2310"
 
     ds.query = "wow"
     key2 = connector.get_cache_key(ds)
@@ -199,6 +518,37 @@ def test_get_cache_key_should_be_different_with_different_permissions():
     assert key_a1 != key_a2
 
 
+def test_get_cache_key_without_permissions():
+    connector = DataConnector(name="a")
+    ds = DataSource(name="ds_1", domain="foo", query="bar")
+    assert connector.get_cache_key(ds, permissions=None) == connector.get_cache_key(ds, permissions={})
+
+
+def test_get_cache_key_connector_changed_in_place():
+    class ListConnector(DataConnector, data_source_model=DataSource):
+        values: list[str] = []
+
+    connector = ListConnector(name="a", values=["x"])
+    key = connector.get_cache_key()
+    connector.values.append("y")
+    assert connector.get_cache_key() != key
+
+
+def test_get_cache_key_memoizes_connector_identifier(mocker: MockerFixture):
+    connector = DataConnector(name="a")
+    get_unique_identifier = mocker.spy(DataConnector, "get_unique_identifier")
+    key = connector.get_cache_key()
+    assert connector.get_cache_key() == key
+    assert connector.get_identifier() == connector.get_identifier()
+    # The connector is serialized once, not on each call
+    assert get_unique_identifier.call_count == 1
+
+    connector.name = "b"
+    assert connector.get_cache_key() != key
+    assert get_unique_identifier.call_count == 2
+    assert connector.model_copy(update={"name": "a"}).get_cache_key() == key
+
+
 class UnreliableDataConnector(ToucanConnector, data_source_model=DataSource):
     type: str = "MyUnreliableDB"
 
@@ -0,0 +1,101 @@
+import sqlalchemy as sa
+
+from toucan_connectors.engine_registry import EngineRegistry, get_engine_registry
+from toucan_connectors.metrics import get_metrics
+from toucan_connectors.postgres.postgresql_connector import PostgresConnector
+
+
+def _url(tmp_path, name: str) -> sa.URL:
+    return sa.URL.create("sqlite", database=str(tmp_path / f"{name}.db"))
+
+
+def test_get_engine(tmp_path):
+    registry = EngineRegistry()
+    engine = registry.get_engine("a", _url(tmp_path, "a"))
+    assert isinstance(engine.pool, sa.QueuePool)
+    assert registry.get_engine("a", _url(tmp_path, "a")) is engine
+    assert registry.get_engine("b", _url(tmp_path, "b")) is not engine
+    assert len(registry) == 2
+
+    # Connections are kept open between queries
+    with engine.connect() as conn:
+        conn.execute(sa.text("SELECT 1"))
+    assert engine.pool.checkedin() == 1
+
+    registry.clear()
+    assert len(registry) == 0
+    assert engine.pool.checkedin() == 0
+
+
+def test_get_engine_config_changed(tmp_path, mocker):
+    registry = EngineRegistry()
+    engine = registry.get_engine("a", _url(tmp_path, "a"))
+    dispose = mocker.spy(engine, "dispose")
+    assert registry.get_engine("a", _url(tmp_path, "a"), connect_args={"timeout": 3}) is not engine
+    dispose.assert_called_once()
+
+
+def test_eviction(tmp_path, mocker):
+    registry = EngineRegistry(max_engines=2, idle_timeout=10)
+    engines = {name: registry.get_engine(name, _url(tmp_path, name)) for name in "abc"}
+    # The least recently used engine is evicted
+    assert registry.get_engine("a", _url(tmp_path, "a")) is not engines["a"]
+    assert len(registry) == 2
+
+    mocker.patch("toucan_connectors.engine_registry.time.monotonic", return_value=1e9)
+    registry.get_engine("d", _url(tmp_path, "d"))
+    # Engines unused for more than `idle_timeout` are evicted
+    assert len(registry) == 1
+    registry.dispose("d")
+    assert len(registry) == 0
+
+
+def test_metrics(tmp_path):
+    registry = EngineRegistry()
+    engine = registry.get_engine("metrics", _url(tmp_path, "metrics"))
+    with engine.connect() as conn:
+        conn.execute(sa.text("SELECT 1"))
+        gauges = get_metrics().snapshot()["gauges"]["engine_registry.connections"]
+        assert {
+            gauge["labels"]["state"]: gauge["value"] for gauge in gauges if gauge["labels"]["key"] == "metrics"
+        } == {
+            "checked_in": 0,
+            "checked_out": 1,
+            "overflow": 0,
+        }
+    counters = get_metrics().snapshot()["counters"]
+    assert {"labels": {"key": "metrics"}, "value": 1} in counters["engine_registry.connections_created"]
+
+    registry.dispose("metrics")
+    counters = get_metrics().snapshot()["counters"]
+    assert {"reason": "explicit"} in [counter["labels"] for counter in counters["engine_registry.engines_disposed"]]
+    # The metrics of disposed engines are removed
+    assert not [
+        counter
+        for counters_by_labels in counters.values()
+        for counter in counters_by_labels
+        if counter["labels"].get("key") == "metrics"
+    ]
+
+
+def test_metrics_of_replaced_engine_kept(tmp_path):
+    registry = EngineRegistry()
+    registry.get_engine("replaced", _url(tmp_path, "a"))
+    registry.get_engine("replaced", _url(tmp_path, "b"))
+    assert {"labels": {"key": "replaced"}, "value": 2} in get_metrics().snapshot()["counters"][
+        "engine_registry.engines_created"
+    ]
+
+
+def test_postgres_engines():
+    config = {"name": "pg", "host": "localhost", "user": "ubuntu", "password": "pass"}
+    connector = PostgresConnector(**config)
+    engine = connector.create_engine(database="db")
+    assert connector.create_engine(database="db") is engine
+    assert connector.create_engine(database="other_db") is not engine
+    # Status checks use a dedicated connection
+    assert isinstance(connector.create_engine(database="db", connect_timeout=1).pool, sa.NullPool)
+
+    # Connectors with another configuration get their own engines
+    assert PostgresConnector(**{**config, "password": "other"}).create_engine(database="db") is not engine
+    get_engine_registry().clear()
@@ -0,0 +1,85 @@
+import gc
+
+from toucan_connectors.metrics import Histogram, Metrics
+
+
+def test_counters_and_histograms():
+    metrics = Metrics(buckets=(0.1, 1))
+    metrics.increment("closed", reason="idle")
+    metrics.increment("closed", 2, reason="idle")
+    metrics.increment("closed", reason="not_alive")
+    metrics.observe("wait", 0.05)
+    metrics.observe("wait", 5)
+
+    snapshot = metrics.snapshot()
+    assert snapshot["counters"]["closed"] == [
+        {"labels": {"reason": "idle"}, "value": 3},
+        {"labels": {"reason": "not_alive"}, "value": 1},
+    ]
+    assert snapshot["histograms"]["wait"] == [
+        {"labels": {}, "count": 2, "sum": 5.05, "buckets": {"0.1": 1, "1": 1, "inf": 2}}
+    ]
+
+    metrics.reset()
+    assert metrics.snapshot() == {"counters": {}, "histograms": {}, "gauges": {}}
+
+
+def test_remove():
+    metrics = Metrics()
+    metrics.increment("closed", identifier="a", reason="idle")
+    metrics.increment("closed", identifier="b", reason="idle")
+    metrics.observe("wait", 1, identifier="a")
+    metrics.increment("created")
+
+    metrics.remove(identifier="a")
+    snapshot = metrics.snapshot()
+    assert snapshot["counters"] == {
+        "closed": [{"labels": {"identifier": "b", "reason": "idle"}, "value": 1}],
+        "created": [{"labels": {}, "value": 1}],
+    }
+    assert snapshot["histograms"] == {}
+
+
+def test_histogram_bounds():
+    histogram = Histogram(buckets=(1, 2))
+    for value in (1, 1.5, 2, 3):
+        histogram.observe(value)
+    assert histogram.snapshot()["buckets"] == {"1": 1, "2": 3, "inf": 4}
+
+
+def test_callbacks():
+    metrics = Metrics()
+    received = []
+
+    def failing_callback(*args):
+        raise ValueError
+
+    metrics.add_callback(failing_callback)
+    metrics.add_callback(lambda *args: received.append(args))
+    metrics.increment("created", identifier="a")
+    metrics.observe("connect_seconds", 0.2, identifier="a")
+    assert received == [
+        ("counter", "created", 1, {"identifier": "a"}),
+        ("histogram", "connect_seconds", 0.2, {"identifier": "a"}),
+    ]
+
+
+class Pool:
+    def gauges(self):
+        yield "connections", 2, {"state": "idle"}
+
+
+def test_gauges():
+    metrics = Metrics()
+    pool = Pool()
+    metrics.register_gauges(pool.gauges)
+    metrics.register_gauges(lambda: [("engines", 1, {})])
+    assert metrics.snapshot()["gauges"] == {
+        "connections": [{"labels": {"state": "idle"}, "value": 2}],
+        "engines": [{"labels": {}, "value": 1}],
+    }
+
+    # Registering a bound method does not keep its object alive
+    del pool
+    gc.collect()
+    assert list(metrics.snapshot()["gauges"]) == ["engines"]
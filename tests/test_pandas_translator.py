@@ -1,6 +1,11 @@
+import pandas as pd
 import pytest
 
-from toucan_connectors.pandas_translator import PandasConditionTranslator
+from toucan_connectors.pandas_translator import (
+    PandasConditionTranslator,
+    PandasMaskTranslator,
+    compile_permissions_mask,
+)
 
 
 def test_translate_condition_unit():
@@ -80,3 +85,62 @@ def test_PandasConditionTranslator_operators_with_numbers():
     assert PandasConditionTranslator.LOWER_THAN_EQUAL("col", 42.12) == "col <= 42.12"
     assert PandasConditionTranslator.IN("col", [-42]) == "col in [-42]"
     assert PandasConditionTranslator.NOT_IN("col", [-42.12]) == "col not in [-42.12]"
+
+
+@pytest.fixture
+def cities() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "city name": ["Paris", "London", "Lyon", None],
+            "country": ["France", "UK", "France", "Spain"],
+            "population": [2_100_000, 8_900_000, 520_000, None],
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "condition,expected_rows",
+    [
+        ({"column": "country", "operator": "eq", "value": "France"}, [0, 2]),
+        ({"column": "country", "operator": "ne", "value": "France"}, [1, 3]),
+        ({"column": "population", "operator": "gt", "value": 600_000}, [0, 1]),
+        ({"column": "population", "operator": "ge", "value": "'520000'"}, [0, 1, 2]),
+        ({"column": "population", "operator": "lt", "value": "2100000"}, [2]),
+        ({"column": "population", "operator": "le", "value": 2_100_000.0}, [0, 2]),
+        ({"column": "city name", "operator": "in", "value": ["Paris", "London"]}, [0, 1]),
+        ({"column": "city name", "operator": "in", "value": "Lyon"}, [2]),
+        ({"column": "city name", "operator": "nin", "value": ["Paris", "London"]}, [2, 3]),
+        ({"column": "city name", "operator": "matches", "value": "^L"}, [1, 2]),
+        ({"column": "city name", "operator": "notmatches", "value": "^L"}, [0, 3]),
+        ({"column": "city name", "operator": "isnull", "value": None}, [3]),
+        ({"column": "population", "operator": "notnull", "value": None}, [0, 1, 2]),
+        (
+            {
+                "and": [
+                    {"column": "country", "operator": "eq", "value": "France"},
+                    {
+                        "or": [
+                            {"column": "city name", "operator": "in", "value": ["London", "Lyon"]},
+                            {"column": "population", "operator": "gt", "value": 1_000_000},
+                        ]
+                    },
+                ]
+            },
+            [0, 2],
+        ),
+        ({"and": []}, [0, 1, 2, 3]),
+        ({"or": []}, []),
+    ],
+)
+def test_PandasMaskTranslator(cities: pd.DataFrame, condition: dict, expected_rows: list[int]):
+    mask = PandasMaskTranslator.translate(condition)
+    assert cities[mask(cities)].index.tolist() == expected_rows
+
+
+def test_compile_permissions_mask(cities: pd.DataFrame):
+    permissions = {"column": "country", "operator": "in", "value": "{{ user.countries }}"}
+    mask = compile_permissions_mask(permissions, {"user": {"countries": ["UK", "Spain"]}})
+    assert cities[mask(cities)].index.tolist() == [1, 3]
+    # compiled masks are cached by rendered permissions
+    assert compile_permissions_mask(permissions, {"user": {"countries": ["UK", "Spain"]}}) is mask
+    assert compile_permissions_mask(permissions, {"user": {"countries": ["UK"]}}) is not mask
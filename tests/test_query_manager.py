@@ -1,49 +1,126 @@
-import pytest
-
-from toucan_connectors.query_manager import QueryManager
-
-
-def fixture_execute_method(execute_method, query: str, query_parameters: dict | None):
-    return True
-
-
-def fixture_describe_method(describe_method, query: str):
-    return True
-
-
-def test_execute_success():
-    result = QueryManager().execute(
-        execute_method=fixture_execute_method,
-        connection={},
-        query="SELECT * FROM my_table",
-        query_parameters={},
-    )
-    assert result is True
-
-
-def test_execute_exception():
-    with pytest.raises(Exception):
-        QueryManager().execute(
-            execute_method="tortank",
-            connection={},
-            query="SELECT * FROM my_table",
-            query_parameters={},
-        )
-
-
-def test_describe_success():
-    result = QueryManager().describe(
-        describe_method=fixture_describe_method,
-        connection={},
-        query="SELECT * FROM my_table",
-    )
-    assert result is True
-
-
-def test_describe_failure():
-    with pytest.raises(Exception):
-        QueryManager().describe(
-            describe_method="fugazzi",
-            connection={},
-            query="SELECT * FROM my_table",
-        )
+import threading
+from unittest.mock import Mock
+
+import pytest
+
+from toucan_connectors.query_manager import QueryCancelledError, QueryManager, QueryTimeoutError, query_context
+from toucan_connectors.toucan_connector import run_batch
+
+
+def fixture_execute_method(execute_method, query: str, query_parameters: dict | None):
+    return True
+
+
+def fixture_describe_method(describe_method, query: str):
+    return True
+
+
+def test_execute_success():
+    result = QueryManager().execute(
+        execute_method=fixture_execute_method,
+        connection={},
+        query="SELECT * FROM my_table",
+        query_parameters={},
+    )
+    assert result is True
+
+
+def test_execute_exception():
+    with pytest.raises(Exception):
+        QueryManager().execute(
+            execute_method="tortank",
+            connection={},
+            query="SELECT * FROM my_table",
+            query_parameters={},
+        )
+
+
+def test_describe_success():
+    result = QueryManager().describe(
+        describe_method=fixture_describe_method,
+        connection={},
+        query="SELECT * FROM my_table",
+    )
+    assert result is True
+
+
+def test_describe_failure():
+    with pytest.raises(Exception):
+        QueryManager().describe(
+            describe_method="fugazzi",
+            connection={},
+            query="SELECT * FROM my_table",
+        )
+
+
+def test_track_and_cancel():
+    query_manager = QueryManager()
+    cancelled = threading.Event()
+
+    with query_context(query_id="dashboard") as query_id:
+        with pytest.raises(QueryCancelledError), query_manager.track("my_connector", "SELECT 1") as running_query:
+            assert query_id == "dashboard"
+            assert query_manager.running() == [running_query]
+            running_query.set_backend_query("backend-id", cancelled.set)
+            assert query_manager.cancel("dashboard")
+            assert cancelled.is_set()
+            raise RuntimeError("query cancelled by the backend")
+
+    assert query_manager.running() == []
+    assert not query_manager.cancel("dashboard")
+
+
+def test_cancel_before_backend_query_is_registered():
+    """The query is not executed once its backend query is registered"""
+    query_manager = QueryManager()
+    executed = Mock()
+    with pytest.raises(QueryCancelledError), query_manager.track("my_connector", "SELECT 1") as running_query:
+        query_manager.cancel(running_query.query_id)
+        cancel = Mock()
+        try:
+            running_query.set_backend_query("backend-id", cancel)
+        finally:
+            cancel.assert_called_once()
+        executed()
+    executed.assert_not_called()
+
+
+def test_cancel_context():
+    """The queries of a cancelled context are not executed anymore"""
+    query_manager = QueryManager()
+    with query_context(query_id="dashboard"):
+        assert query_manager.cancel("dashboard")
+        with pytest.raises(QueryCancelledError), query_manager.track("my_connector", "SELECT COUNT(*)"):
+            pass
+        assert query_manager.running() == []
+
+    # Contexts with the same query id entered afterwards are not cancelled
+    with query_context(query_id="dashboard"), query_manager.track("my_connector", "SELECT 1"):
+        pass
+
+
+def test_timeout():
+    query_manager = QueryManager()
+    cancelled = threading.Event()
+
+    with query_context(timeout=0.05):
+        with pytest.raises(QueryTimeoutError), query_manager.track("my_connector", "SELECT 1") as running_query:
+            running_query.set_backend_query("backend-id", cancelled.set)
+            assert cancelled.wait(timeout=2)
+            raise RuntimeError("query cancelled by the backend")
+
+        # The timeout applies to all the queries of the context
+        with pytest.raises(QueryTimeoutError), query_manager.track("my_connector", "SELECT 2"):
+            pass
+
+
+def test_query_context_in_batches():
+    query_manager = QueryManager()
+
+    def track():
+        with query_manager.track("my_connector", "SELECT 1") as running_query:
+            return running_query.query_id
+
+    with query_context(query_id="batch"):
+        results = run_batch([track, track], max_concurrency=2)
+    assert [result.result for result in results] == ["batch", "batch"]
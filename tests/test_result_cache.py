@@ -0,0 +1,167 @@
+import time
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from pytest_mock import MockerFixture
+
+from toucan_connectors.pagination import build_pagination_info
+from toucan_connectors.result_cache import CachedResult, DiskCache, MemoryCache, ResultCache, TieredCache
+from toucan_connectors.toucan_connector import DataStats, ToucanConnector, ToucanDataSource
+
+
+class DataSource(ToucanDataSource):
+    query: str
+
+
+class DataConnector(ToucanConnector, data_source_model=DataSource):
+    def _retrieve_data(self, data_source: DataSource) -> pd.DataFrame:
+        return pd.DataFrame({"A": [1, 2, 3, 4], "B": ["a", "b", "c", "d"]})
+
+
+@pytest.fixture
+def connector() -> DataConnector:
+    return DataConnector(name="my_connector")
+
+
+@pytest.fixture
+def data_source() -> DataSource:
+    return DataSource(domain="my_domain", name="my_connector", query="SELECT * FROM t")
+
+
+def _result(df: pd.DataFrame, ttl: float = 60, **kwargs) -> CachedResult:
+    return CachedResult(df=df, expires_at=time.time() + ttl, **kwargs)
+
+
+def test_memory_cache_lru():
+    df = pd.DataFrame({"A": range(10)})
+    cache = MemoryCache(max_bytes=int(df.memory_usage().sum()) * 2)
+    cache.set("a", _result(df))
+    cache.set("b", _result(df))
+    assert cache.get("a") is not None
+    # "b" is the least recently used result
+    cache.set("c", _result(df))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.current_bytes == cache.max_bytes
+
+    # Results larger than the cache are not stored
+    cache.set("d", _result(pd.DataFrame({"A": range(100)})))
+    assert cache.get("d") is None
+    assert len(cache) == 2
+
+    cache.delete("a")
+    assert cache.get("a") is None
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.current_bytes == 0
+
+
+def test_memory_cache_ttl():
+    cache = MemoryCache()
+    cache.set("a", _result(pd.DataFrame({"A": [1]}), ttl=-1))
+    assert cache.get("a") is None
+    assert cache.current_bytes == 0
+
+
+def test_disk_cache(tmp_path: Path):
+    cache = DiskCache(tmp_path / "cache")
+    df = pd.DataFrame({"A": [1, 2], "B": ["x", None]}, index=[3, 4])
+    pagination_info = build_pagination_info(offset=3, limit=2, retrieved_rows=2, total_rows=5)
+    cache.set("a", _result(df, pagination_info=pagination_info, stats=DataStats(df_memory_size=12)))
+
+    cached = cache.get("a")
+    assert cached is not None
+    pd.testing.assert_frame_equal(cached.df, df)
+    assert cached.pagination_info == pagination_info
+    assert cached.stats == DataStats(df_memory_size=12)
+
+    assert cache.get("b") is None
+    cache.delete("a")
+    assert cache.get("a") is None
+
+
+def test_disk_cache_eviction(tmp_path: Path):
+    cache = DiskCache(tmp_path)
+    cache.set("expired", _result(pd.DataFrame({"A": [1]}), ttl=-1))
+    cache.set("valid", _result(pd.DataFrame({"A": [1]})))
+    (tmp_path / "invalid.arrow").write_bytes(b"not arrow")
+    assert cache.evict_expired() == 2
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["valid.arrow"]
+
+    cache.set("expired", _result(pd.DataFrame({"A": [1]}), ttl=-1))
+    assert cache.get("expired") is None
+    assert not (tmp_path / "expired.arrow").exists()
+
+    cache.clear()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_disk_cache_unsupported_df(tmp_path: Path):
+    cache = DiskCache(tmp_path)
+    cache.set("a", _result(pd.DataFrame({"A": [1, "a"]})))
+    assert cache.get("a") is None
+
+
+def test_tiered_cache(tmp_path: Path):
+    memory, disk = MemoryCache(), DiskCache(tmp_path)
+    cache = TieredCache([memory, disk])
+    cache.set("a", _result(pd.DataFrame({"A": [1]})))
+    assert memory.get("a") is not None
+    assert disk.get("a") is not None
+
+    # Results of slower tiers are copied to the faster ones
+    memory.clear()
+    assert cache.get("a") is not None
+    assert memory.get("a") is not None
+
+    cache.delete("a")
+    assert cache.get("a") is None
+
+
+def test_result_cache_get_df(mocker: MockerFixture, connector: DataConnector, data_source: DataSource):
+    retrieve_data = mocker.spy(connector, "_retrieve_data")
+    cache = ResultCache(MemoryCache())
+    permissions = {"column": "A", "operator": "gt", "value": 2}
+
+    df = cache.get_df(connector, data_source, permissions)
+    assert df["A"].tolist() == [3, 4]
+    assert cache.get_df(connector, data_source, permissions) is df
+    assert retrieve_data.call_count == 1
+
+    # Different permissions give different results
+    assert cache.get_df(connector, data_source)["A"].tolist() == [1, 2, 3, 4]
+    assert retrieve_data.call_count == 2
+
+
+def test_result_cache_get_slice(mocker: MockerFixture, connector: DataConnector, data_source: DataSource):
+    retrieve_data = mocker.spy(connector, "_retrieve_data")
+    cache = ResultCache(MemoryCache())
+
+    data_slice = cache.get_slice(connector, data_source, offset=1, limit=2)
+    cached_slice = cache.get_slice(connector, data_source, offset=1, limit=2)
+    assert retrieve_data.call_count == 1
+    assert cached_slice.df is data_slice.df
+    assert cached_slice.pagination_info == data_slice.pagination_info
+    assert cached_slice.stats == data_slice.stats
+
+    cache.get_slice(connector, data_source, offset=2, limit=2)
+    assert retrieve_data.call_count == 2
+
+
+def test_result_cache_ttl(mocker: MockerFixture, connector: DataConnector, data_source: DataSource):
+    cache = ResultCache(MemoryCache(), default_ttl=60)
+    assert cache.get_ttl(connector, data_source) == 60
+    connector.cache_ttl = 30
+    assert cache.get_ttl(connector, data_source) == 30
+    data_source.cache_ttl = 10
+    assert cache.get_ttl(connector, data_source) == 10
+
+    # A ttl of 0 disables the cache
+    data_source.cache_ttl = 0
+    retrieve_data = mocker.spy(connector, "_retrieve_data")
+    cache.get_df(connector, data_source)
+    cache.get_df(connector, data_source)
+    assert retrieve_data.call_count == 2
+    assert len(cache.backend) == 0
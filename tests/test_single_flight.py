@@ -0,0 +1,136 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from toucan_connectors.result_cache import MemoryCache, ResultCache
+from toucan_connectors.single_flight import SingleFlight
+from toucan_connectors.toucan_connector import ToucanConnector, ToucanDataSource
+
+
+class DataSource(ToucanDataSource):
+    query: str
+
+
+class SlowConnector(ToucanConnector, data_source_model=DataSource):
+    def _retrieve_data(self, data_source: DataSource) -> pd.DataFrame:
+        RETRIEVALS.append(data_source.query)
+        RELEASE.wait(timeout=5)
+        return pd.DataFrame({"A": [1, 2, 3]})
+
+
+RETRIEVALS: list[str] = []
+RELEASE = threading.Event()
+
+
+@pytest.fixture(autouse=True)
+def reset():
+    RETRIEVALS.clear()
+    RELEASE.clear()
+
+
+def _run_concurrently(fn, count: int = 5) -> list:
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        futures = [executor.submit(fn) for _ in range(count)]
+        # Lets all the threads wait for the first call before it returns
+        while not RETRIEVALS:
+            time.sleep(0.001)
+        time.sleep(0.1)
+        RELEASE.set()
+        return [future.result() for future in futures]
+
+
+def test_do():
+    single_flight = SingleFlight()
+    calls = []
+
+    def fn(value):
+        calls.append(value)
+        RETRIEVALS.append(value)
+        RELEASE.wait(timeout=5)
+        return [value]
+
+    results = _run_concurrently(lambda: single_flight.do("key", fn, 1))
+    assert calls == [1]
+    assert all(result is results[0] for result in results)
+
+    # Once done, the function is called again
+    RELEASE.set()
+    assert single_flight.do("key", fn, 2) == [2]
+    assert calls == [1, 2]
+
+
+def test_do_exception():
+    single_flight = SingleFlight()
+
+    def fn():
+        RETRIEVALS.append("call")
+        RELEASE.wait(timeout=5)
+        raise ValueError("oops")
+
+    def call():
+        with pytest.raises(ValueError, match="oops"):
+            single_flight.do("key", fn)
+
+    _run_concurrently(call)
+    assert RETRIEVALS == ["call"]
+
+
+@pytest.mark.asyncio
+async def test_do_async():
+    single_flight = SingleFlight()
+    calls = []
+
+    async def fn(value):
+        calls.append(value)
+        await asyncio.sleep(0.05)
+        return [value]
+
+    results = await asyncio.gather(*(single_flight.do_async("key", fn, 1) for _ in range(5)))
+    assert calls == [1]
+    assert all(result is results[0] for result in results)
+    assert await single_flight.do_async("other", fn, 2) == [2]
+    assert calls == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_do_async_cancelled_caller():
+    single_flight = SingleFlight()
+
+    async def fn():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    first = asyncio.ensure_future(single_flight.do_async("key", fn))
+    second = asyncio.ensure_future(single_flight.do_async("key", fn))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second == "done"
+
+
+def test_get_slice():
+    single_flight = SingleFlight()
+    connector = SlowConnector(name="slow")
+    data_source = DataSource(domain="d", name="slow", query="q")
+
+    slices = _run_concurrently(lambda: single_flight.get_slice(connector, data_source, offset=1, limit=1))
+    assert RETRIEVALS == ["q"]
+    assert all(data_slice.df["A"].tolist() == [2] for data_slice in slices)
+
+    # Requests with other parameters are not coalesced
+    single_flight.get_df(connector, data_source)
+    assert RETRIEVALS == ["q", "q"]
+
+
+def test_result_cache_with_single_flight():
+    cache = ResultCache(MemoryCache(), single_flight=SingleFlight())
+    connector = SlowConnector(name="slow")
+    data_source = DataSource(domain="d", name="slow", query="q")
+
+    _run_concurrently(lambda: cache.get_df(connector, data_source))
+    assert RETRIEVALS == ["q"]
+    assert cache.get_df(connector, data_source)["A"].tolist() == [1, 2, 3]
+    assert RETRIEVALS == ["q"]
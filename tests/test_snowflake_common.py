@@ -1,15 +1,36 @@
 from sqlite3 import ProgrammingError
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 import pandas as pd
+import pyarrow as pa
 import pytest
 import snowflake.connector
+from snowflake.connector.cursor import ResultMetadata
+from snowflake.connector.errors import NotSupportedError
 
 from toucan_connectors import DataSlice
 from toucan_connectors.json_wrapper import JsonWrapper
 from toucan_connectors.pagination import OffsetLimitInfo
+from toucan_connectors.query_manager import QueryCancelledError, get_query_manager
 from toucan_connectors.snowflake import SnowflakeDataSource
-from toucan_connectors.snowflake_common import SnowflakeCommon
+from toucan_connectors.snowflake_common import (
+    SnowflakeCommon,
+    build_database_model_extraction_query,
+    execute_async_tracked,
+    execute_tracked,
+    extract_databases_model,
+    fetch_arrow_table,
+    get_column_types,
+    iter_arrow_batches,
+    may_change_session,
+    slice_result_batches,
+)
+
+
+@pytest.fixture(autouse=True)
+def fetch_arrow_table_mock(mocker):
+    # Results are not in the Arrow format unless specified
+    return mocker.patch("toucan_connectors.snowflake_common.fetch_arrow_table", return_value=None)
 
 
 @pytest.fixture
@@ -462,3 +483,162 @@ def test_get_db_content(connect, mocker):
         "NAME": "REGION",
         "COLUMNS": '[\n  {\n    "name": "R_COMMENT",\n    "type": "TEXT"\n  },\n  {\n    "name": "R_COMMENT",\n    "type": "TEXT"\n  },\n  {\n    "name": "R_NAME",\n    "type": "TEXT"\n  },\n  {\n    "name": "R_REGIONKEY",\n    "type": "NUMBER"\n  },\n  {\n    "name": "R_REGIONKEY",\n    "type": "NUMBER"\n  },\n  {\n    "name": "R_NAME",\n    "type": "TEXT"\n  },\n  {\n    "name": "R_COMMENT",\n    "type": "TEXT"\n  },\n  {\n    "name": "R_NAME",\n    "type": "TEXT"\n  },\n  {\n    "name": "R_NAME",\n    "type": "TEXT"\n  },\n  {\n    "name": "R_REGIONKEY",\n    "type": "NUMBER"\n  },\n  {\n    "name": "R_COMMENT",\n    "type": "TEXT"\n  },\n  {\n    "name": "R_REGIONKEY",\n    "type": "NUMBER"\n  }\n]',  # noqa: E501
     }
+
+
+def test_execute_query_internal_arrow(fetch_arrow_table_mock, mocker):
+    fetch_arrow_table_mock.return_value = pa.table({"name": ["database_1", "database_2"]})
+    from_dict = mocker.patch("pandas.DataFrame.from_dict")
+    connect = mocker.MagicMock()
+
+    df = SnowflakeCommon()._execute_query_internal(connect, "SELECT name FROM databases")
+
+    assert df["name"].tolist() == ["database_1", "database_2"]
+    from_dict.assert_not_called()
+    connect.cursor().execute().fetchall.assert_not_called()
+
+
+def test_fetch_arrow_table(mocker):
+    cursor = mocker.MagicMock()
+    table = pa.table({"a": [1]})
+    cursor.fetch_arrow_all.return_value = table
+    assert fetch_arrow_table(cursor) is table
+    cursor.fetch_arrow_all.assert_called_once_with(force_return_table=True)
+
+    cursor.fetch_arrow_all.side_effect = NotSupportedError
+    assert fetch_arrow_table(cursor) is None
+
+
+def test_execute_tracked():
+    cursor = MagicMock()
+    cursor.connection.session_id = 1234
+
+    def execute(query, parameters):
+        [running_query] = get_query_manager().running()
+        assert running_query.backend_query_id == "1234"
+        running_query.cancel()
+        cursor.connection.cursor.return_value.execute.assert_called_once_with("SELECT SYSTEM$CANCEL_ALL_QUERIES(1234)")
+        return cursor
+
+    cursor.execute.side_effect = execute
+    assert execute_tracked("snowflake", cursor, "SELECT 1", None) is cursor
+    assert get_query_manager().running() == []
+
+
+def test_iter_arrow_batches(mocker):
+    cursor = mocker.MagicMock()
+    cursor.fetch_arrow_batches.return_value = iter([pa.table({"a": [1, 2, 3]})])
+    assert [table["a"].to_pylist() for table in iter_arrow_batches(cursor, 2)] == [[1, 2], [3]]
+
+    # Empty results keep their columns
+    cursor.fetch_arrow_batches.return_value = iter([])
+    cursor.description = [ResultMetadata("a", 0, None, None, None, None, True)]
+    [table] = iter_arrow_batches(cursor, 2)
+    assert table.column_names == ["a"] and table.num_rows == 0
+
+    cursor.fetch_arrow_batches.side_effect = NotSupportedError
+    cursor.fetchmany.side_effect = [[{"name": "db_1"}, {"name": "db_2"}], [{"name": "db_3"}], []]
+    assert [table["name"].to_pylist() for table in iter_arrow_batches(cursor, 2)] == [["db_1", "db_2"], ["db_3"]]
+
+
+def test_column_types(mocker):
+    cursor = mocker.MagicMock()
+    cursor.description = [
+        ResultMetadata("name", 2, None, None, None, None, True),
+        ResultMetadata("value", 0, None, None, None, None, True),
+    ]
+    assert get_column_types(cursor) == {"name": "text", "value": "float"}
+
+
+def test_execute_async_tracked(mocker):
+    sleep = mocker.patch("toucan_connectors.snowflake_common.time.sleep")
+    cursor = MagicMock()
+    cursor.sfqid = "01b2-query"
+    connection = cursor.connection
+
+    def is_still_running(status):
+        [running_query] = get_query_manager().running()
+        assert running_query.backend_query_id == "01b2-query"
+        return connection.is_still_running.call_count < 3
+
+    connection.is_still_running.side_effect = is_still_running
+    assert execute_async_tracked("snowflake", cursor, "SELECT ?", [1]) == "01b2-query"
+    cursor.execute_async.assert_called_once_with("SELECT ?", [1])
+    connection.get_query_status_throw_if_error.assert_called_with("01b2-query")
+    assert [call.args for call in sleep.call_args_list] == [(0.5,), (0.5,)]
+    cursor.query_result.assert_called_once_with("01b2-query")
+    assert get_query_manager().running() == []
+
+
+def test_execute_async_tracked_cancelled():
+    cursor = MagicMock()
+    cursor.sfqid = "01b2-query"
+
+    def get_query_status(query_id):
+        [running_query] = get_query_manager().running()
+        running_query.cancel()
+        cursor.connection.cursor.return_value.execute.assert_called_once_with(
+            "SELECT SYSTEM$CANCEL_QUERY('01b2-query')"
+        )
+        raise snowflake.connector.errors.ProgrammingError("Query cancelled")
+
+    cursor.connection.get_query_status_throw_if_error.side_effect = get_query_status
+    with pytest.raises(QueryCancelledError):
+        execute_async_tracked("snowflake", cursor, "SELECT 1")
+    cursor.query_result.assert_not_called()
+
+
+def test_slice_result_batches():
+    batches = [MagicMock(rowcount=2), MagicMock(rowcount=0), MagicMock(rowcount=3), MagicMock(rowcount=2)]
+    batches[0].to_arrow.return_value = pa.table({"a": [0, 1]})
+    batches[1].to_arrow.return_value = pa.table({"a": pa.array([], pa.int64())})
+    batches[2].to_arrow.return_value = pa.table({"a": [2, 3, 4]})
+    batches[3].to_arrow.return_value = pa.table({"a": [5, 6]})
+
+    assert slice_result_batches(batches, 1, 3, ["a"])["a"].to_pylist() == [1, 2, 3]
+    batches[3].to_arrow.assert_not_called()
+    assert slice_result_batches(batches, 3, None, ["a"])["a"].to_pylist() == [3, 4, 5, 6]
+    batches[0].to_arrow.reset_mock()
+    assert slice_result_batches(batches, 5, 10, ["a"])["a"].to_pylist() == [5, 6]
+    batches[0].to_arrow.assert_not_called()
+
+    empty = slice_result_batches(batches, 10, 5, ["a"])
+    assert empty.num_rows == 0 and empty.column_names == ["a"]
+
+
+def test_build_database_model_extraction_query():
+    assert "FROM\n        information_schema.tables t" in build_database_model_extraction_query()
+    query = build_database_model_extraction_query('my "db"')
+    assert 'FROM\n        "my ""db""".information_schema.tables t' in query
+    assert 'INNER JOIN "my ""db""".information_schema.columns c' in query
+
+
+def test_extract_databases_model():
+    def extract(database: str) -> list[str]:
+        if database.startswith("broken"):
+            raise ProgrammingError(f"{database} is unreachable")
+        return [f"{database}.table_1", f"{database}.table_2"]
+
+    assert extract_databases_model(["db_1", "broken_1", "db_2"], extract, max_concurrency=2) == (
+        ["db_1.table_1", "db_1.table_2", "db_2.table_1", "db_2.table_2"],
+        ["broken_1"],
+    )
+    assert extract_databases_model([], extract) == ([], [])
+    with pytest.raises(ProgrammingError, match="broken_1 is unreachable"):
+        extract_databases_model(["broken_1", "broken_2"], extract)
+
+
+@pytest.mark.parametrize(
+    "query,expected",
+    [
+        ("SELECT * FROM users", False),
+        ("WITH t AS (SELECT 1) SELECT * FROM t", False),
+        ("SELECT 'use' AS \"set\" -- alter session", False),
+        ("use warehouse wh", True),
+        ("  ALTER SESSION SET TIMEZONE = 'UTC'", True),
+        ("SET x = 1", True),
+        ("SELECT 1; UNSET x", True),
+        ("CALL my_procedure()", True),
+    ],
+)
+def test_may_change_session(query: str, expected: bool):
+    assert may_change_session(query) is expected
@@ -0,0 +1,288 @@
+import datetime
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from toucan_connectors.common import pandas_read_sql
+from toucan_connectors.pagination import OffsetLimitInfo
+from toucan_connectors.query_manager import _query_context, query_context
+from toucan_connectors.sql_push_down import SqlPushDownMixin, split_partition_range
+from toucan_connectors.toucan_connector import ToucanConnector, ToucanDataSource
+
+
+class SqliteDataSource(ToucanDataSource):
+    query: str
+
+
+class SqliteConnector(SqlPushDownMixin, ToucanConnector, data_source_model=SqliteDataSource):
+    path: str
+    executed_queries: list[str] = []
+
+    def _retrieve_data(self, data_source: SqliteDataSource) -> pd.DataFrame:
+        self.executed_queries.append(data_source.query)
+        with sqlite3.connect(self.path) as connection:
+            return pandas_read_sql(
+                data_source.query, con=connection, params=data_source.parameters or {}, convert_to_qmark=True
+            )
+
+
+@pytest.fixture
+def connector(tmp_path) -> SqliteConnector:
+    path = str(tmp_path / "db.sqlite")
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE beers (name TEXT, price REAL)")
+        connection.executemany("INSERT INTO beers VALUES (?, ?)", [(f"beer_{i}", i) for i in range(10)])
+    return SqliteConnector(name="sqlite", path=path)
+
+
+@pytest.fixture
+def data_source() -> SqliteDataSource:
+    return SqliteDataSource(
+        name="beers",
+        domain="beers",
+        query="SELECT * FROM beers WHERE price >= {{ min_price }} ORDER BY price;",
+        parameters={"min_price": 2},
+    )
+
+
+def test_get_slice(connector: SqliteConnector, data_source: SqliteDataSource):
+    res = connector.get_slice(data_source, offset=2, limit=3)
+
+    assert connector.executed_queries == [
+        "SELECT * FROM beers WHERE price >= {{ min_price }} ORDER BY price LIMIT 3 OFFSET 2"
+    ]
+    assert res.df["name"].tolist() == ["beer_4", "beer_5", "beer_6"]
+    assert res.pagination_info.parameters == OffsetLimitInfo(offset=2, limit=3)
+    assert res.pagination_info.pagination_info.type == "unknown_size"
+    assert res.pagination_info.next_page == OffsetLimitInfo(offset=5, limit=3)
+
+
+def test_get_slice_last_page(connector: SqliteConnector, data_source: SqliteDataSource):
+    res = connector.get_slice(data_source, offset=6, limit=3)
+    assert res.df["name"].tolist() == ["beer_8", "beer_9"]
+    assert res.pagination_info.pagination_info.total_rows == 8
+    assert res.pagination_info.next_page is None
+
+
+def test_get_slice_with_row_count(connector: SqliteConnector, data_source: SqliteDataSource):
+    res = connector.get_slice(data_source, limit=3, get_row_count=True)
+
+    assert sorted(connector.executed_queries) == [
+        "SELECT * FROM beers WHERE price >= {{ min_price }} ORDER BY price LIMIT 3",
+        "SELECT COUNT(*) AS total_rows FROM (SELECT * FROM beers WHERE price >= {{ min_price }}) AS _toucan_count",
+    ]
+    assert res.df["name"].tolist() == ["beer_2", "beer_3", "beer_4"]
+    assert res.pagination_info.pagination_info.total_rows == 8
+
+
+def test_get_slice_with_row_count_in_query_context(connector: SqliteConnector, data_source: SqliteDataSource, mocker):
+    """The data and count queries run in the query context of the caller"""
+    retrieve_data = connector._retrieve_data
+    contexts = []
+
+    def _retrieve_data(data_source):
+        contexts.append(_query_context.get())
+        return retrieve_data(data_source)
+
+    mocker.patch.object(SqliteConnector, "_retrieve_data", side_effect=_retrieve_data)
+    with query_context(query_id="slice"):
+        connector.get_slice(data_source, limit=3, get_row_count=True)
+    assert [context.query_id for context in contexts] == ["slice", "slice"]
+
+
+def test_get_slice_without_limit(connector: SqliteConnector, data_source: SqliteDataSource):
+    """Without a limit, the whole result is retrieved and sliced with pandas"""
+    res = connector.get_slice(data_source, offset=7)
+    assert connector.executed_queries == [data_source.query]
+    assert res.df["name"].tolist() == ["beer_9"]
+
+
+def test_get_slice_unordered(connector: SqliteConnector):
+    data_source = SqliteDataSource(name="beers", domain="beers", query="SELECT name FROM beers WHERE name != ';';")
+    res = connector.get_slice(data_source, offset=8, limit=3)
+    assert connector.executed_queries == [
+        "SELECT * FROM (SELECT name FROM beers WHERE name != ';') AS _toucan_slice LIMIT 3 OFFSET 8"
+    ]
+    assert res.df["name"].tolist() == ["beer_8", "beer_9"]
+
+
+def test_get_slice_not_a_select(connector: SqliteConnector):
+    data_source = SqliteDataSource(name="tables", domain="tables", query="PRAGMA table_info(beers)")
+    res = connector.get_slice(data_source, limit=1)
+    assert connector.executed_queries == [data_source.query]
+    assert res.df["name"].tolist() == ["name"]
+
+
+PERMISSIONS = {
+    "or": [
+        {"column": "name", "operator": "in", "value": ["beer_1", "beer_3", "beer_5"]},
+        {"column": "price", "operator": "ge", "value": "{{ max_price }}"},
+    ]
+}
+
+
+@pytest.fixture
+def permissions_data_source(data_source: SqliteDataSource) -> SqliteDataSource:
+    return data_source.model_copy(
+        update={
+            "query": "SELECT * FROM beers WHERE price >= {{ min_price }}",
+            "parameters": {"min_price": 2, "max_price": 8},
+        }
+    )
+
+
+def test_get_df_with_permissions(connector: SqliteConnector, permissions_data_source: SqliteDataSource):
+    df = connector.get_df(permissions_data_source, permissions=PERMISSIONS)
+
+    assert connector.executed_queries == [
+        "SELECT * FROM (SELECT * FROM beers WHERE price >= {{ min_price }}) AS _toucan_filtered "
+        'WHERE ("name" IN ({{ __permission_0__ }}, {{ __permission_1__ }}, {{ __permission_2__ }}) '
+        'OR "price" >= {{ __permission_3__ }})'
+    ]
+    assert df["name"].tolist() == ["beer_3", "beer_5", "beer_8", "beer_9"]
+
+
+def test_get_df_with_permissions_ordered_query(connector: SqliteConnector, permissions_data_source: SqliteDataSource):
+    """Permissions of ordered queries are applied with pandas, as the order would be lost in a subquery"""
+    data_source = permissions_data_source.model_copy(
+        update={"query": "SELECT * FROM beers WHERE price >= {{ min_price }} ORDER BY price DESC"}
+    )
+    df = connector.get_df(data_source, permissions=PERMISSIONS)
+
+    assert connector.executed_queries == [data_source.query]
+    assert df["name"].tolist() == ["beer_9", "beer_8", "beer_5", "beer_3"]
+
+
+def test_get_slice_with_permissions(connector: SqliteConnector, permissions_data_source: SqliteDataSource):
+    res = connector.get_slice(permissions_data_source, permissions=PERMISSIONS, offset=1, limit=2, get_row_count=True)
+
+    assert len(connector.executed_queries) == 2
+    assert all("AS _toucan_filtered WHERE" in query for query in connector.executed_queries)
+    assert res.df["name"].tolist() == ["beer_5", "beer_8"]
+    assert res.pagination_info.pagination_info.total_rows == 4
+
+
+def test_get_df_with_permissions_not_a_select(connector: SqliteConnector):
+    """Permissions that cannot be applied in the query are applied with pandas"""
+    data_source = SqliteDataSource(name="tables", domain="tables", query="PRAGMA table_info(beers)")
+    df = connector.get_df(data_source, permissions={"column": "name", "operator": "eq", "value": "price"})
+    assert connector.executed_queries == [data_source.query]
+    assert df["name"].tolist() == ["price"]
+
+
+@pytest.fixture
+def orders_data_source(connector: SqliteConnector) -> SqliteDataSource:
+    with sqlite3.connect(connector.path) as connection:
+        connection.execute("CREATE TABLE orders (id INTEGER, amount REAL)")
+        connection.executemany("INSERT INTO orders VALUES (?, ?)", [(i, i * 10) for i in range(1, 21)] + [(None, 0)])
+    return SqliteDataSource(
+        name="orders",
+        domain="orders",
+        query="SELECT * FROM orders WHERE amount >= {{ min_amount }}",
+        parameters={"min_amount": 0},
+    )
+
+
+def test_get_partitioned_df(connector: SqliteConnector, orders_data_source: SqliteDataSource):
+    df = connector.get_partitioned_df(orders_data_source, partition_column="id", partitions=3)
+
+    filtered = "SELECT * FROM (SELECT * FROM orders WHERE amount >= {{ min_amount }}) AS _toucan_filtered WHERE"
+    assert connector.executed_queries[0] == (
+        'SELECT MIN("id") AS lower_bound, MAX("id") AS upper_bound '
+        "FROM (SELECT * FROM orders WHERE amount >= {{ min_amount }}) AS _toucan_bounds"
+    )
+    assert sorted(connector.executed_queries[1:]) == [
+        f'{filtered} "id" < {{{{ __partition_upper__ }}}}',
+        f'{filtered} "id" >= {{{{ __partition_lower__ }}}} AND "id" < {{{{ __partition_upper__ }}}}',
+        f'{filtered} ("id" >= {{{{ __partition_lower__ }}}} OR "id" IS NULL)',
+    ]
+    # Rows are returned partition by partition, the NULL values last
+    assert df["id"].tolist()[:20] == list(range(1, 21))
+    assert len(df) == 21 and pd.isna(df["id"].iloc[20])
+
+
+def test_get_partitioned_df_with_bounds_and_permissions(
+    connector: SqliteConnector, orders_data_source: SqliteDataSource
+):
+    permissions = {"column": "amount", "operator": "ge", "value": 100}
+    df = connector.get_partitioned_df(
+        orders_data_source, "id", 4, permissions=permissions, lower_bound=5, upper_bound=8, max_concurrency=2
+    )
+    # Rows out of the bounds are read by the first and last partitions
+    assert len(connector.executed_queries) == 4
+    assert all("_toucan_filtered WHERE" in query for query in connector.executed_queries)
+    assert df["id"].tolist() == list(range(10, 21))
+
+
+def test_get_partitioned_df_empty(connector: SqliteConnector, orders_data_source: SqliteDataSource):
+    data_source = orders_data_source.model_copy(update={"parameters": {"min_amount": 1000}})
+    df = connector.get_partitioned_df(data_source, partition_column="id", partitions=3)
+    assert len(connector.executed_queries) == 2
+    assert df.empty and df.columns.tolist() == ["id", "amount"]
+
+
+def test_get_partitioned_df_not_a_select(connector: SqliteConnector):
+    data_source = SqliteDataSource(name="tables", domain="tables", query="PRAGMA table_info(beers)")
+    with pytest.raises(ValueError, match="Only SELECT queries"):
+        connector.get_partitioned_df(data_source, partition_column="cid", partitions=2)
+
+
+def test_split_partition_range():
+    assert split_partition_range(1, 100, 4) == [26, 51, 76]
+    # Ranges are not split below one value
+    assert split_partition_range(1, 3, 8) == [2, 3]
+    assert split_partition_range(5, 5, 3) == []
+    assert split_partition_range(datetime.date(2024, 1, 1), datetime.date(2024, 1, 31), 3) == [
+        datetime.date(2024, 1, 11),
+        datetime.date(2024, 1, 21),
+    ]
+    assert split_partition_range(datetime.datetime(2024, 1, 1), datetime.datetime(2024, 1, 2), 2) == [
+        datetime.datetime(2024, 1, 1, 12)
+    ]
+    # Date bounds of timestamp ranges start at midnight
+    assert split_partition_range(datetime.date(2024, 1, 1), datetime.datetime(2024, 1, 2), 2) == [
+        datetime.datetime(2024, 1, 1, 12)
+    ]
+    utc = datetime.UTC
+    assert split_partition_range(datetime.datetime(2024, 1, 1, tzinfo=utc), datetime.date(2024, 1, 3), 2) == [
+        datetime.datetime(2024, 1, 2, tzinfo=utc)
+    ]
+    with pytest.raises(TypeError):
+        split_partition_range("a", "z", 2)
+    with pytest.raises(ValueError):
+        split_partition_range(1, 10, 0)
+
+
+def test_get_cache_key_ignores_query_formatting(connector: SqliteConnector, data_source: SqliteDataSource):
+    reformatted_data_source = data_source.model_copy(
+        update={"query": "SELECT *\n  FROM beers -- all the beers\n  WHERE price >= {{ min_price }}\n  ORDER BY price"}
+    )
+    assert connector.get_cache_key(reformatted_data_source) == connector.get_cache_key(data_source)
+
+    other_data_source = data_source.model_copy(update={"query": "SELECT * FROM beers WHERE price >= {{ min_price }}"})
+    assert connector.get_cache_key(other_data_source) != connector.get_cache_key(data_source)
+
+
+class AsyncSqliteConnector(SqliteConnector, data_source_model=SqliteDataSource):
+    async def _aretrieve_data(self, data_source: SqliteDataSource) -> pd.DataFrame:
+        return self._retrieve_data(data_source)
+
+
+@pytest.mark.asyncio
+async def test_aget_slice(
+    connector: SqliteConnector, data_source: SqliteDataSource, permissions_data_source: SqliteDataSource
+):
+    async_connector = AsyncSqliteConnector(name="sqlite", path=connector.path)
+    res = await async_connector.aget_slice(data_source, offset=2, limit=3, get_row_count=True)
+
+    assert async_connector.executed_queries == [
+        "SELECT * FROM beers WHERE price >= {{ min_price }} ORDER BY price LIMIT 3 OFFSET 2",
+        "SELECT COUNT(*) AS total_rows FROM (SELECT * FROM beers WHERE price >= {{ min_price }}) AS _toucan_count",
+    ]
+    assert res.df["name"].tolist() == ["beer_4", "beer_5", "beer_6"]
+    assert res.pagination_info.pagination_info.total_rows == 8
+
+    df = await async_connector.aget_df(permissions_data_source, permissions=PERMISSIONS)
+    assert "AS _toucan_filtered WHERE" in async_connector.executed_queries[-1]
+    assert df["name"].tolist() == ["beer_3", "beer_5", "beer_8", "beer_9"]
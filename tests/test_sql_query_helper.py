@@ -29,8 +29,29 @@ requests = [
 
 def test_prepare_query_with_limit():
     for request in requests:
-        new_request = SqlQueryHelper().prepare_limit_query(query_string=request, limit=10)
-        assert f"SELECT * FROM ({request.replace(';', '')}) LIMIT 10;" == new_request[0]
+        if "ORDER BY" not in request:
+            new_request = SqlQueryHelper().prepare_limit_query(query_string=request, limit=10)
+            assert f"SELECT * FROM ({request.replace(';', '')}) AS _toucan_slice LIMIT 10;" == new_request[0]
+
+
+def test_prepare_query_with_limit_and_order_by():
+    # The limit is appended after the ORDER BY clause, so that the database can only keep the top rows
+    request = (
+        "SELECT num_departement, COUNT(*) AS nb_communes FROM communes GROUP BY num_departement ORDER BY nb_communes;"
+    )
+    new_request = SqlQueryHelper().prepare_limit_query(query_string=request, limit=10, offset=20)
+    assert f"{request[:-1]} LIMIT 10 OFFSET 20;" == new_request[0]
+
+    # An existing limit is merged with the requested one
+    request = "SELECT nom, num_departement, surface FROM communes ORDER BY surface LIMIT 15;"
+    new_request = SqlQueryHelper().prepare_limit_query(query_string=request, limit=10, offset=10)
+    assert "SELECT nom, num_departement, surface FROM communes ORDER BY surface LIMIT 5 OFFSET 10;" == new_request[0]
+
+
+def test_prepare_query_with_limit_semicolon_in_literal():
+    request = "SELECT nom FROM communes WHERE nom = 'a;b';"
+    new_request = SqlQueryHelper().prepare_limit_query(query_string=request, limit=10)
+    assert "SELECT * FROM (SELECT nom FROM communes WHERE nom = 'a;b') AS _toucan_slice LIMIT 10;" == new_request[0]
 
 
 def test_prepare_query_show():
@@ -41,15 +62,29 @@ def test_prepare_query_show():
 def test_prepare_count_query():
     request_sum = "SELECT nom, num_departement, surface FROM communes ORDER BY surface LIMIT 10;"
     new_request_sum = SqlQueryHelper().prepare_count_query(query_string=request_sum)
-    assert f"SELECT COUNT(*) AS TOTAL_ROWS FROM ({request_sum.replace(';', '')});" == new_request_sum[0]
+    assert (
+        f"SELECT COUNT(*) AS TOTAL_ROWS FROM ({request_sum.replace(';', '')}) AS _toucan_count;" == new_request_sum[0]
+    )
 
     request_sum = "SELECT nom, num_departement,population_2010 FROM communes ORDER BY population_2010 DESC LIMIT 10;"
     new_request_sum = SqlQueryHelper().prepare_count_query(query_string=request_sum)
-    assert f"SELECT COUNT(*) AS TOTAL_ROWS FROM ({request_sum.replace(';', '')});" == new_request_sum[0]
+    assert (
+        f"SELECT COUNT(*) AS TOTAL_ROWS FROM ({request_sum.replace(';', '')}) AS _toucan_count;" == new_request_sum[0]
+    )
 
     request_sum = "SELECT nom, population_2010/surface AS densité FROM communes WHERE num_departement=44 ORDER BY densité DESC LIMIT 12;"
     new_request_sum = SqlQueryHelper().prepare_count_query(query_string=request_sum)
-    assert f"SELECT COUNT(*) AS TOTAL_ROWS FROM ({request_sum.replace(';', '')});" == new_request_sum[0]
+    assert (
+        f"SELECT COUNT(*) AS TOTAL_ROWS FROM ({request_sum.replace(';', '')}) AS _toucan_count;" == new_request_sum[0]
+    )
+
+    # The ORDER BY clause is useless to count the rows
+    request_sum = "SELECT nom, num_departement, surface FROM communes ORDER BY surface;"
+    new_request_sum = SqlQueryHelper().prepare_count_query(query_string=request_sum)
+    assert (
+        "SELECT COUNT(*) AS TOTAL_ROWS FROM (SELECT nom, num_departement, surface FROM communes) AS _toucan_count;"
+        == new_request_sum[0]
+    )
 
 
 def test_extract_limit():
@@ -0,0 +1,255 @@
+import pytest
+
+from toucan_connectors.sql_rewriter import (
+    MSSQLDialect,
+    MySQLDialect,
+    OracleDialect,
+    SqlDialect,
+    build_bounds_query,
+    build_count_query,
+    build_filtered_query,
+    build_slice_query,
+    is_select_query,
+    normalize_query,
+    strip_trailing_semicolons,
+    tokenize,
+)
+
+
+def test_tokenize():
+    tokens = tokenize("SELECT 'a;(b' AS \"x)\" FROM (SELECT 1) -- c;\n")
+    assert [(t.kind, t.value, t.depth) for t in tokens if t.is_significant] == [
+        ("word", "SELECT", 0),
+        ("literal", "'a;(b'", 0),
+        ("word", "AS", 0),
+        ("literal", '"x)"', 0),
+        ("word", "FROM", 0),
+        ("punctuation", "(", 0),
+        ("word", "SELECT", 1),
+        ("number", "1", 1),
+        ("punctuation", ")", 0),
+    ]
+
+
+def test_tokenize_backslash_escapes():
+    query = r"SELECT 'it\'s;' FROM t"
+    assert [t.value for t in tokenize(query, backslash_escapes=True) if t.kind == "literal"] == [r"'it\'s;'"]
+
+
+@pytest.mark.parametrize(
+    "query,expected",
+    [
+        ("SELECT * FROM t;", True),
+        ("  with c AS (SELECT 1) SELECT * FROM c", True),
+        ("WITH c AS (SELECT 1) INSERT INTO t SELECT * FROM c", False),
+        ("SHOW TABLES", False),
+        ("DESCRIBE t", False),
+        ("SELECT 1; SELECT 2", False),
+        ("", False),
+    ],
+)
+def test_is_select_query(query: str, expected: bool):
+    assert is_select_query(query) is expected
+
+
+def test_strip_trailing_semicolons():
+    assert strip_trailing_semicolons("SELECT ';' FROM t ; ; -- comment\n") == "SELECT ';' FROM t"
+
+
+def test_normalize_query():
+    assert normalize_query("SELECT  a,\n  'x  -- y' -- comment\nFROM t /* c */ ;") == "SELECT a , 'x  -- y' FROM t"
+    assert normalize_query("select a from t") != normalize_query("SELECT a FROM t")
+    assert normalize_query(r"SELECT 'it\'s  a' ", dialect=MySQLDialect()) == r"SELECT 'it\'s  a'"
+
+
+@pytest.mark.parametrize(
+    "query,expected",
+    [
+        ("SELECT * FROM t;", "SELECT * FROM (SELECT * FROM t) AS _toucan_slice LIMIT 10 OFFSET 5"),
+        ("SELECT * FROM t ORDER BY a DESC", "SELECT * FROM t ORDER BY a DESC LIMIT 10 OFFSET 5"),
+        # Existing pagination clauses are merged
+        ("SELECT * FROM t ORDER BY a LIMIT 12", "SELECT * FROM t ORDER BY a LIMIT 7 OFFSET 5"),
+        ("SELECT * FROM t ORDER BY a LIMIT 3", "SELECT * FROM t ORDER BY a LIMIT 0 OFFSET 5"),
+        ("SELECT * FROM t LIMIT 20 OFFSET 10", "SELECT * FROM t LIMIT 10 OFFSET 15"),
+        ("SELECT * FROM t LIMIT 10, 100", "SELECT * FROM t LIMIT 10 OFFSET 15"),
+        (
+            "SELECT * FROM t ORDER BY a OFFSET 2 ROWS FETCH FIRST 40 ROWS ONLY",
+            "SELECT * FROM t ORDER BY a LIMIT 10 OFFSET 7",
+        ),
+        # Pagination clauses that cannot be merged
+        (
+            "SELECT * FROM t ORDER BY a LIMIT {{ n }}",
+            "SELECT * FROM (SELECT * FROM t ORDER BY a LIMIT {{ n }}) AS _toucan_slice LIMIT 10 OFFSET 5",
+        ),
+        (
+            "SELECT * FROM t ORDER BY a FOR UPDATE",
+            "SELECT * FROM (SELECT * FROM t ORDER BY a FOR UPDATE) AS _toucan_slice LIMIT 10 OFFSET 5",
+        ),
+        # Clauses of subqueries are left untouched
+        (
+            "SELECT * FROM (SELECT * FROM t ORDER BY a LIMIT 3) AS s",
+            "SELECT * FROM (SELECT * FROM (SELECT * FROM t ORDER BY a LIMIT 3) AS s) AS _toucan_slice "
+            "LIMIT 10 OFFSET 5",
+        ),
+        (
+            "WITH c AS (SELECT * FROM t LIMIT 3) SELECT * FROM c;",
+            "WITH c AS (SELECT * FROM t LIMIT 3) SELECT * FROM (SELECT * FROM c) AS _toucan_slice LIMIT 10 OFFSET 5",
+        ),
+        (
+            "SELECT * FROM t WHERE a = 'ORDER BY a'",
+            "SELECT * FROM (SELECT * FROM t WHERE a = 'ORDER BY a') AS _toucan_slice LIMIT 10 OFFSET 5",
+        ),
+        ("SHOW TABLES", None),
+    ],
+)
+def test_build_slice_query(query: str, expected: str | None):
+    assert build_slice_query(query, 5, 10) == expected
+
+
+@pytest.mark.parametrize(
+    "dialect,query,expected",
+    [
+        (
+            MSSQLDialect(),
+            "SELECT * FROM t",
+            "SELECT * FROM (SELECT * FROM t) AS _toucan_slice "
+            "ORDER BY (SELECT NULL) OFFSET 5 ROWS FETCH NEXT 10 ROWS ONLY",
+        ),
+        (
+            MSSQLDialect(),
+            "SELECT * FROM t ORDER BY a",
+            "SELECT * FROM t ORDER BY a OFFSET 5 ROWS FETCH NEXT 10 ROWS ONLY",
+        ),
+        (
+            MSSQLDialect(),
+            "SELECT DISTINCT TOP 20 a FROM t",
+            "SELECT * FROM (SELECT DISTINCT TOP 20 a FROM t) AS _toucan_slice "
+            "ORDER BY (SELECT NULL) OFFSET 5 ROWS FETCH NEXT 10 ROWS ONLY",
+        ),
+        # TOP cannot be combined with OFFSET and FETCH
+        (MSSQLDialect(), "SELECT TOP 20 * FROM t ORDER BY a", None),
+        (SqlDialect(), "SELECT top FROM t ORDER BY a", "SELECT top FROM t ORDER BY a LIMIT 10 OFFSET 5"),
+        (OracleDialect(), "SELECT * FROM t", "SELECT * FROM (SELECT * FROM t) OFFSET 5 ROWS FETCH NEXT 10 ROWS ONLY"),
+        (
+            OracleDialect(),
+            "SELECT * FROM t ORDER BY a FETCH FIRST 8 ROWS ONLY",
+            "SELECT * FROM t ORDER BY a OFFSET 5 ROWS FETCH NEXT 3 ROWS ONLY",
+        ),
+        (
+            MySQLDialect(),
+            r"SELECT 'it\'s;' AS a;",
+            r"SELECT * FROM (SELECT 'it\'s;' AS a) AS _toucan_slice LIMIT 10 OFFSET 5",
+        ),
+    ],
+)
+def test_build_slice_query_dialects(dialect: SqlDialect, query: str, expected: str | None):
+    assert build_slice_query(query, 5, 10, dialect=dialect) == expected
+
+
+def test_build_slice_query_without_offset():
+    assert build_slice_query("SELECT * FROM t ORDER BY a", 0, 10) == "SELECT * FROM t ORDER BY a LIMIT 10"
+    assert build_slice_query("SELECT * FROM t", 0, 10, dialect=OracleDialect()) == (
+        "SELECT * FROM (SELECT * FROM t) FETCH FIRST 10 ROWS ONLY"
+    )
+
+
+@pytest.mark.parametrize(
+    "query,expected",
+    [
+        ("SELECT * FROM t;", "SELECT COUNT(*) AS total_rows FROM (SELECT * FROM t) AS _toucan_count"),
+        # The ORDER BY clause is dropped, unless the query is paginated
+        ("SELECT * FROM t ORDER BY a; ", "SELECT COUNT(*) AS total_rows FROM (SELECT * FROM t) AS _toucan_count"),
+        (
+            "SELECT * FROM t ORDER BY a LIMIT 3",
+            "SELECT COUNT(*) AS total_rows FROM (SELECT * FROM t ORDER BY a LIMIT 3) AS _toucan_count",
+        ),
+        (
+            "WITH c AS (SELECT * FROM t ORDER BY a) SELECT * FROM c ORDER BY b",
+            "WITH c AS (SELECT * FROM t ORDER BY a) "
+            "SELECT COUNT(*) AS total_rows FROM (SELECT * FROM c) AS _toucan_count",
+        ),
+        ("SHOW TABLES", None),
+    ],
+)
+def test_build_count_query(query: str, expected: str | None):
+    assert build_count_query(query) == expected
+
+
+def test_build_count_query_mssql_top():
+    assert build_count_query("SELECT TOP 3 * FROM t ORDER BY a", dialect=MSSQLDialect()) == (
+        "SELECT COUNT(*) AS total_rows FROM (SELECT TOP 3 * FROM t ORDER BY a) AS _toucan_count"
+    )
+
+
+def test_build_count_query_oracle():
+    assert build_count_query("SELECT * FROM t ORDER BY a", dialect=OracleDialect(), column="n") == (
+        "SELECT COUNT(*) AS n FROM (SELECT * FROM t)"
+    )
+
+
+def test_build_bounds_query():
+    assert build_bounds_query("SELECT * FROM t ORDER BY a;", "id") == (
+        'SELECT MIN("id") AS lower_bound, MAX("id") AS upper_bound FROM (SELECT * FROM t) AS _toucan_bounds'
+    )
+    assert build_bounds_query("WITH c AS (SELECT 1 AS id) SELECT * FROM c", "id", dialect=MySQLDialect()) == (
+        "WITH c AS (SELECT 1 AS id) SELECT MIN(`id`) AS lower_bound, MAX(`id`) AS upper_bound "
+        "FROM (SELECT * FROM c) AS _toucan_bounds"
+    )
+    assert build_bounds_query("SHOW TABLES", "id") is None
+
+
+@pytest.mark.parametrize(
+    "dialect,query,expected",
+    [
+        (SqlDialect(), "SELECT * FROM t;", 'SELECT * FROM (SELECT * FROM t) AS _toucan_filtered WHERE "a" = 1'),
+        (
+            SqlDialect(),
+            "WITH c AS (SELECT 1 AS a) SELECT * FROM c",
+            'WITH c AS (SELECT 1 AS a) SELECT * FROM (SELECT * FROM c) AS _toucan_filtered WHERE "a" = 1',
+        ),
+        (
+            SqlDialect(),
+            "WITH c AS (SELECT * FROM t ORDER BY a) SELECT * FROM c",
+            'WITH c AS (SELECT * FROM t ORDER BY a) SELECT * FROM (SELECT * FROM c) AS _toucan_filtered WHERE "a" = 1',
+        ),
+        (OracleDialect(), "SELECT * FROM t", 'SELECT * FROM (SELECT * FROM t) WHERE "a" = 1'),
+        # The order of the rows would be lost in the subquery
+        (SqlDialect(), "SELECT * FROM t ORDER BY a;", None),
+        (SqlDialect(), "SELECT * FROM t ORDER BY a LIMIT 3", None),
+        (MSSQLDialect(), "SELECT TOP 3 * FROM t ORDER BY a", None),
+        (SqlDialect(), "SHOW TABLES", None),
+    ],
+)
+def test_build_filtered_query(dialect: SqlDialect, query: str, expected: str | None):
+    assert build_filtered_query(query, f"{dialect.quote_identifier('a')} = 1", dialect=dialect) == expected
+
+
+@pytest.mark.parametrize(
+    "dialect,query,expected",
+    [
+        # The ORDER BY clause is dropped, unless it selects the rows
+        (
+            SqlDialect(),
+            "SELECT * FROM t ORDER BY a;",
+            'SELECT * FROM (SELECT * FROM t) AS _toucan_filtered WHERE "a" = 1',
+        ),
+        (
+            SqlDialect(),
+            "SELECT * FROM t ORDER BY a LIMIT 3",
+            'SELECT * FROM (SELECT * FROM t ORDER BY a LIMIT 3) AS _toucan_filtered WHERE "a" = 1',
+        ),
+        (
+            MSSQLDialect(),
+            "SELECT TOP 3 * FROM t ORDER BY a",
+            'SELECT * FROM (SELECT TOP 3 * FROM t ORDER BY a) AS _toucan_filtered WHERE "a" = 1',
+        ),
+    ],
+)
+def test_build_filtered_query_without_order(dialect: SqlDialect, query: str, expected: str):
+    condition = f"{dialect.quote_identifier('a')} = 1"
+    assert build_filtered_query(query, condition, dialect=dialect, keep_order=False) == expected
+
+
+def test_quote_identifier():
+    assert SqlDialect().quote_identifier('my "col"') == '"my ""col"""'
+    assert MySQLDialect().quote_identifier("my `col`") == "`my ``col```"
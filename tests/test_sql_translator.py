@@ -0,0 +1,108 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from toucan_connectors.pandas_translator import PandasMaskTranslator
+from toucan_connectors.sql_rewriter import MSSQLDialect, MySQLDialect
+from toucan_connectors.sql_translator import _VALUE_MARKER, SqlClause, SqlConditionTranslator
+
+
+def test_translate_to_sql():
+    c = {
+        "and": [
+            {"column": "country", "operator": "eq", "value": "France"},
+            {
+                "or": [
+                    {"column": "city name", "operator": "in", "value": ["Paris", "London"]},
+                    {"column": "population", "operator": "gt", "value": "'42'"},
+                    {"column": "mayor", "operator": "isnull", "value": None},
+                ]
+            },
+        ]
+    }
+    assert SqlConditionTranslator.translate_to_sql(c) == (
+        '("country" = {{ __permission_0__ }} AND ("city name" IN ({{ __permission_1__ }}, {{ __permission_2__ }}) '
+        'OR "population" > {{ __permission_3__ }} OR "mayor" IS NULL))',
+        {
+            "__permission_0__": "France",
+            "__permission_1__": "Paris",
+            "__permission_2__": "London",
+            "__permission_3__": 42,
+        },
+    )
+
+
+def test_translate_to_sql_values_are_not_interpolated():
+    c = {"column": 'na"me', "operator": "ne", "value": "'; DROP TABLE users; --"}
+    assert SqlConditionTranslator.translate_to_sql(c, parameters_prefix="__p") == (
+        '("na""me" <> {{ __p0__ }} OR "na""me" IS NULL)',
+        {"__p0__": "'; DROP TABLE users; --"},
+    )
+
+
+def test_translate_condition_errors():
+    with pytest.raises(ValueError):
+        SqlConditionTranslator.translate({"column": "population", "operator": "eq"})
+    with pytest.raises(ValueError):
+        SqlConditionTranslator.translate({"and": 1})
+    with pytest.raises(NotImplementedError):
+        SqlConditionTranslator.translate({"column": "name", "operator": "matches", "value": "^a"})
+
+
+def test_SqlConditionTranslator_operators():  # noqa: N802
+    assert SqlConditionTranslator.EQUAL("col", "val") == SqlClause("col = \x00", ["val"])
+    assert SqlConditionTranslator.NOT_EQUAL("col", 42) == SqlClause("(col <> \x00 OR col IS NULL)", [42])
+    assert SqlConditionTranslator.GREATER_THAN("col", '"42"') == SqlClause("col > \x00", [42])
+    assert SqlConditionTranslator.GREATER_THAN_EQUAL("col", -42) == SqlClause("col >= \x00", [-42])
+    assert SqlConditionTranslator.LOWER_THAN("col", "2024-01-01") == SqlClause("col < \x00", ["2024-01-01"])
+    assert SqlConditionTranslator.LOWER_THAN_EQUAL("col", 42.1) == SqlClause("col <= \x00", [42.1])
+    assert SqlConditionTranslator.IN("col", ["a", "b"]) == SqlClause("col IN (\x00, \x00)", ["a", "b"])
+    assert SqlConditionTranslator.IN("col", "a") == SqlClause("col IN (\x00)", ["a"])
+    assert SqlConditionTranslator.IN("col", []) == SqlClause("1 = 0", [])
+    assert SqlConditionTranslator.NOT_IN("col", [1]) == SqlClause("(col NOT IN (\x00) OR col IS NULL)", [1])
+    assert SqlConditionTranslator.NOT_IN("col", []) == SqlClause("1 = 1", [])
+    assert SqlConditionTranslator.IS_NULL("col") == SqlClause("col IS NULL", [])
+    assert SqlConditionTranslator.IS_NOT_NULL("col") == SqlClause("col IS NOT NULL", [])
+
+
+def test_for_dialect():
+    translator = SqlConditionTranslator.for_dialect(MySQLDialect())
+    assert translator.translate_to_sql({"column": "my`col", "operator": "eq", "value": 1})[0] == (
+        "`my``col` = {{ __permission_0__ }}"
+    )
+    mssql_dialect = MSSQLDialect()
+    assert SqlConditionTranslator.for_dialect(mssql_dialect) is SqlConditionTranslator.for_dialect(mssql_dialect)
+    assert SqlConditionTranslator.for_dialect(SqlConditionTranslator.dialect) is SqlConditionTranslator
+
+
+@pytest.mark.parametrize(
+    "condition",
+    [
+        {"column": "name", "operator": "eq", "value": "a"},
+        {"column": "name", "operator": "ne", "value": "a"},
+        {"column": "name", "operator": "in", "value": ["a", "b"]},
+        {"column": "name", "operator": "nin", "value": ["a", "b"]},
+        {"column": "name", "operator": "nin", "value": []},
+        {"column": "name", "operator": "isnull", "value": None},
+        {"column": "name", "operator": "notnull", "value": None},
+        {
+            "or": [
+                {"column": "name", "operator": "ne", "value": "a"},
+                {"column": "name", "operator": "eq", "value": "a"},
+            ]
+        },
+    ],
+)
+def test_same_rows_as_pandas_translator(condition):
+    """NULLs are filtered as the pandas translator does, although SQL comparisons with NULL are unknown"""
+    df = pd.DataFrame({"name": ["a", "b", "c", None]})
+    connection = sqlite3.connect(":memory:")
+    df.to_sql("t", connection, index=False)
+    clause = SqlConditionTranslator.translate(condition)
+    sql_rows = connection.execute(
+        f"SELECT name FROM t WHERE {clause.sql.replace(_VALUE_MARKER, '?')} ORDER BY rowid",  # noqa: S608
+        clause.values,
+    ).fetchall()
+    mask = PandasMaskTranslator.translate(condition)
+    assert [name for (name,) in sql_rows] == df[mask(df)]["name"].tolist()
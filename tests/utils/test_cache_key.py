@@ -0,0 +1,88 @@
+import subprocess
+import sys
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+
+import pytest
+from pydantic import BaseModel, SecretStr
+
+from toucan_connectors.utils.cache_key import (
+    canonical_dumps,
+    canonicalize,
+    identity_snapshot,
+    same_snapshot,
+    stable_digest,
+)
+
+
+class Color(Enum):
+    RED = "red"
+
+
+class Model(BaseModel):
+    name: str
+    password: SecretStr
+    color: Color
+
+
+def test_canonicalize():
+    assert canonicalize(
+        {
+            "model": Model(name="a", password=SecretStr("s3cr3t"), color=Color.RED),
+            "dates": (date(2024, 1, 2), datetime(2024, 1, 2, 3, 4)),
+            "set": {3, 1, 2},
+            "decimal": Decimal("1.10"),
+            1: b"\x01",
+        }
+    ) == {
+        "model": {"name": "a", "password": "s3cr3t", "color": "red"},
+        "dates": ["2024-01-02", "2024-01-02T03:04:00"],
+        "set": [1, 2, 3],
+        "decimal": "1.10",
+        "1": "01",
+    }
+    with pytest.raises(TypeError):
+        canonicalize(object())
+
+
+def test_canonical_dumps():
+    assert canonical_dumps({"b": 1, "a": [None, "é"]}) == canonical_dumps({"a": [None, "é"], "b": 1})
+    assert canonical_dumps({"b": 1, "a": [None, "é"]}) == '{"a":[null,"é"],"b":1}'
+
+
+def test_stable_digest_across_processes():
+    obj = {"set": {"a", "b", "c"}, "color": Color.RED}
+    script = (
+        "from enum import Enum\n"
+        "from toucan_connectors.utils.cache_key import stable_digest\n"
+        "Color = Enum('Color', {'RED': 'red'})\n"
+        "print(stable_digest({'set': {'a', 'b', 'c'}, 'color': Color.RED}))\n"
+    )
+    for seed in ("1", "2"):
+        result = subprocess.run(  # noqa: S603
+            [sys.executable, "-c", script], capture_output=True, text=True, check=True, env={"PYTHONHASHSEED": seed}
+        )
+        assert result.stdout.strip() == stable_digest(obj)
+
+
+def test_identity_snapshot():
+    class Model(BaseModel):
+        name: str
+        values: dict[str, list[int]]
+
+    model = Model(name="a", values={"x": [1, 2]})
+    snapshot = identity_snapshot(model)
+    assert snapshot is not None
+    assert same_snapshot(snapshot, identity_snapshot(model))
+
+    model.values["x"].append(3)
+    changed = identity_snapshot(model)
+    assert changed is not None
+    assert not same_snapshot(snapshot, changed)
+
+    model.name = "b"
+    assert not same_snapshot(changed, identity_snapshot(model))
+
+    # Objects which could change in place without being noticed
+    assert identity_snapshot({"x": object()}) is None
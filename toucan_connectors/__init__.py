@@ -212,7 +212,9 @@ for connector_type, connector_infos in CONNECTORS_REGISTRY.items():
                 connector_infos["_managed_oauth_service_id"] = connector_cls._managed_oauth_service_id
             # check if connector implements `get_status`,
             # which is hence different from `ToucanConnector.get_status`
-            connector_infos["hasStatusCheck"] = connector_cls.get_status is not connector_cls.__bases__[0].get_status  # type: ignore[assignment]
+            # (mixins can come first in the bases, so we look for the parent connector class)
+            parent_cls = next(base for base in connector_cls.__bases__ if issubclass(base, ToucanConnector))
+            connector_infos["hasStatusCheck"] = connector_cls.get_status is not parent_cls.get_status  # type: ignore[assignment]
 
     # Set default label if not set
     if "label" not in connector_infos:
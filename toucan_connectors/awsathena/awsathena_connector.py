@@ -14,9 +14,10 @@ except ImportError as exc:  # pragma: no cover
     logging.getLogger(__name__).warning(f"Missing dependencies for {__name__}: {exc}")
     CONNECTOR_OK = False
 
-from toucan_connectors.common import ConnectorStatus, apply_query_parameters, sanitize_query
+from toucan_connectors.common import ConnectorStatus, sanitize_query
 from toucan_connectors.pagination import build_pagination_info
-from toucan_connectors.pandas_translator import PandasConditionTranslator
+from toucan_connectors.pandas_translator import compile_permissions_mask
+from toucan_connectors.query_manager import RunningQuery, get_query_manager
 from toucan_connectors.toucan_connector import (
     DataSlice,
     DataStats,
@@ -67,6 +68,19 @@ class AwsathenaDataSource(ToucanDataSource):
         self.query, self.parameters = sanitize_query(self.query, self.parameters, athena_variable_transformer)
 
 
+def _track_query_executions(session: "boto3.Session", running_query: RunningQuery) -> None:
+    """Registers the executions started with `session`, to cancel them with StopQueryExecution"""
+
+    def on_start_query_execution(parsed: dict, **kwargs: Any) -> None:
+        query_execution_id = parsed["QueryExecutionId"]
+        running_query.set_backend_query(
+            query_execution_id,
+            lambda: session.client("athena").stop_query_execution(QueryExecutionId=query_execution_id),
+        )
+
+    session.events.register("after-call.athena.StartQueryExecution", on_start_query_execution)
+
+
 def athena_variable_transformer(variable: str):
     """Add surrounding for parameters injection"""
     return f":{variable}"
@@ -115,20 +129,20 @@ class AwsathenaConnector(ToucanConnector, DiscoverableConnector, data_source_mod
         limit: int | None = None,
     ) -> "pd.DataFrame":
         assert data_source.query is not None, "no query provided"
-        df = wr.athena.read_sql_query(
-            self._add_pagination_to_query(
-                data_source.query,
-                offset=offset,
-                limit=limit,
-            ),
-            params=data_source.parameters,
-            database=data_source.database,
-            boto3_session=self.get_session(),
-            s3_output=self.s3_output_bucket,
-            ctas_approach=data_source.use_ctas,
-            paramstyle="named",
-        )
-        return df
+        query = self._add_pagination_to_query(data_source.query, offset=offset, limit=limit)
+        # A new session is created for each query, so that its handlers only see the executions of this query
+        session = self.get_session()
+        with get_query_manager().track(self.name, query) as running_query:
+            _track_query_executions(session, running_query)
+            return wr.athena.read_sql_query(
+                query,
+                params=data_source.parameters,
+                database=data_source.database,
+                boto3_session=session,
+                s3_output=self.s3_output_bucket,
+                ctas_approach=data_source.use_ctas,
+                paramstyle="named",
+            )
 
     def _list_db_names(self) -> list[str]:
         return [
@@ -174,9 +188,7 @@ class AwsathenaConnector(ToucanConnector, DiscoverableConnector, data_source_mod
         df.columns = df.columns.astype(str)
 
         if permissions is not None:
-            permissions_query = PandasConditionTranslator.translate(permissions)
-            permissions_query = apply_query_parameters(permissions_query, data_source.parameters or {})
-            df = df.query(permissions_query)
+            df = df[compile_permissions_mask(permissions, data_source.parameters)(df)]
 
         return DataSlice(
             df,
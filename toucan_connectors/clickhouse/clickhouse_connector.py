@@ -16,6 +16,7 @@ from pydantic import Field, StringConstraints, create_model
 from pydantic.json_schema import DEFAULT_REF_TEMPLATE, GenerateJsonSchema, JsonSchemaMode
 
 from toucan_connectors.common import pandas_read_sql
+from toucan_connectors.sql_push_down import SqlPushDownMixin
 from toucan_connectors.toucan_connector import (
     PlainJsonSecretStr,
     ToucanConnector,
@@ -103,7 +104,7 @@ class ClickhouseDataSource(ToucanDataSource):
         return create_model("FormSchema", **constraints, __base__=cls).schema()
 
 
-class ClickhouseConnector(ToucanConnector, data_source_model=ClickhouseDataSource):
+class ClickhouseConnector(SqlPushDownMixin, ToucanConnector, data_source_model=ClickhouseDataSource):
     """
     Import data from Clickhouse.
     """
@@ -4,10 +4,11 @@ import dataclasses
 import datetime
 import logging
 import re
-from collections.abc import Callable
+from collections.abc import Callable, Coroutine, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import suppress
 from copy import deepcopy
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, NoReturn
 
 from jinja2 import Environment, Undefined, UndefinedError, meta
 from jinja2.nativetypes import NativeEnvironment
@@ -18,7 +19,9 @@ from toucan_connectors.utils.slugify import slugify
 
 if TYPE_CHECKING:  # pragma: no cover
     import pandas as pd
+    import pyarrow as pa
     import sqlalchemy as sa
+    from sqlalchemy.ext.asyncio import AsyncEngine
 
 
 class NativeImmutableSandboxedEnvironment(NativeEnvironment, ImmutableSandboxedEnvironment): ...
@@ -297,6 +300,17 @@ def get_loop():
     return loop
 
 
+def run_coroutine_sync[T](coroutine: Coroutine[Any, Any, T]) -> T:
+    """Runs a coroutine from sync code, including when an event loop is already running in the thread"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    # `run_until_complete` cannot be called from a running loop: the coroutine gets its own thread
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+
 class HttpError(Exception):
     """
     Raised when the response of an HTTP request has not a 200 status code.
@@ -516,19 +530,15 @@ def unnest_sql_jinja_parameters(query: str, params: dict[str, Any]) -> tuple[str
     return substituted_query, substituted_params
 
 
-def pandas_read_sql(
+def _prepare_pandas_sql_query(
     query: str,
-    con,
-    params=None,
+    params,
     adapt_params: bool = False,
     convert_to_qmark: bool = False,
     convert_to_printf: bool = True,
     convert_to_numeric: bool = False,
     render_user: bool = False,
-    **kwargs,
-) -> "pd.DataFrame":
-    import pandas as pd
-
+) -> tuple[str, Any]:
     if convert_to_printf:
         query = convert_to_printf_templating_style(query)
     if render_user:
@@ -540,42 +550,147 @@ def pandas_read_sql(
     if adapt_params:
         params = adapt_param_type(params)
 
-    try:
-        # FIXME: We should use here the sqlalchemy.text() module to
-        # escape characters like % but as a quick fix,
-        # we added regex replace that will exclude %(.*) compositions
-        query = query.replace("%%", "%")
-        query = re.sub(r"%[^(%]", r"%\g<0>", query)
-        df = pd.read_sql(query, con=con, params=params, **kwargs)
-    except pd.errors.DatabaseError as exc:
-        if is_interpolating_table_name(query):
-            errmsg = f"Execution failed on sql '{query}': interpolating table name is forbidden"
-            raise pd.errors.DatabaseError(errmsg) from exc
-        else:
-            raise
+    # FIXME: We should use here the sqlalchemy.text() module to
+    # escape characters like % but as a quick fix,
+    # we added regex replace that will exclude %(.*) compositions
+    query = query.replace("%%", "%")
+    query = re.sub(r"%[^(%]", r"%\g<0>", query)
+    return query, params
+
+
+def _raise_database_error(query: str, exc: Exception) -> NoReturn:
+    import pandas as pd
+
+    if is_interpolating_table_name(query):
+        errmsg = f"Execution failed on sql '{query}': interpolating table name is forbidden"
+        raise pd.errors.DatabaseError(errmsg) from exc
+    raise exc
 
+
+def _clean_sql_df(df: "pd.DataFrame") -> "pd.DataFrame":
     rename_duplicate_columns(df)
     infer_datetime_dtype(df)
     return df
 
 
-def create_sqlalchemy_engine(url: "sa.URL", connect_args: dict[str, Any] | None = None) -> "sa.Engine":
+def pandas_read_sql(
+    query: str,
+    con,
+    params=None,
+    adapt_params: bool = False,
+    convert_to_qmark: bool = False,
+    convert_to_printf: bool = True,
+    convert_to_numeric: bool = False,
+    render_user: bool = False,
+    **kwargs,
+) -> "pd.DataFrame":
+    import pandas as pd
+
+    query, params = _prepare_pandas_sql_query(
+        query,
+        params,
+        adapt_params=adapt_params,
+        convert_to_qmark=convert_to_qmark,
+        convert_to_printf=convert_to_printf,
+        convert_to_numeric=convert_to_numeric,
+        render_user=render_user,
+    )
+    try:
+        df = pd.read_sql(query, con=con, params=params, **kwargs)
+    except pd.errors.DatabaseError as exc:
+        _raise_database_error(query, exc)
+
+    return _clean_sql_df(df)
+
+
+def pandas_iter_sql(
+    query: str,
+    con,
+    chunksize: int,
+    params=None,
+    adapt_params: bool = False,
+    convert_to_qmark: bool = False,
+    convert_to_printf: bool = True,
+    convert_to_numeric: bool = False,
+    render_user: bool = False,
+    **kwargs,
+) -> Iterator["pd.DataFrame"]:
+    """Same as `pandas_read_sql`, but yields dataframes of at most `chunksize` rows.
+
+    Rows are fetched from the cursor chunk by chunk, so that only one chunk is converted
+    to a dataframe at a time.
+    """
+    import pandas as pd
+
+    query, params = _prepare_pandas_sql_query(
+        query,
+        params,
+        adapt_params=adapt_params,
+        convert_to_qmark=convert_to_qmark,
+        convert_to_printf=convert_to_printf,
+        convert_to_numeric=convert_to_numeric,
+        render_user=render_user,
+    )
+    try:
+        chunks = pd.read_sql(query, con=con, params=params, chunksize=chunksize, **kwargs)
+    except pd.errors.DatabaseError as exc:
+        _raise_database_error(query, exc)
+
+    for chunk in chunks:
+        yield _clean_sql_df(chunk)
+
+
+def arrow_table_to_df(table: "pa.Table") -> "pd.DataFrame":
+    """Converts an Arrow table to a pandas DataFrame, releasing the Arrow buffers along the conversion.
+
+    This avoids holding the data twice in memory, but the table must not be used afterwards.
+    """
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def create_sqlalchemy_engine(
+    url: "sa.URL", connect_args: dict[str, Any] | None = None, pool_options: dict[str, Any] | None = None
+) -> "sa.Engine":
     """Creates an SQLAlchemy engine for the given URL.
 
-    Sets sensible connector-specific defaults, such as disabling connection pooling.
+    Connection pooling is disabled, unless `pool_options` (e.g. `pool_size`) are given. Pooled engines
+    should be shared through `toucan_connectors.engine_registry`.
     """
     import sqlalchemy as sa
 
-    kwargs: dict[str, Any] = {"poolclass": sa.NullPool}
+    kwargs: dict[str, Any] = {"poolclass": sa.NullPool} if pool_options is None else dict(pool_options)
     if connect_args is not None:
         kwargs["connect_args"] = connect_args
 
     return sa.create_engine(url, **kwargs)
 
 
+def create_async_sqlalchemy_engine(url: "sa.URL", connect_args: dict[str, Any] | None = None) -> "AsyncEngine":
+    """Same as `create_sqlalchemy_engine`, for an async driver"""
+    import sqlalchemy as sa
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    kwargs: dict[str, Any] = {"poolclass": sa.NullPool}
+    if connect_args is not None:
+        kwargs["connect_args"] = connect_args
+
+    return create_async_engine(url, **kwargs)
+
+
 def pandas_read_sqlalchemy_query(
-    *, query: str, engine: "sa.Engine", params: dict[str, Any] | tuple[Any] | None = None
+    *,
+    query: str,
+    engine: "sa.Engine",
+    params: dict[str, Any] | tuple[Any] | None = None,
+    on_connect: Callable[["sa.Connection"], None] | None = None,
+    itersize: int | None = None,
 ) -> "pd.DataFrame":
+    """Reads the results of `query` as a dataframe.
+
+    `on_connect` is called with the connection before the query is executed, e.g. to register how to cancel it.
+    With an `itersize`, the results are fetched from a server-side cursor `itersize` rows at a time, instead of
+    being buffered by the driver before being converted.
+    """
     import pandas as pd
     from sqlalchemy import text as sa_text
     from sqlalchemy.exc import SQLAlchemyError
@@ -584,17 +699,76 @@ def pandas_read_sqlalchemy_query(
 
     try:
         with engine.connect() as conn:
-            df = pd.read_sql(sa_query, conn, params=params)
+            if on_connect is not None:
+                on_connect(conn)
+            if itersize is None:
+                df = pd.read_sql(sa_query, conn, params=params)
+            else:
+                conn = conn.execution_options(stream_results=True, max_row_buffer=itersize)
+                df = pd.concat(pd.read_sql(sa_query, conn, params=params, chunksize=itersize), ignore_index=True)
     except (pd.errors.DatabaseError, SQLAlchemyError) as exc:
-        if is_interpolating_table_name(query):
-            errmsg = f"Execution failed on sql '{query}': interpolating table name is forbidden"
-            raise pd.errors.DatabaseError(errmsg) from exc
-        else:
-            raise
+        _raise_database_error(query, exc)
 
-    rename_duplicate_columns(df)
-    infer_datetime_dtype(df)
-    return df
+    return _clean_sql_df(df)
+
+
+async def pandas_read_sqlalchemy_query_async(
+    *,
+    query: str,
+    engine: "AsyncEngine",
+    params: dict[str, Any] | tuple[Any] | None = None,
+    on_connect: Callable[["sa.Connection"], None] | None = None,
+) -> "pd.DataFrame":
+    """Same as `pandas_read_sqlalchemy_query`, with an async engine"""
+    import pandas as pd
+    from sqlalchemy import text as sa_text
+    from sqlalchemy.exc import SQLAlchemyError
+
+    sa_query = sa_text(query)
+
+    def read_sql(sync_conn: "sa.Connection") -> "pd.DataFrame":
+        if on_connect is not None:
+            on_connect(sync_conn)
+        return pd.read_sql(sa_query, sync_conn, params=params)
+
+    try:
+        async with engine.connect() as conn:
+            # pandas only reads from sync connections: the I/O of `run_sync` is still done asynchronously
+            df = await conn.run_sync(read_sql)
+    except (pd.errors.DatabaseError, SQLAlchemyError) as exc:
+        _raise_database_error(query, exc)
+
+    return _clean_sql_df(df)
+
+
+def pandas_iter_sqlalchemy_query(
+    *,
+    query: str,
+    engine: "sa.Engine",
+    chunksize: int,
+    params: dict[str, Any] | tuple[Any] | None = None,
+    itersize: int | None = None,
+) -> Iterator["pd.DataFrame"]:
+    """Same as `pandas_read_sqlalchemy_query`, but yields dataframes of at most `chunksize` rows.
+
+    The connection is kept open until the iterator is exhausted or closed. With an `itersize`, the rows are
+    fetched from a server-side cursor, so the first dataframes are yielded before the query is fully read.
+    """
+    import pandas as pd
+    from sqlalchemy import text as sa_text
+    from sqlalchemy.exc import SQLAlchemyError
+
+    sa_query = sa_text(query)
+
+    with engine.connect() as conn:
+        if itersize is not None:
+            conn = conn.execution_options(stream_results=True, max_row_buffer=itersize)
+        try:
+            chunks = pd.read_sql(sa_query, conn, params=params, chunksize=chunksize)
+            for chunk in chunks:
+                yield _clean_sql_df(chunk)
+        except (pd.errors.DatabaseError, SQLAlchemyError) as exc:
+            _raise_database_error(query, exc)
 
 
 def sanitize_query(
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from ast import literal_eval
 from enum import Enum
 from typing import Any, Literal, TypeVar
 
@@ -12,6 +13,22 @@ ClauseType = TypeVar("ClauseType")
 type LogicalOperator = Literal["and", "or"]
 
 
+def as_number(value: Any) -> Any:
+    """Numbers can be given as strings, quoted or not. Other strings, like dates, are kept as is"""
+    if not isinstance(value, str):
+        return value
+    try:
+        value = literal_eval(value) if "'" in value or '"' in value else value
+    except (ValueError, SyntaxError):
+        return value
+    for number_type in (int, float):
+        try:
+            return number_type(value)
+        except (TypeError, ValueError):
+            pass
+    return value
+
+
 class ConditionOperator(Enum):
     EQUAL = "eq"
     NOT_EQUAL = "ne"
@@ -1,11 +1,18 @@
+import bisect
 import contextlib
+import heapq
+import itertools
 import logging
 import threading
 import time
 import types
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 from typing import Optional
 
+from toucan_connectors.metrics import get_metrics
+
 logger = logging.getLogger(__name__)
 
 
@@ -45,6 +52,12 @@ class ConnectionBO:
         # Number of retry to close the connection
         self.remove_try = 0
 
+        # True while the reaper of the connection manager holds an idle deadline for the connection
+        self.reap_scheduled = False
+
+        # Why the connection is closed, reported in the `connection_manager.connections_closed` metric
+        self.close_reason: str | None = None
+
         for k, v in kwargs.items():
             if k in self.__dict__:
                 setattr(self, k, v)
@@ -60,12 +73,9 @@ class ConnectionBO:
         self.t_ready = time.time()
         self.t_get = time.time()
 
-    @contextlib.contextmanager
-    def get_connection(self):
-        self.t_get = time.time()
-        self.status = Status.QUERY_IN_PROGRESS
-        yield self.connection
-        self.status = Status.AVAILABLE
+    def is_expired(self, max_lifetime: float | None) -> bool:
+        """Return True when the connection has been open for more than `max_lifetime` seconds."""
+        return max_lifetime is not None and time.time() - self.t_ready > max_lifetime
 
     def exec_alive(self):
         try:
@@ -96,10 +106,268 @@ class ConnectionBO:
         return self.remove_try >= 3
 
 
+class PoolTimeoutError(TimeoutError):
+    """Raised when all the connections of a pool stay in use for longer than the checkout timeout"""
+
+
+class ConnectionPool:
+    """Connections of a single identifier, each of them used by one thread at a time.
+
+    `checkout` hands out an available connection (the most recently used one), checked
+    with its alive method first if it has been idle for more than `health_check_interval` seconds,
+    or opens a new one while the pool holds less than `max_size` connections.
+    Otherwise, it waits for a connection to be checked in.
+
+    Connection times, checkout waits and closed connections are reported to `get_metrics()` with `labels`,
+    which are removed once the pool is closed and all its connections are closed.
+    """
+
+    def __init__(
+        self,
+        identifier: str,
+        max_size: int,
+        max_lifetime: float | None = None,
+        health_check_interval: float = 0.5,
+        on_idle: Callable[["ConnectionPool", ConnectionBO], None] | None = None,
+        labels: dict[str, str] | None = None,
+    ):
+        self.identifier = identifier
+        self.labels = {"identifier": identifier} if labels is None else labels
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.health_check_interval = health_check_interval
+        # Called when a connection is checked in, e.g. to schedule its idle timeout
+        self.on_idle = on_idle
+        self.condition = threading.Condition()
+
+        # Available connections, the most recently used last
+        self.idle: list[ConnectionBO] = []
+        self.in_use: list[ConnectionBO] = []
+        # Connections which failed to close, and are closed again by `clean`
+        self.closing: list[ConnectionBO] = []
+        # Number of connections being opened
+        self.opening = 0
+
+        # A closed pool closes its connections when they are checked in
+        self.closed = False
+
+    @property
+    def size(self) -> int:
+        return len(self.idle) + len(self.in_use) + self.opening
+
+    def is_empty(self) -> bool:
+        return self.size == 0 and not self.closing
+
+    def _open(self, connect_method, alive_method, close_method) -> ConnectionBO:
+        """Open a connection in a slot reserved by incrementing `opening`, and check it out"""
+        co = ConnectionBO(
+            status=Status.CONNECTION_IN_PROGRESS,
+            connect=connect_method,
+            alive=alive_method,
+            close=close_method,
+        )
+        t_connect = time.monotonic()
+        try:
+            connection = connect_method()
+        except BaseException:
+            with self.condition:
+                self.opening -= 1
+                self.condition.notify()
+            get_metrics().increment("connection_manager.connect_failures", **self.labels)
+            raise
+        get_metrics().observe("connection_manager.connect_seconds", time.monotonic() - t_connect, **self.labels)
+        get_metrics().increment("connection_manager.connections_created", **self.labels)
+        co.update(status=Status.QUERY_IN_PROGRESS, connection=connection)
+        with self.condition:
+            self.opening -= 1
+            self.in_use.append(co)
+        return co
+
+    def _unhealthy_reason(self, co: ConnectionBO) -> str | None:
+        """Return why an available connection cannot be handed out, or None if it can"""
+        if co.is_expired(self.max_lifetime):
+            logger.debug("Close connection - max lifetime reached")
+            return "max_lifetime"
+        if not callable(co.alive) or time.time() - co.t_get <= self.health_check_interval:
+            return None
+        try:
+            is_alive = bool(co.exec_alive())
+        except Exception:
+            is_alive = False
+        if is_alive:
+            return None
+        get_metrics().increment("connection_manager.liveness_check_failures", phase="checkout", **self.labels)
+        return "not_alive"
+
+    def prefill(self, connect_method, alive_method, close_method):
+        """Open a connection if none is available and the pool is not full"""
+        with self.condition:
+            if self.closed or self.idle or self.size >= self.max_size:
+                return
+            self.opening += 1
+        self.checkin(self._open(connect_method, alive_method, close_method))
+
+    def checkout(self, connect_method, alive_method, close_method, timeout: float) -> ConnectionBO:
+        """Return a connection for the exclusive use of the caller, until it is checked in"""
+        t_checkout = time.monotonic()
+        deadline = t_checkout + timeout
+        while True:
+            with self.condition:
+                while not self.idle and self.size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        get_metrics().increment("connection_manager.checkout_timeouts", **self.labels)
+                        raise PoolTimeoutError(
+                            f"No connection of {self.identifier} available after {timeout} seconds "
+                            f"({self.max_size} connections in use)"
+                        )
+                    self.condition.wait(remaining)
+                if not self.idle:
+                    self.opening += 1
+                    co = None
+                else:
+                    co = self.idle.pop()
+                    co.status = Status.QUERY_IN_PROGRESS
+                    self.in_use.append(co)
+
+            if co is None:
+                co = self._open(connect_method, alive_method, close_method)
+            elif (reason := self._unhealthy_reason(co)) is not None:
+                self.discard(co, reason)
+                continue
+            else:
+                co.t_get = time.time()
+            get_metrics().observe(
+                "connection_manager.checkout_wait_seconds", time.monotonic() - t_checkout, **self.labels
+            )
+            return co
+
+    def checkin(self, co: ConnectionBO):
+        """Make a checked out connection available again, or close it if it cannot be reused"""
+        with self.condition:
+            self.in_use.remove(co)
+            reusable = not self.closed and not co.is_expired(self.max_lifetime)
+            if reusable:
+                co.status = Status.AVAILABLE
+                co.t_get = time.time()
+                self.idle.append(co)
+            self.condition.notify()
+        if not reusable:
+            self._close(co, "pool_closed" if self.closed else "max_lifetime")
+        elif self.on_idle is not None:
+            self.on_idle(self, co)
+
+    def discard(self, co: ConnectionBO, reason: str = "discarded"):
+        """Close a checked out connection, which frees its slot"""
+        with self.condition:
+            self.in_use.remove(co)
+            self.condition.notify()
+        self._close(co, reason)
+
+    def _close(self, co: ConnectionBO, reason: str):
+        co.close_reason = reason
+        try:
+            co.exec_close()
+        except Exception as exc:
+            logger.debug(f"Failed to close connection of {self.identifier}: {exc}")
+            get_metrics().increment("connection_manager.close_failures", **self.labels)
+            with self.condition:
+                self.closing.append(co)
+        else:
+            get_metrics().increment("connection_manager.connections_closed", reason=reason, **self.labels)
+        self._remove_metrics_if_disposed()
+
+    def _remove_metrics_if_disposed(self):
+        with self.condition:
+            disposed = self.closed and self.is_empty()
+        if disposed:
+            get_metrics().remove(**self.labels)
+
+    def take_idle(self) -> list[ConnectionBO]:
+        """Check out all the available connections, e.g. to probe them. They must be given back with `release`."""
+        with self.condition:
+            idle, self.idle = self.idle, []
+            self.in_use.extend(idle)
+        return idle
+
+    def release(self, co: ConnectionBO):
+        """Make a connection taken by `take_idle` available again, without counting it as used"""
+        with self.condition:
+            self.in_use.remove(co)
+            released = not self.closed
+            if released:
+                # Keeps the most recently used connections last
+                bisect.insort(self.idle, co, key=lambda co: co.t_get)
+            self.condition.notify()
+        if not released:
+            self._close(co, "pool_closed")
+        elif self.on_idle is not None:
+            self.on_idle(self, co)
+
+    def reap(self, co: ConnectionBO, time_keep_alive: float) -> float | None:
+        """Close `co` if it has been available for more than `time_keep_alive` seconds.
+
+        Returns the time when it should be reaped if it is still available, and None otherwise.
+        """
+        with self.condition:
+            if co not in self.idle:
+                return None
+            if time.time() - co.t_get <= time_keep_alive:
+                return co.t_get + time_keep_alive
+            self.idle.remove(co)
+            self.condition.notify()
+        logger.debug(f"Close connection - unused for more than {time_keep_alive} seconds")
+        self._close(co, "idle_timeout")
+        return None
+
+    def retry_close(self):
+        """Try again to close the connections which failed to close"""
+        with self.condition:
+            closing, self.closing = self.closing, []
+        for co in closing:
+            self._close(co, co.close_reason or "discarded")
+
+    def close(self):
+        """Close the available connections, and the others as soon as they are checked in"""
+        with self.condition:
+            self.closed = True
+            to_close = self.idle + self.closing
+            self.idle, self.closing = [], []
+        for co in to_close:
+            try:
+                co.exec_close()
+            except Exception as exc:
+                logger.warning(f"Failed to close connection of {self.identifier}: {exc}")
+                get_metrics().increment("connection_manager.close_failures", **self.labels)
+            else:
+                get_metrics().increment("connection_manager.connections_closed", reason="pool_closed", **self.labels)
+        self._remove_metrics_if_disposed()
+
+    def stats(self) -> dict[str, int]:
+        """Number of connections by state"""
+        with self.condition:
+            return {
+                "idle": len(self.idle),
+                "in_use": len(self.in_use),
+                "opening": self.opening,
+                "closing": len(self.closing),
+            }
+
+
 class ConnectionManager:
+    """Pools of connections, one per identifier.
+
+    A daemon reaper thread closes the connections unused for `time_keep_alive` seconds, and every
+    `time_between_clean` seconds, probes the available connections with their alive method
+    (in parallel, in `probe_workers` threads) to close the dead or too old ones.
+
+    The pools report their metrics to `get_metrics()` with `manager` and `identifier` labels, and the number
+    of connections of each pool by state is available as the `connection_manager.connections` gauge.
+    """
+
     def __init__(self, **kwargs):
         self.name: str = "connection_manager"
-        self.connection_list: dict[str, ConnectionBO] = {}
+        self.connection_list: dict[str, ConnectionPool] = {}
 
         self.timeout = 5
         self.wait = 0.2
@@ -107,9 +375,16 @@ class ConnectionManager:
         self.time_keep_alive = 600
         self.connection_timeout = 60
 
-        self.clean_active: bool = False
-
-        self.lock: bool = False
+        # Maximum number of connections per identifier
+        self.max_size = 10
+        # In seconds, time to wait for a connection when all the connections of an identifier are in use
+        self.checkout_timeout = 60
+        # In seconds, connections open for longer are closed instead of being reused (None to keep them)
+        self.max_lifetime: float | None = None
+        # In seconds, available connections idle for longer are checked with their alive method before being used
+        self.health_check_interval = 0.5
+        # Number of threads probing the available connections with their alive method
+        self.probe_workers = 8
 
         for k, v in kwargs.items():
             if k in self.__dict__:
@@ -117,112 +392,236 @@ class ConnectionManager:
             else:
                 raise KeyError(k)
 
-    def _remove(self, list_connection_to_remove):
-        for identifier in list_connection_to_remove:
-            try:
-                is_closed = self.connection_list[identifier].exec_close()
-                if is_closed:
-                    del self.connection_list[identifier]
-            except Exception:  # noqa: S112
-                continue
-
-    def _clean(self):
-        logger.debug(f"{self} - Check if connection exists ({len(self.connection_list)} open connections)")
-
-        self.lock = True
+        self.lock = threading.Lock()
+        self._reaper_condition = threading.Condition(self.lock)
+        self._reaper: threading.Thread | None = None
+        self._stopping = False
+        # Heap of (idle deadline, sequence number, pool, connection), at most one per connection
+        self._idle_deadlines: list[tuple[float, int, ConnectionPool, ConnectionBO]] = []
+        self._sequence = itertools.count()
+        self._probe_executor: ThreadPoolExecutor | None = None
+        get_metrics().register_gauges(self._gauges)
+
+    def _schedule_reap(self, pool: ConnectionPool, co: ConnectionBO, deadline: float | None = None):
+        with self._reaper_condition:
+            if co.reap_scheduled:
+                # The connection will be rescheduled according to its last use when its deadline is reached
+                return
+            co.reap_scheduled = True
+            entry = (co.t_get + self.time_keep_alive if deadline is None else deadline, next(self._sequence), pool, co)
+            heapq.heappush(self._idle_deadlines, entry)
+            if self._idle_deadlines[0] is entry:
+                self._reaper_condition.notify()
+
+    def _start_reaper(self):
+        with self.lock:
+            if self._reaper is None or not self._reaper.is_alive():
+                self._stopping = False
+                self._reaper = threading.Thread(target=self._reap, name=f"{self.name}-reaper", daemon=True)
+                self._reaper.start()
+
+    def _reap(self):
+        last_clean = time.time()
+        while True:
+            with self._reaper_condition:
+                while True:
+                    if self._stopping:
+                        return
+                    now = time.time()
+                    next_clean = last_clean + self.time_between_clean
+                    next_wake_up = min(next_clean, self._idle_deadlines[0][0]) if self._idle_deadlines else next_clean
+                    if next_wake_up <= now:
+                        break
+                    self._reaper_condition.wait(next_wake_up - now)
+
+                expired = []
+                while self._idle_deadlines and self._idle_deadlines[0][0] <= now:
+                    _, _, pool, co = heapq.heappop(self._idle_deadlines)
+                    co.reap_scheduled = False
+                    expired.append((pool, co))
 
-        list_connection_to_remove = []
-        identifier: str
-        co: ConnectionBO
-        for identifier, co in list(self.connection_list.items()):
-            tt = time.time()
             try:
-                if co.is_ready():
-                    if not co.exec_alive():
-                        logger.debug("Close connection - connection not alive")
-                        list_connection_to_remove.append(identifier)
-                    elif co.t_get and tt - co.t_get > self.time_keep_alive:
-                        logger.debug(f"Close connection - alive too long ({tt - co.t_get} > {self.time_keep_alive})")
-                        list_connection_to_remove.append(identifier)
-                elif not co.is_ready() and co.t_start and tt - co.t_start > self.connection_timeout:
-                    logger.debug(
-                        f"Close connection - connection too long ({tt - co.t_start} > {self.connection_timeout})"
-                    )
-                    list_connection_to_remove.append(identifier)
+                if next_clean <= now:
+                    self._clean()
+                    last_clean = time.time()
+                for pool, co in expired:
+                    deadline = pool.reap(co, self.time_keep_alive)
+                    if deadline is not None:
+                        self._schedule_reap(pool, co, deadline)
+                if expired:
+                    self._forget_empty_pools()
             except Exception:
-                if co.t_get and tt - co.t_get > self.time_keep_alive:
-                    logger.debug(f"Close connection - alive too long ({tt - co.t_get} > {self.time_keep_alive})")
-                    list_connection_to_remove.append(identifier)
-                continue
+                logger.exception(f"{self} - Failed to clean connections")
 
-        if len(list_connection_to_remove) > 0:
-            self._remove(list_connection_to_remove)
+    def _is_alive(self, co: ConnectionBO) -> bool:
+        try:
+            return bool(co.exec_alive())
+        except Exception:
+            # Connections which cannot be probed are closed when they have been unused for too long
+            return True
 
-        self.lock = False
+    def _clean(self):
+        """Close the connections which failed to close before, and probe the available ones"""
+        logger.debug(f"{self} - Check if connection exists ({len(self.connection_list)} connection pools)")
+
+        with self.lock:
+            pools = list(self.connection_list.values())
+            if self._probe_executor is None:
+                self._probe_executor = ThreadPoolExecutor(
+                    max_workers=self.probe_workers, thread_name_prefix=f"{self.name}-probe"
+                )
+
+        for pool in pools:
+            pool.retry_close()
+
+        idle = [(pool, co) for pool in pools for co in pool.take_idle()]
+        for (pool, co), is_alive in zip(
+            idle, self._probe_executor.map(self._is_alive, [co for _, co in idle]), strict=True
+        ):
+            if not is_alive:
+                logger.debug("Close connection - connection not alive")
+                get_metrics().increment("connection_manager.liveness_check_failures", phase="probe", **pool.labels)
+                pool.discard(co, "not_alive")
+            elif co.is_expired(pool.max_lifetime):
+                logger.debug("Close connection - max lifetime reached")
+                pool.discard(co, "max_lifetime")
+            else:
+                pool.release(co)
+
+        self._forget_empty_pools()
+
+    def _forget_empty_pools(self):
+        with self.lock:
+            for identifier, pool in list(self.connection_list.items()):
+                with pool.condition:
+                    if pool.is_empty():
+                        pool.closed = True
+                        del self.connection_list[identifier]
+                        get_metrics().remove(**pool.labels)
+
+    def _get_pool(self, identifier: str) -> ConnectionPool:
+        with self.lock:
+            pool = self.connection_list.get(identifier)
+            if pool is None:
+                pool = self.connection_list[identifier] = ConnectionPool(
+                    identifier,
+                    max_size=self.max_size,
+                    max_lifetime=self.max_lifetime,
+                    health_check_interval=self.health_check_interval,
+                    on_idle=self._schedule_reap,
+                    labels={"manager": self.name, "identifier": identifier},
+                )
+            return pool
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Number of connections by state, for each identifier"""
+        with self.lock:
+            pools = list(self.connection_list.values())
+        return {pool.identifier: pool.stats() for pool in pools}
+
+    def _gauges(self):
+        for identifier, stats in self.stats().items():
+            for state, value in stats.items():
+                yield (
+                    "connection_manager.connections",
+                    value,
+                    {"manager": self.name, "identifier": identifier, "state": state},
+                )
 
-        self.clean_active = False
-        self._activate_clean()
+    @contextlib.contextmanager
+    def _checkout(self, pool: ConnectionPool, connect_method, alive_method, close_method, reset_method=None):
+        co = pool.checkout(connect_method, alive_method, close_method, timeout=self.checkout_timeout)
+        try:
+            yield co.connection
+        finally:
+            if reset_method is None or self._reset(co, reset_method):
+                pool.checkin(co)
+            else:
+                pool.discard(co, "reset")
 
-    def _activate_clean(self, active: bool | None = False):
-        if len(self.connection_list) > 0 and (not self.clean_active or active):
-            self.clean_active = True
-            t_clean = threading.Timer(self.time_between_clean, self._clean)
-            t_clean.start()
-        else:
-            self.clean_active = False
+    @staticmethod
+    def _reset(co: ConnectionBO, reset_method) -> bool:
+        try:
+            return bool(reset_method(co.connection))
+        except Exception as exc:
+            logger.warning(f"Failed to reset connection: {exc}")
+            return False
 
-    def _create(
-        self,
-        identifier: str | None,
-        connect_method,
-        alive_method,
-        close_method,
-        save: bool = True,
+    @staticmethod
+    @contextlib.contextmanager
+    def _use_once(co: ConnectionBO):
+        try:
+            yield co.connection
+        finally:
+            try:
+                co.exec_close()
+            except Exception as exc:
+                logger.warning(f"Failed to close connection: {exc}")
+
+    def checkout(
+        self, identifier: str, connect_method, alive_method, close_method, save: bool = True, reset_method=None
     ):
-        if isinstance(connect_method, types.FunctionType) or isinstance(connect_method, types.MethodType):
-            cbo = ConnectionBO(
+        """Return a context manager checking a connection of `identifier` out of its pool, and back in on exit.
+
+        A connection is opened right away if none is available. With `save=False`, the connection
+        is not pooled, and is closed on exit. `reset_method` is called with the connection before it is checked
+        back in, to restore the state its session had when it was opened: the connection is closed instead if
+        it returns False or raises.
+        """
+        logger.debug(f"Get element in Dict {identifier}")
+        if not (isinstance(connect_method, types.FunctionType) or isinstance(connect_method, types.MethodType)):
+            raise Exception("Connection is not a method")
+
+        if identifier is None or not save:
+            co = ConnectionBO(
                 status=Status.CONNECTION_IN_PROGRESS,
                 connect=connect_method,
                 alive=alive_method,
                 close=close_method,
             )
-            if save:
-                self.connection_list[identifier] = cbo
+            co.update(status=Status.QUERY_IN_PROGRESS, connection=connect_method())
+            return self._use_once(co)
 
-            self._activate_clean()
-            c = connect_method()
-            if save:
-                self.connection_list[identifier].update(status=Status.AVAILABLE, connection=c)
-            else:
-                cbo.update(status=Status.AVAILABLE, connection=c)
-            return cbo.get_connection()
-        else:
-            raise Exception("Connection is not a method")
+        pool = self._get_pool(identifier)
+        self._start_reaper()
+        pool.prefill(connect_method, alive_method, close_method)
+        return self._checkout(pool, connect_method, alive_method, close_method, reset_method)
 
     def get(self, identifier: str, connect_method, alive_method, close_method, save: bool = True):
-        """Retrieve or create connection if not exist in connection_list"""
-        logger.debug(f"Get element in Dict {identifier}")
-        if (
-            identifier is not None
-            and identifier in self.connection_list
-            and self.connection_list[identifier].is_ready()
-        ):
-            logging.getLogger(__name__).debug("Connection exist")
-            return self.connection_list[identifier].get_connection()
-        else:
-            logger.debug("Connection does not exist, create and save it")
-            return self._create(identifier, connect_method, alive_method, close_method, save)
+        """Retrieve or create a connection of `identifier`, without checking it out.
+
+        The connection stays available in the pool, so it may be used by other threads at the same time.
+        With `save=False`, a new connection is returned, which is not pooled and must be closed by the caller.
+        Use `checkout` to get a connection used by a single thread at a time.
+        """
+        if identifier is None or not save:
+            if not (isinstance(connect_method, types.FunctionType) or isinstance(connect_method, types.MethodType)):
+                raise Exception("Connection is not a method")
+            return connect_method()
+        with self.checkout(identifier, connect_method, alive_method, close_method) as connection:
+            return connection
 
     def force_clean(self):
         """
         Force to remove all connection
         Not use automatically by connection_manager
         """
-        self.lock = True
-        co: ConnectionBO
-        identifier: str
-        for identifier, co in list(self.connection_list.items()):
-            if co.is_ready():
-                co.exec_close()
-            del self.connection_list[identifier]
-        self.lock = False
+        with self.lock:
+            pools = list(self.connection_list.values())
+            self.connection_list.clear()
+        for pool in pools:
+            pool.close()
+
+    def shutdown(self, close_connections: bool = True):
+        """Stop the reaper thread, and close all the connections unless `close_connections` is False"""
+        with self._reaper_condition:
+            self._stopping = True
+            self._reaper_condition.notify()
+            reaper, self._reaper = self._reaper, None
+            probe_executor, self._probe_executor = self._probe_executor, None
+        if reaper is not None and reaper is not threading.current_thread():
+            reaper.join()
+        if probe_executor is not None:
+            probe_executor.shutdown(wait=True)
+        if close_connections:
+            self.force_clean()
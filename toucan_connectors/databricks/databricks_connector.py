@@ -1,9 +1,11 @@
 import logging
-from typing import Annotated
+from typing import Annotated, ClassVar
 
 from pydantic import Field, StringConstraints
 
 from toucan_connectors.common import ClusterStartException, ConnectorStatus, pandas_read_sql
+from toucan_connectors.sql_push_down import SqlPushDownMixin
+from toucan_connectors.sql_rewriter import DatabricksDialect, SqlDialect
 from toucan_connectors.toucan_connector import PlainJsonSecretStr, ToucanConnector, ToucanDataSource
 
 _LOGGER = logging.getLogger(__name__)
@@ -28,7 +30,9 @@ class DatabricksDataSource(ToucanDataSource):
     )
 
 
-class DatabricksConnector(ToucanConnector, data_source_model=DatabricksDataSource):
+class DatabricksConnector(SqlPushDownMixin, ToucanConnector, data_source_model=DatabricksDataSource):
+    _sql_dialect: ClassVar[SqlDialect] = DatabricksDialect()
+
     host: str = Field(
         ...,
         description="The listening address of your databricks cluster",
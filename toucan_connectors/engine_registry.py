@@ -0,0 +1,162 @@
+"""Registry of pooled SQLAlchemy engines.
+
+Opening a connection (TCP, TLS and authentication) often takes longer than running the query.
+`EngineRegistry` keeps an engine per connector configuration and database, whose pool keeps
+connections open between queries:
+
+- connections are checked with a ping before being used, and recycled after `pool_recycle` seconds
+- engines unused for `idle_timeout` seconds are disposed when another engine is requested, which closes
+  their connections
+- at most `max_engines` engines are kept, the least recently used ones are disposed first
+- an engine is replaced when the URL or the connect arguments registered for its key change
+
+Created and disposed engines, opened and invalidated connections are reported to `get_metrics()`, and the
+connections of each pool by state are available as the `engine_registry.connections` gauge. The metrics labelled
+with the key of an engine are removed when it is disposed.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from toucan_connectors.common import create_sqlalchemy_engine
+from toucan_connectors.metrics import get_metrics
+
+if TYPE_CHECKING:  # pragma: no cover
+    import sqlalchemy as sa
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_OPTIONS: dict[str, Any] = {
+    "pool_size": 5,
+    "max_overflow": 5,
+    "pool_timeout": 30,
+    "pool_recycle": 1800,
+    "pool_pre_ping": True,
+    # Reuses the most recently used connections, so that the others are recycled
+    "pool_use_lifo": True,
+}
+
+
+class _RegisteredEngine(NamedTuple):
+    engine: "sa.Engine"
+    url: "sa.URL"
+    connect_args: dict[str, Any] | None
+    last_used: float
+
+
+class EngineRegistry:
+    """Pooled SQLAlchemy engines, by key (e.g. the identifier of a connector and a database)"""
+
+    def __init__(self, max_engines: int = 64, idle_timeout: float = 600, pool_options: dict[str, Any] | None = None):
+        self.max_engines = max_engines
+        self.idle_timeout = idle_timeout
+        self.pool_options = DEFAULT_POOL_OPTIONS if pool_options is None else pool_options
+        self._engines: OrderedDict[Hashable, _RegisteredEngine] = OrderedDict()
+        self._lock = threading.Lock()
+        get_metrics().register_gauges(self._gauges)
+
+    def _create_engine(self, key: Hashable, url: "sa.URL", connect_args: dict[str, Any] | None) -> "sa.Engine":
+        from sqlalchemy import event
+
+        engine = create_sqlalchemy_engine(url, connect_args, pool_options=self.pool_options)
+        labels = {"key": str(key)}
+        event.listen(
+            engine,
+            "connect",
+            lambda *_: get_metrics().increment("engine_registry.connections_created", **labels),
+        )
+        event.listen(
+            engine,
+            "invalidate",
+            lambda *_: get_metrics().increment("engine_registry.connections_invalidated", **labels),
+        )
+        get_metrics().increment("engine_registry.engines_created", **labels)
+        return engine
+
+    def get_engine(self, key: Hashable, url: "sa.URL", connect_args: dict[str, Any] | None = None) -> "sa.Engine":
+        """Returns the engine registered for `key`, or creates it"""
+        now = time.monotonic()
+        with self._lock:
+            to_dispose = self._pop_idle(now)
+            registered = self._engines.pop(key, None)
+            if registered is not None and (registered.url != url or registered.connect_args != connect_args):
+                logger.debug(f"Configuration of engine {key} changed, replacing it")
+                to_dispose.append((key, registered.engine, "config_changed"))
+                registered = None
+            if registered is None:
+                registered = _RegisteredEngine(self._create_engine(key, url, connect_args), url, connect_args, now)
+            self._engines[key] = registered._replace(last_used=now)
+            while len(self._engines) > self.max_engines:
+                lru_key, lru_registered = self._engines.popitem(last=False)
+                to_dispose.append((lru_key, lru_registered.engine, "lru"))
+
+        self._dispose(to_dispose)
+        return registered.engine
+
+    def _pop_idle(self, now: float) -> list[tuple[Hashable, "sa.Engine", str]]:
+        idle_keys = [key for key, registered in self._engines.items() if now - registered.last_used > self.idle_timeout]
+        return [(key, self._engines.pop(key).engine, "idle") for key in idle_keys]
+
+    def _dispose(self, engines: list[tuple[Hashable, "sa.Engine", str]]) -> None:
+        for key, engine, reason in engines:
+            engine.dispose()
+            get_metrics().increment("engine_registry.engines_disposed", reason=reason)
+            with self._lock:
+                # The engine replacing it (if its configuration changed) keeps reporting with the same key
+                if key not in self._engines:
+                    get_metrics().remove(key=str(key))
+
+    def dispose(self, key: Hashable) -> None:
+        """Disposes the engine registered for `key`, if any"""
+        with self._lock:
+            registered = self._engines.pop(key, None)
+        if registered is not None:
+            self._dispose([(key, registered.engine, "explicit")])
+
+    def clear(self) -> None:
+        """Disposes all the engines"""
+        with self._lock:
+            engines = [(key, registered.engine, "cleared") for key, registered in self._engines.items()]
+            self._engines.clear()
+        self._dispose(engines)
+
+    def stats(self) -> dict[Hashable, dict[str, int]]:
+        """Number of connections of each engine's pool by state"""
+        with self._lock:
+            engines = [(key, registered.engine) for key, registered in self._engines.items()]
+        stats = {}
+        for key, engine in engines:
+            pool = engine.pool
+            if hasattr(pool, "checkedout"):
+                stats[key] = {
+                    "checked_in": pool.checkedin(),
+                    "checked_out": pool.checkedout(),
+                    "overflow": max(pool.overflow(), 0),
+                }
+        return stats
+
+    def _gauges(self):
+        for key, stats in self.stats().items():
+            for state, value in stats.items():
+                yield "engine_registry.connections", value, {"key": str(key), "state": state}
+
+    def __len__(self) -> int:
+        return len(self._engines)
+
+
+_engine_registry = EngineRegistry()
+
+
+def get_engine_registry() -> EngineRegistry:
+    """The registry of the engines of Postgres (and Redshift, Denodo), MSSQL and Azure MSSQL connectors"""
+    return _engine_registry
+
+
+def set_engine_registry(registry: EngineRegistry) -> None:
+    """Replaces the registry of `get_engine_registry`, e.g. to change the size of the pools"""
+    global _engine_registry
+    _engine_registry = registry
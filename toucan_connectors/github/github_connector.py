@@ -43,7 +43,7 @@ except ImportError as exc:  # pragma: no cover
     logging.getLogger(__name__).warning(f"Missing dependencies for {__name__}: {exc}")
     CONNECTOR_OK = False
 
-from toucan_connectors.common import ConnectorStatus, get_loop
+from toucan_connectors.common import ConnectorStatus, run_coroutine_sync
 from toucan_connectors.oauth2_connector.oauth2connector import (
     OAuth2Connector,
     OAuth2ConnectorConfig,
@@ -379,7 +379,7 @@ class GithubConnector(ToucanConnector, data_source_model=GithubDataSource):
         unformatted_data = await asyncio.gather(*subtasks)
         return dataset_formatter[dataset]([e for sublist in unformatted_data for e in sublist])
 
-    def _retrieve_data(self, data_source: GithubDataSource) -> "pd.DataFrame":
+    async def _aretrieve_data(self, data_source: GithubDataSource) -> "pd.DataFrame":
         """
 
         :param data_source:  GithubDataSource, the GithubDataSource to query
@@ -394,17 +394,17 @@ class GithubConnector(ToucanConnector, data_source_model=GithubDataSource):
 
         headers = {"Authorization": f"token {access_token}"}
         client = GraphqlClient(BASE_ROUTE, headers)
-        loop = get_loop()
-        return loop.run_until_complete(
-            self._fetch_data(
-                dataset=dataset,
-                organization=organization,
-                client=client,
-                page_limit=data_source.page_limit,
-                names_limit=data_source.entities_limit,
-            )
+        return await self._fetch_data(
+            dataset=dataset,
+            organization=organization,
+            client=client,
+            page_limit=data_source.page_limit,
+            names_limit=data_source.entities_limit,
         )
 
+    def _retrieve_data(self, data_source: GithubDataSource) -> "pd.DataFrame":
+        return run_coroutine_sync(self._aretrieve_data(data_source))
+
     def get_slice(
         self,
         data_source: GithubDataSource,
@@ -421,7 +421,23 @@ class GithubConnector(ToucanConnector, data_source_model=GithubDataSource):
         - limit is the number of pages to retrieve
         Exemple: if offset = 5 and limit = 10 then 10 results are expected from 6th row
         """
-        preview_datasource = GithubDataSource(
+        df = self.get_df(self._get_preview_data_source(data_source), permissions)
+        return self._slice_preview_df(df, offset, limit)
+
+    async def aget_slice(
+        self,
+        data_source: GithubDataSource,
+        permissions: dict | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+        get_row_count: bool | None = False,
+    ) -> DataSlice:
+        df = await self.aget_df(self._get_preview_data_source(data_source), permissions)
+        return self._slice_preview_df(df, offset, limit)
+
+    @staticmethod
+    def _get_preview_data_source(data_source: GithubDataSource) -> GithubDataSource:
+        return GithubDataSource(
             page_limit=1,
             dataset=data_source.dataset,
             domain=f"preview_{data_source.domain}",
@@ -429,7 +445,9 @@ class GithubConnector(ToucanConnector, data_source_model=GithubDataSource):
             organization=data_source.organization,
             entities_limit=3,
         )
-        df = self.get_df(preview_datasource, permissions)
+
+    @staticmethod
+    def _slice_preview_df(df: "pd.DataFrame", offset: int, limit: int | None) -> DataSlice:
         if limit is not None:
             return DataSlice(df[offset : offset + limit], len(df))
         else:
@@ -1,12 +1,12 @@
 import logging
 import re
-from collections.abc import Iterable
+from collections.abc import Iterable, Iterator
 from contextlib import suppress
 from enum import StrEnum
 from functools import cached_property
 from itertools import groupby
 from timeit import default_timer as timer
-from typing import Any, Union
+from typing import TYPE_CHECKING, Any, Union
 
 from pydantic import ConfigDict, Field, create_model
 
@@ -16,6 +16,7 @@ from toucan_connectors.google_credentials import (
     JWTCredentials,
     get_google_oauth2_credentials,
 )
+from toucan_connectors.query_manager import RunningQuery, get_query_manager
 from toucan_connectors.toucan_connector import (
     DiscoverableConnector,
     TableInfo,
@@ -24,6 +25,9 @@ from toucan_connectors.toucan_connector import (
     strlist_to_enum,
 )
 
+if TYPE_CHECKING:  # pragma: no cover
+    import pyarrow as pa
+
 _LOGGER = logging.getLogger(__name__)
 
 try:
@@ -267,14 +271,28 @@ class GoogleBigQueryConnector(ToucanConnector, DiscoverableConnector, data_sourc
         return re.sub(r"'(@__.*?__)'", r"\1", re.sub(r'"(.*?)"', r"`\1`", query))
 
     @staticmethod
-    def _execute_query(client: "bigquery.Client", query: str, parameters: list) -> "pd.DataFrame":
+    def _start_query(
+        client: "bigquery.Client", query: str, parameters: list, running_query: RunningQuery | None
+    ) -> "QueryJob":
+        job = client.query(
+            GoogleBigQueryConnector._clean_query(query),
+            job_config=bigquery.QueryJobConfig(query_parameters=parameters),
+        )
+        if running_query is not None:
+
+            def cancel_job() -> None:
+                job.cancel()
+
+            running_query.set_backend_query(job.job_id, cancel_job)
+        return job
+
+    @staticmethod
+    def _execute_query(
+        client: "bigquery.Client", query: str, parameters: list, running_query: RunningQuery | None = None
+    ) -> "pd.DataFrame":
         try:
             start = timer()
-            query = GoogleBigQueryConnector._clean_query(query)
-            result = client.query(
-                query,
-                job_config=bigquery.QueryJobConfig(query_parameters=parameters),
-            ).result()
+            result = GoogleBigQueryConnector._start_query(client, query, parameters, running_query).result()
             result_iterator = result.to_dataframe_iterable()
             end = timer()
             _LOGGER.info(
@@ -297,6 +315,31 @@ class GoogleBigQueryConnector(ToucanConnector, DiscoverableConnector, data_sourc
             _LOGGER.error(f"Failed to execute request {query} - {e}")
             raise e
 
+    @staticmethod
+    def _execute_arrow_query(
+        client: "bigquery.Client", query: str, parameters: list, running_query: RunningQuery | None = None
+    ) -> "pa.Table":
+        result = GoogleBigQueryConnector._start_query(client, query, parameters, running_query).result()
+        return result.to_arrow()
+
+    @staticmethod
+    def _iter_query_results(
+        client: "bigquery.Client",
+        query: str,
+        parameters: list,
+        page_size: int,
+        running_query: RunningQuery | None = None,
+    ) -> Iterator["pd.DataFrame"]:
+        """Yields the query results page by page, each page holding at most `page_size` rows"""
+        job = GoogleBigQueryConnector._start_query(client, query, parameters, running_query)
+        result = job.result(page_size=page_size)
+        empty = True
+        for df in result.to_dataframe_iterable():
+            empty = False
+            yield _ensure_numeric_columns_dtypes(df, result.schema)  # type:ignore[arg-type]
+        if empty:
+            raise NoDataFoundException("No data found, please check your config again.")
+
     @staticmethod
     def _prepare_query_and_parameters(query: str, parameters: dict[str, object] | None) -> tuple[str, list]:
         """Replace ToucanToco variable definitions by Google Big Query variable
@@ -367,10 +410,41 @@ class GoogleBigQueryConnector(ToucanConnector, DiscoverableConnector, data_sourc
 
         query, parameters = self._prepare_query_and_parameters(data_source.query, data_source.parameters)
         client = self._get_bigquery_client()
-        result = self._execute_query(client, query, parameters)
+        with get_query_manager().track(self.name, query) as running_query:
+            result = self._execute_query(client, query, parameters, running_query)
 
         return result
 
+    def _retrieve_arrow(self, data_source: GoogleBigQueryDataSource) -> "pa.Table":
+        _LOGGER.debug(f"Play request {data_source.query} with parameters {data_source.parameters}")
+
+        query, parameters = self._prepare_query_and_parameters(data_source.query, data_source.parameters)
+        client = self._get_bigquery_client()
+        with get_query_manager().track(self.name, query) as running_query:
+            return self._execute_arrow_query(client, query, parameters, running_query)
+
+    def _arrow_to_df(self, table: "pa.Table") -> "pd.DataFrame":
+        import pyarrow as pa
+
+        # NUMERIC and BIGNUMERIC columns are floats, as with `_ensure_numeric_columns_dtypes`
+        schema = pa.schema(
+            [field.with_type(pa.float64()) if pa.types.is_decimal(field.type) else field for field in table.schema]
+        )
+        # Same nullable dtypes as the ones used by `RowIterator.to_dataframe`
+        types_mapping = {pa.int64(): pd.Int64Dtype(), pa.bool_(): pd.BooleanDtype()}
+        return table.cast(schema).to_pandas(types_mapper=types_mapping.get)
+
+    def _retrieve_batches(self, data_source: GoogleBigQueryDataSource, batch_size: int) -> Iterator["pd.DataFrame"]:
+        _LOGGER.debug(f"Play request {data_source.query} with parameters {data_source.parameters}")
+
+        query, parameters = self._prepare_query_and_parameters(data_source.query, data_source.parameters)
+        client = self._get_bigquery_client()
+        # The query stays tracked, and can be cancelled, until its last page is fetched
+        with get_query_manager().track(self.name, query) as running_query:
+            yield from self._iter_query_results(
+                client, query, parameters, page_size=batch_size, running_query=running_query
+            )
+
     @classmethod
     def _format_db_model(cls, unformatted_db_tree: "pd.DataFrame") -> list[TableInfo]:
         def _format_columns(x: str):
@@ -1,4 +1,5 @@
 import json
+from collections.abc import Iterator
 from enum import StrEnum
 from logging import getLogger
 from typing import TYPE_CHECKING, Any
@@ -33,7 +34,7 @@ from toucan_connectors.common import (
     nosql_apply_parameters_to_query,
     transform_with_jq,
 )
-from toucan_connectors.toucan_connector import ToucanConnector, ToucanDataSource
+from toucan_connectors.toucan_connector import ToucanConnector, ToucanDataSource, iter_df_chunks
 from toucan_connectors.utils.json_to_table import json_to_table
 
 if TYPE_CHECKING:
@@ -149,7 +150,10 @@ class HttpAPIConnector(ToucanConnector, data_source_model=HttpAPIDataSource):
         return data
 
     def perform_requests(self, data_source: HttpAPIDataSource, session: "Session") -> list[Any]:
-        results = []
+        return list(self.iter_requests(data_source, session))
+
+    def iter_requests(self, data_source: HttpAPIDataSource, session: "Session") -> Iterator[Any]:
+        """Performs the (paginated) requests, yielding the parsed result of each page as soon as it is retrieved"""
         # Extract first http_pagination_config from data_source
         pagination_config: PaginationConfig | None = data_source.http_pagination_config or NoopPaginationConfig()
         while pagination_config is not None:
@@ -183,24 +187,26 @@ class HttpAPIConnector(ToucanConnector, data_source_model=HttpAPIDataSource):
             pagination_config = pagination_config.get_next_pagination_config(
                 result=parsed_result, pagination_info=parsed_pagination_info
             )
-            results.append(parsed_result)
-        return results
+            yield parsed_result
 
-    def _retrieve_data(self, data_source: HttpAPIDataSource) -> "pd.DataFrame":
+    def _get_session(self) -> "Session":
         if self.authentication:
             # New authentication has priority
-            session = self.authentication.authenticate_session()
+            return self.authentication.authenticate_session()
         elif self.auth:
-            session = self.auth.get_session()
+            return self.auth.get_session()
         else:
-            session = Session()
+            return Session()
+
+    def _iter_pages(self, data_source: HttpAPIDataSource) -> Iterator["pd.DataFrame"]:
+        session = self._get_session()
         # Try retrieve dataset
         try:
-            results = self.perform_requests(
-                data_source=data_source,
-                session=session,
-            )
-            dfs = [pd.DataFrame(result) for result in results]
+            for result in self.iter_requests(data_source=data_source, session=session):
+                df = pd.DataFrame(result)
+                if data_source.flatten_column:
+                    df = json_to_table(df, columns=[data_source.flatten_column])
+                yield df
         except HTTPError as exc:
             if exc.response.status_code == TOO_MANY_REQUESTS:
                 raise HttpAPIConnectorError(
@@ -210,9 +216,13 @@ class HttpAPIConnector(ToucanConnector, data_source_model=HttpAPIDataSource):
                 ) from exc
             else:
                 raise
-        if data_source.flatten_column:
-            dfs = [json_to_table(df, columns=[data_source.flatten_column]) for df in dfs]
-        return pd.concat(dfs, ignore_index=True)
+
+    def _retrieve_data(self, data_source: HttpAPIDataSource) -> "pd.DataFrame":
+        return pd.concat(self._iter_pages(data_source), ignore_index=True)
+
+    def _retrieve_batches(self, data_source: HttpAPIDataSource, batch_size: int) -> Iterator["pd.DataFrame"]:
+        for page in self._iter_pages(data_source):
+            yield from iter_df_chunks(page, batch_size)
 
     def _render_query(self, data_source):
         query = nosql_apply_parameters_to_query(
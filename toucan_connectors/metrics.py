@@ -0,0 +1,146 @@
+"""Metrics of the connection pools and engine caches.
+
+Components report counters (e.g. `connection_manager.connections_closed`, with a `reason` label) and
+histograms (e.g. `connection_manager.checkout_wait_seconds`) to `get_metrics()`, and register gauge
+providers (e.g. the number of idle connections of each pool), which are read on demand.
+
+`Metrics.snapshot()` returns all the values as a plain dict. To export them to Prometheus, StatsD..., add a
+callback with `Metrics.add_callback`: it is called with the kind of metric ("counter" or "histogram"),
+its name, the value (the increment, or the observed value) and its labels.
+
+The values labelled by the identifier of a pool or the key of an engine are removed with `Metrics.remove` when
+the pool or the engine is disposed, so that their number stays bounded: callbacks have already received them.
+"""
+
+import bisect
+import logging
+import threading
+import weakref
+from collections.abc import Callable, Iterable
+from typing import Literal
+
+logger = logging.getLogger(__name__)
+
+MetricKind = Literal["counter", "histogram"]
+MetricCallback = Callable[[MetricKind, str, float, dict[str, str]], None]
+# Returns (name, value, labels) tuples
+GaugeProvider = Callable[[], Iterable[tuple[str, float, dict[str, str]]]]
+
+# In seconds, suited to durations such as connection times
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_Labels = tuple[tuple[str, str], ...]
+
+
+class Histogram:
+    """Distribution of observed values, counted in cumulative buckets"""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self) -> dict:
+        cumulative_counts, total = {}, 0
+        for bound, count in zip((*self.buckets, float("inf")), self.counts, strict=True):
+            total += count
+            cumulative_counts[str(bound)] = total
+        return {"count": self.count, "sum": self.sum, "buckets": cumulative_counts}
+
+
+class Metrics:
+    """Counters, histograms and gauge providers, by name and labels"""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._counters: dict[tuple[str, _Labels], float] = {}
+        self._histograms: dict[tuple[str, _Labels], Histogram] = {}
+        self._gauge_providers: list[Callable[[], GaugeProvider | None]] = []
+        self._callbacks: list[MetricCallback] = []
+        self._lock = threading.Lock()
+
+    def add_callback(self, callback: MetricCallback) -> None:
+        self._callbacks.append(callback)
+
+    def remove_callback(self, callback: MetricCallback) -> None:
+        self._callbacks.remove(callback)
+
+    def register_gauges(self, provider: GaugeProvider) -> None:
+        """Registers a function returning gauges. Bound methods do not keep their object alive."""
+        ref = weakref.WeakMethod(provider) if hasattr(provider, "__self__") else (lambda: provider)
+        with self._lock:
+            self._gauge_providers.append(ref)
+
+    def _notify(self, kind: MetricKind, name: str, value: float, labels: dict[str, str]) -> None:
+        for callback in self._callbacks:
+            try:
+                callback(kind, name, value, labels)
+            except Exception:
+                logger.exception(f"Metrics callback failed for {name}")
+
+    def increment(self, name: str, value: float = 1, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        self._notify("counter", name, value, labels)
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+        self._notify("histogram", name, value, labels)
+
+    def _read_gauges(self) -> list[tuple[str, float, dict[str, str]]]:
+        with self._lock:
+            providers = [ref() for ref in self._gauge_providers]
+            self._gauge_providers = [
+                ref for ref, provider in zip(self._gauge_providers, providers, strict=True) if provider is not None
+            ]
+        gauges = []
+        for provider in providers:
+            if provider is not None:
+                gauges.extend(provider())
+        return gauges
+
+    def snapshot(self) -> dict[str, dict[str, list[dict]]]:
+        """All the metrics, as {"counters"|"histograms"|"gauges": {name: [{"labels": ..., ...}]}}"""
+        snapshot: dict[str, dict[str, list[dict]]] = {"counters": {}, "histograms": {}, "gauges": {}}
+        with self._lock:
+            for (name, labels), value in self._counters.items():
+                snapshot["counters"].setdefault(name, []).append({"labels": dict(labels), "value": value})
+            for (name, labels), histogram in self._histograms.items():
+                snapshot["histograms"].setdefault(name, []).append({"labels": dict(labels), **histogram.snapshot()})
+        for name, value, labels in self._read_gauges():
+            snapshot["gauges"].setdefault(name, []).append({"labels": labels, "value": value})
+        return snapshot
+
+    def remove(self, **labels: str) -> None:
+        """Removes the counters and histograms having all of `labels`, e.g. those of a disposed pool"""
+        items = labels.items()
+        with self._lock:
+            for metrics in (self._counters, self._histograms):
+                for key in [key for key in metrics if items <= dict(key[1]).items()]:
+                    del metrics[key]
+
+    def reset(self) -> None:
+        """Resets the counters and histograms"""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+_metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    """The metrics reported by `ConnectionManager` and `EngineRegistry`"""
+    return _metrics
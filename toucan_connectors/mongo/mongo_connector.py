@@ -1,6 +1,7 @@
+import asyncio
 import itertools
-from collections.abc import Generator
-from contextlib import contextmanager
+from collections.abc import AsyncGenerator, Generator
+from contextlib import asynccontextmanager, contextmanager
 from functools import _lru_cache_wrapper, cached_property, lru_cache
 from logging import getLogger
 from re import Pattern
@@ -24,6 +25,7 @@ from toucan_connectors.json_wrapper import JsonWrapper
 from toucan_connectors.mongo.mongo_translator import MongoConditionTranslator
 from toucan_connectors.pagination import build_pagination_info
 from toucan_connectors.toucan_connector import (
+    DEFAULT_BATCH_SIZE,
     DataSlice,
     PlainJsonSecretStr,
     ToucanConnector,
@@ -97,7 +99,7 @@ def normalize_query(query, parameters):
     return query
 
 
-def apply_condition_filter(query, permissions_condition: dict):
+def apply_condition_filter(query, permissions_condition: dict | None):
     if permissions_condition:
         permissions = MongoConditionTranslator.translate(permissions_condition)
         if isinstance(query, dict):
@@ -279,6 +281,27 @@ class MongoConnector(ToucanConnector, VersionableEngineConnector, data_source_mo
         data_source.query = apply_condition_filter(data_source.query, permissions)
         return self._retrieve_data(data_source, chunk_size=chunk_size)
 
+    def iter_batches(
+        self, data_source: MongoDataSource, permissions: dict | None = None, batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> Generator["pd.DataFrame"]:
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be a positive integer, got {batch_size}")
+        data_source = data_source.model_copy(deep=True)
+        data_source.query = apply_condition_filter(data_source.query, permissions)
+        data_source.query = normalize_query(data_source.query, data_source.parameters)
+
+        # The client must stay open while the cursor is consumed
+        with self.client() as client:
+            self.validate_database_and_collection(client, data_source.database, data_source.collection)
+            col = client[data_source.database][data_source.collection]
+            cursor = col.aggregate(data_source.query, batchSize=batch_size)  # type: ignore[arg-type]
+            yielded = False
+            while chunk := list(itertools.islice(cursor, batch_size)):
+                yielded = True
+                yield pd.DataFrame.from_records(chunk)
+            if not yielded:
+                yield pd.DataFrame()
+
     @decorate_func_with_retry
     def get_slice(
         self,
@@ -292,42 +315,45 @@ class MongoConnector(ToucanConnector, VersionableEngineConnector, data_source_mo
         # Create a copy in order to keep the original (deepcopy-like)
         data_source = data_source.model_copy(deep=True)
         if offset or limit is not None:
-            data_source.query = apply_condition_filter(data_source.query, permissions or {})
-            data_source.query = normalize_query(data_source.query, data_source.parameters)
+            data_source = self._get_facet_data_source(data_source, permissions, offset, limit)
+            return self._facet_result_to_slice(self._execute_query(data_source).next(), offset, limit)
+        df = self.get_df(data_source, permissions, chunk_size=chunk_size)
+        return self._df_to_slice(df, offset, limit)
 
-            df_facet: list[dict[str, Any]] = []
-            if offset:
-                df_facet.append({"$skip": offset})
-            if limit is not None:
-                df_facet.append({"$limit": limit})
-
-            df_facet.append({"$unset": ["_id"]})
-
-            facet = {
-                "$facet": {
-                    # counting more than 1M values can be really slow, and the exact number is not that much relevant
-                    "count": [
-                        {"$limit": MAX_COUNTED_ROWS},
-                        {"$count": "value"},
-                        {"$unset": ["_id"]},
-                    ],
-                    "df": df_facet,  # df_facet is never empty
-                }
+    @staticmethod
+    def _get_facet_data_source(
+        data_source: MongoDataSource, permissions: dict[str, Any] | None, offset: int, limit: int | None
+    ) -> MongoDataSource:
+        """The data source retrieving the rows of the slice and their total count at once"""
+        data_source.query = apply_condition_filter(data_source.query, permissions or {})
+        data_source.query = normalize_query(data_source.query, data_source.parameters)
+
+        df_facet: list[dict[str, Any]] = []
+        if offset:
+            df_facet.append({"$skip": offset})
+        if limit is not None:
+            df_facet.append({"$limit": limit})
+
+        df_facet.append({"$unset": ["_id"]})
+
+        facet = {
+            "$facet": {
+                # counting more than 1M values can be really slow, and the exact number is not that much relevant
+                "count": [
+                    {"$limit": MAX_COUNTED_ROWS},
+                    {"$count": "value"},
+                    {"$unset": ["_id"]},
+                ],
+                "df": df_facet,  # df_facet is never empty
             }
-            data_source.query.append(facet)  # type:ignore[union-attr]
+        }
+        data_source.query.append(facet)  # type:ignore[union-attr]
+        return data_source
 
-            res = self._execute_query(data_source).next()
-            total_count = res["count"][0]["value"] if len(res["count"]) > 0 else 0
-            df = pd.DataFrame(res["df"])
-        else:
-            df = self.get_df(data_source, permissions, chunk_size=chunk_size)
-            total_count = len(df)
-            # We try to remove the _id from this DataFrame if there is one
-            # ugly for now but we need to handle that in this else case
-            try:
-                df.pop("_id")
-            except Exception:  # noqa: S110
-                pass
+    @staticmethod
+    def _facet_result_to_slice(res: dict[str, Any], offset: int, limit: int | None) -> DataSlice:
+        total_count = res["count"][0]["value"] if len(res["count"]) > 0 else 0
+        df = pd.DataFrame(res["df"])
         return DataSlice(
             df,
             pagination_info=build_pagination_info(
@@ -335,6 +361,82 @@ class MongoConnector(ToucanConnector, VersionableEngineConnector, data_source_mo
             ),
         )
 
+    @staticmethod
+    def _df_to_slice(df: "pd.DataFrame", offset: int, limit: int | None) -> DataSlice:
+        total_count = len(df)
+        # We try to remove the _id from this DataFrame if there is one
+        # ugly for now but we need to handle that in this else case
+        try:
+            df.pop("_id")
+        except Exception:  # noqa: S110
+            pass
+        return DataSlice(
+            df,
+            pagination_info=build_pagination_info(
+                offset=offset, limit=limit, retrieved_rows=len(df), total_rows=total_count
+            ),
+        )
+
+    @classmethod
+    def _has_native_async_support(cls) -> bool:
+        # pymongo's asyncio API was added in pymongo 4.10
+        return hasattr(pymongo, "AsyncMongoClient")
+
+    @asynccontextmanager
+    async def async_client(
+        self, client_args: dict[str, Any] | None = None
+    ) -> AsyncGenerator["pymongo.AsyncMongoClient"]:
+        client: pymongo.AsyncMongoClient = pymongo.AsyncMongoClient(
+            **(self._get_mongo_client_kwargs() if client_args is None else client_args)
+        )
+        try:
+            yield client
+        finally:
+            await client.close()
+
+    async def _aexecute_query(self, data_source: MongoDataSource) -> list[dict[str, Any]]:
+        async with self.async_client() as client:
+            database_names, collection_names = await asyncio.gather(
+                client.list_database_names(), client[data_source.database].list_collection_names()
+            )
+            if data_source.database not in database_names:
+                raise UnkwownMongoDatabase(f"Database {data_source.database!r} doesn't exist")
+            if data_source.collection not in collection_names:
+                raise UnkwownMongoCollection(f"Collection {data_source.collection!r} doesn't exist")
+            col = client[data_source.database][data_source.collection]
+            cursor = await col.aggregate(data_source.query)  # type: ignore[arg-type]
+            return await cursor.to_list()
+
+    async def _aretrieve_data(self, data_source: MongoDataSource) -> "pd.DataFrame":
+        data_source = data_source.model_copy(deep=True)
+        data_source.query = normalize_query(data_source.query, data_source.parameters)
+        return pd.DataFrame.from_records(await self._aexecute_query(data_source))
+
+    @decorate_func_with_retry
+    async def _aget_df_natively(self, data_source: MongoDataSource, permissions: dict | None = None) -> "pd.DataFrame":
+        data_source = data_source.model_copy(deep=True)
+        data_source.query = apply_condition_filter(data_source.query, permissions)
+        return await self._aretrieve_data(data_source)
+
+    async def aget_slice(
+        self,
+        data_source: MongoDataSource,
+        permissions: dict[str, Any] | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+        get_row_count: bool | None = False,
+    ) -> DataSlice:
+        if not self._has_native_async_support():
+            return await super().aget_slice(
+                data_source, permissions=permissions, offset=offset, limit=limit, get_row_count=get_row_count
+            )
+        data_source = data_source.model_copy(deep=True)
+        if offset or limit is not None:
+            data_source = self._get_facet_data_source(data_source, permissions, offset, limit)
+            results = await self._aexecute_query(data_source)
+            return self._facet_result_to_slice(results[0], offset, limit)
+        return self._df_to_slice(await self.aget_df(data_source, permissions), offset, limit)
+
     def get_slice_with_regex(
         self,
         data_source: MongoDataSource,
@@ -1,5 +1,6 @@
+from collections.abc import Iterator
 from logging import getLogger
-from typing import TYPE_CHECKING, Annotated
+from typing import TYPE_CHECKING, Annotated, Any, ClassVar
 
 from pydantic import Field, StringConstraints, create_model, model_validator
 
@@ -15,10 +16,14 @@ except ImportError as exc:  # pragma: no cover
 from toucan_connectors.common import (
     convert_jinja_params_to_sqlalchemy_named,
     create_sqlalchemy_engine,
+    pandas_iter_sqlalchemy_query,
     pandas_read_sqlalchemy_query,
     pyformat_params_to_jinja,
     unnest_sql_jinja_parameters,
 )
+from toucan_connectors.engine_registry import get_engine_registry
+from toucan_connectors.sql_push_down import SqlPushDownMixin
+from toucan_connectors.sql_rewriter import MSSQLDialect, SqlDialect
 from toucan_connectors.toucan_connector import (
     PlainJsonSecretStr,
     ToucanConnector,
@@ -99,11 +104,13 @@ class MSSQLDataSource(ToucanDataSource):
         return create_model("FormSchema", **constraints, __base__=cls).schema()  # type:ignore[call-overload]
 
 
-class MSSQLConnector(ToucanConnector, data_source_model=MSSQLDataSource):
+class MSSQLConnector(SqlPushDownMixin, ToucanConnector, data_source_model=MSSQLDataSource):
     """
     Import data from Microsoft SQL Server.
     """
 
+    _sql_dialect: ClassVar[SqlDialect] = MSSQLDialect()
+
     host: str = Field(
         ...,
         description="The domain name (preferred option as more dynamic) or "
@@ -127,8 +134,14 @@ class MSSQLConnector(ToucanConnector, data_source_model=MSSQLDataSource):
     )
 
     def _create_engine(self, database: str | None, connect_timeout: int | None = None) -> "sa.Engine":
+        """Pooled engine of the registry, shared by the connectors with the same configuration.
+
+        With a specific `connect_timeout`, the engine is not pooled.
+        """
         from sqlalchemy.engine import URL
 
+        pooled = connect_timeout is None
+
         server = self.host
         if server == "localhost":
             server = "127.0.0.1"  # localhost is not understood by pyodbc
@@ -155,11 +168,12 @@ class MSSQLConnector(ToucanConnector, data_source_model=MSSQLDataSource):
             database=database,
             query=query_params,
         )
+        if pooled:
+            return get_engine_registry().get_engine((self.get_identifier(), database), connection_url, connect_args)
         return create_sqlalchemy_engine(connection_url, connect_args=connect_args)
 
-    def _retrieve_data(self, datasource: MSSQLDataSource) -> "pd.DataFrame":
-        sa_engine = self._create_engine(database=datasource.database)
-
+    @staticmethod
+    def _prepare_query(datasource: MSSQLDataSource) -> tuple[str, dict[str, Any]]:
         # This should not happen as it is checked by the data sources' model validator
         if datasource.query is None:
             raise ValueError("'query' or 'table' must be set")
@@ -167,8 +181,19 @@ class MSSQLConnector(ToucanConnector, data_source_model=MSSQLDataSource):
         # %()s -> {{}}
         jinja_query = pyformat_params_to_jinja(datasource.query)
         flattened_query, flattened_params = unnest_sql_jinja_parameters(jinja_query, datasource.parameters or {})
-        final_query = convert_jinja_params_to_sqlalchemy_named(flattened_query)
+        return convert_jinja_params_to_sqlalchemy_named(flattened_query), flattened_params
 
-        df = pandas_read_sqlalchemy_query(query=final_query, engine=sa_engine, params=flattened_params)
+    def _retrieve_data(self, datasource: MSSQLDataSource) -> "pd.DataFrame":
+        sa_engine = self._create_engine(database=datasource.database)
+        final_query, params = self._prepare_query(datasource)
+
+        df = pandas_read_sqlalchemy_query(query=final_query, engine=sa_engine, params=params)
 
         return df
+
+    def _retrieve_batches(self, datasource: MSSQLDataSource, batch_size: int) -> Iterator["pd.DataFrame"]:
+        sa_engine = self._create_engine(database=datasource.database)
+        final_query, params = self._prepare_query(datasource)
+        yield from pandas_iter_sqlalchemy_query(
+            query=final_query, engine=sa_engine, params=params, chunksize=batch_size
+        )
@@ -1,10 +1,11 @@
 import logging
 import os
 from collections.abc import Generator
+from contextlib import suppress
 from enum import StrEnum
 from itertools import groupby as groupby
 from tempfile import NamedTemporaryFile
-from typing import Annotated, Any
+from typing import Annotated, Any, ClassVar
 
 from cached_property import cached_property_with_ttl
 from pydantic import ConfigDict, Field, StringConstraints, create_model, model_validator
@@ -12,10 +13,13 @@ from pydantic import ConfigDict, Field, StringConstraints, create_model, model_v
 from toucan_connectors.common import (
     ConnectorStatus,
     convert_to_printf_templating_style,
+    pandas_iter_sql,
     pandas_read_sql,
     pyformat_params_to_jinja,
     unnest_sql_jinja_parameters,
 )
+from toucan_connectors.sql_push_down import SqlPushDownMixin
+from toucan_connectors.sql_rewriter import MySQLDialect, SqlDialect
 from toucan_connectors.toucan_connector import (
     DiscoverableConnector,
     PlainJsonSecretStr,
@@ -53,8 +57,33 @@ except Exception as exc:
 def handle_date_0(df: "pd.DataFrame") -> "pd.DataFrame":
     # Mysql driver doesnt translate date '0000-00-00 00:00:00'
     # to a datetime, so the Series has a 'object' dtype instead of 'datetime'.
-    # This util fixes this behaviour, by replacing it with NaT.
-    return df.replace({"0000-00-00 00:00:00": pd.NaT}).infer_objects()  # type:ignore[arg-type]
+    # This util fixes this behaviour, by replacing it with NaT, in the object columns containing it only.
+    for colname in df.select_dtypes([object]).columns:
+        if df[colname].eq("0000-00-00 00:00:00").any():
+            df[colname] = df[colname].replace({"0000-00-00 00:00:00": pd.NaT})  # type:ignore[dict-item]
+    return df.infer_objects()
+
+
+def _cast_to_first_dtypes(df: "pd.DataFrame", first_dtypes: dict[int, Any]) -> "pd.DataFrame":
+    """Casts the columns of a chunk to the dtypes they had in the first chunk where they were not all null,
+    and records the dtypes of the columns seen for the first time.
+
+    Without it, the dtypes inferred from the values of each chunk could differ between chunks.
+    Columns which cannot be cast (e.g. integers with nulls) are left as is.
+    """
+    for idx, dtype in enumerate(df.dtypes):
+        first_dtype = first_dtypes.get(idx)
+        if first_dtype is None:
+            if df.iloc[:, idx].notna().any():
+                first_dtypes[idx] = dtype
+        elif dtype != first_dtype:
+            with suppress(TypeError, ValueError):
+                df.isetitem(idx, df.iloc[:, idx].astype(first_dtype).array)
+    return df
+
+
+def _decode_bytes(value: Any) -> Any:
+    return value.decode("utf8") if isinstance(value, bytes) else value
 
 
 class NoQuerySpecified(Exception):
@@ -145,6 +174,7 @@ def prepare_query_and_params_for_pymysql(query: str, params: dict[str, Any]) ->
 
 
 class MySQLConnector(
+    SqlPushDownMixin,
     ToucanConnector,
     DiscoverableConnector,
     VersionableEngineConnector,
@@ -154,6 +184,8 @@ class MySQLConnector(
     Import data from MySQL database.
     """
 
+    _sql_dialect: ClassVar[SqlDialect] = MySQLDialect()
+
     host: str = Field(
         ...,
         description="The domain name (preferred option as more dynamic) or "
@@ -201,6 +233,18 @@ class MySQLConnector(
         description="SSL Mode to use to connect to the MySQL server. "
         "Equivalent of the --ssl-mode option of the MySQL client. Must be set in order to use SSL",
     )
+    server_side_cursors: bool = Field(
+        False,
+        title="Use server-side cursors",
+        description="Stream the results of queries from the server, a few rows at a time, instead of "
+        "buffering them entirely before converting them.",
+    )
+    itersize: int = Field(
+        10000,
+        ge=1,
+        title="Rows fetched at a time",
+        description="Number of rows fetched and converted at a time with server-side cursors",
+    )
     model_config = ConfigDict(ignored_types=(cached_property_with_ttl,))
 
     @model_validator(mode="after")
@@ -370,31 +414,20 @@ class MySQLConnector(
         """
         Used to change bytes columns to string columns
         (can be moved to be applied for all connectors if needed)
-        It retrieves all the string columns and converts them all together.
-        The string columns become nan columns so we remove them from the result,
-        we keep the rest and insert it back to the dataframe
+        The driver returns the values of a column with the same type, so only the object columns
+        whose first non-null value is bytes are decoded, one at a time.
         """
-        str_df = df.select_dtypes([object])
-        if str_df.empty:
-            return df
-
-        str_df = str_df.stack().str.decode("utf8").unstack().dropna(axis=1, how="all")
-        for col in str_df.columns:
-            df[col] = str_df[col]
+        for colname in df.select_dtypes([object]).columns:
+            column = df[colname]
+            idx = column.first_valid_index()
+            if idx is not None and isinstance(column.loc[idx], bytes):
+                df[colname] = column.map(_decode_bytes)
         return df
 
-    def _retrieve_data(self, datasource):
-        """
-        Transform a table into a DataFrame and recursively merge tables
-        with a foreign key.
-        Returns: DataFrames from config['table'].
-        """
-
+    def _prepare_query(self, datasource: MySQLDataSource) -> tuple[str, Any]:
         if not datasource.query or not datasource.query.strip():
             raise NoQuerySpecified
 
-        connection = self._connect(database=datasource.database)
-
         query_params = datasource.parameters or {}
         query = datasource.query
 
@@ -403,17 +436,47 @@ class MySQLConnector(
 
         # As long as frontend builds queries with '"' we need to replace them
         backticked_query = prepared_query.replace('"', "`")
-        MySQLConnector.logger.debug(
+        _LOGGER.debug(
             f"Executing query : {query} with params {query_params}. "
             f"Prepared query: {prepared_query}. Prepared params: {prepared_params}"
         )
+        return backticked_query, prepared_params
 
-        df = pandas_read_sql(backticked_query, con=connection, params=prepared_params)
+    def _retrieve_data(self, datasource):
+        """
+        Transform a table into a DataFrame and recursively merge tables
+        with a foreign key.
+        Returns: DataFrames from config['table'].
+        """
+        if self.server_side_cursors:
+            # Each chunk is converted as soon as it is fetched
+            return pd.concat(self._retrieve_batches(datasource, self.itersize), ignore_index=True)
+
+        query, params = self._prepare_query(datasource)
+        connection = self._connect(database=datasource.database)
+
+        df = pandas_read_sql(query, con=connection, params=params)
         df = self.decode_df(df)
         df = handle_date_0(df)
         connection.close()
         return df
 
+    def _retrieve_batches(self, datasource: MySQLDataSource, batch_size: int) -> Generator["pd.DataFrame"]:
+        query, params = self._prepare_query(datasource)
+        # The results are always streamed: without a server-side cursor, pymysql reads the whole result
+        # when the query is executed
+        connection = self._connect(database=datasource.database, cursorclass=pymysql.cursors.SSCursor)
+        first_dtypes: dict[int, Any] = {}
+        try:
+            for chunk in pandas_iter_sql(query, con=connection, chunksize=batch_size, params=params):
+                yield _cast_to_first_dtypes(handle_date_0(self.decode_df(chunk)), first_dtypes)
+        finally:
+            # Closing the connection does not read the rest of the result, as closing the cursor would
+            connection.close()
+
+    def _can_slice_batches(self) -> bool:
+        return self.server_side_cursors
+
     def get_engine_version(self) -> tuple:
         """
         We try to get the MySQL version by running a query with our connection
@@ -13,6 +13,7 @@ except ImportError as exc:  # pragma: no cover
     CONNECTOR_OK = False
 
 from toucan_connectors.common import pandas_read_sql
+from toucan_connectors.sql_push_down import SqlPushDownMixin
 from toucan_connectors.toucan_connector import ToucanConnector, ToucanDataSource
 
 
@@ -22,7 +23,7 @@ class OdbcDataSource(ToucanDataSource):
     )
 
 
-class OdbcConnector(ToucanConnector, data_source_model=OdbcDataSource):
+class OdbcConnector(SqlPushDownMixin, ToucanConnector, data_source_model=OdbcDataSource):
     """
     Import data through ODBC apis
     """
@@ -31,6 +32,11 @@ class OdbcConnector(ToucanConnector, data_source_model=OdbcDataSource):
     autocommit: bool = False
     ansi: bool = False
     connect_timeout: int = None
+    push_down_queries: bool = Field(
+        False,
+        description="Apply the permissions, and the offset and the limit of previews in the query, "
+        'if the database supports the LIMIT ... OFFSET ... syntax and "double-quoted" identifiers',
+    )
 
     def get_connection_params(self):
         con_params = {
@@ -41,6 +47,13 @@ class OdbcConnector(ToucanConnector, data_source_model=OdbcDataSource):
         # remove None values
         return {k: v for k, v in con_params.items() if v is not None}
 
+    # The syntax depends on the database behind the driver
+    def _can_push_down_pagination(self, query: str) -> bool:
+        return self.push_down_queries and super()._can_push_down_pagination(query)
+
+    def _can_push_down_permissions(self, query: str) -> bool:
+        return self.push_down_queries and super()._can_push_down_permissions(query)
+
     def _retrieve_data(self, datasource: OdbcDataSource) -> "pd.DataFrame":
         connection = pyodbc.connect(self.connection_string, **self.get_connection_params())
         df = pandas_read_sql(datasource.query, con=connection, params=datasource.parameters, convert_to_qmark=True)
@@ -1,6 +1,7 @@
+from collections.abc import Iterator
 from contextlib import suppress
 from logging import getLogger
-from typing import Annotated
+from typing import TYPE_CHECKING, Annotated, ClassVar
 
 from pydantic import Field, StringConstraints, create_model
 
@@ -14,7 +15,16 @@ except ImportError as exc:  # pragma: no cover
     CONNECTOR_OK = False
 
 
-from toucan_connectors.common import pandas_read_sql
+from toucan_connectors.common import (
+    convert_to_numeric_paramstyle,
+    convert_to_printf_templating_style,
+    infer_datetime_dtype,
+    pandas_iter_sql,
+    pandas_read_sql,
+    rename_duplicate_columns,
+)
+from toucan_connectors.sql_push_down import SqlPushDownMixin
+from toucan_connectors.sql_rewriter import OracleDialect, SqlDialect
 from toucan_connectors.toucan_connector import (
     PlainJsonSecretStr,
     ToucanConnector,
@@ -22,6 +32,9 @@ from toucan_connectors.toucan_connector import (
     strlist_to_enum,
 )
 
+if TYPE_CHECKING:  # pragma: no cover
+    import pyarrow as pa
+
 
 class OracleSQLDataSource(ToucanDataSource):
     query: Annotated[str | None, StringConstraints(min_length=1)] = Field(  # type:ignore[call-overload]
@@ -64,7 +77,9 @@ class OracleSQLDataSource(ToucanDataSource):
         return create_model("FormSchema", **constraints, __base__=cls).model_json_schema()  # type:ignore[call-overload]
 
 
-class OracleSQLConnector(ToucanConnector, data_source_model=OracleSQLDataSource):
+class OracleSQLConnector(SqlPushDownMixin, ToucanConnector, data_source_model=OracleSQLDataSource):
+    _sql_dialect: ClassVar[SqlDialect] = OracleDialect()
+
     dsn: str = Field(
         ...,
         description="A path following the "
@@ -87,12 +102,17 @@ class OracleSQLConnector(ToucanConnector, data_source_model=OracleSQLDataSource)
         }
         return {k: v for k, v in con_params.items() if v is not None}
 
+    @staticmethod
+    def _prepare_query(data_source: OracleSQLDataSource) -> tuple[str, dict]:
+        """The query without its trailing semicolon, and its parameters"""
+        assert data_source.query is not None, "Query cannot be None"
+        query = data_source.query[:-1] if data_source.query.endswith(";") else data_source.query
+        return query, data_source.parameters or {}
+
     def _retrieve_data(self, data_source: OracleSQLDataSource) -> "pd.DataFrame":
         connection = oracledb.connect(**self.get_connection_params())
 
-        assert data_source.query is not None, "Query cannot be None"
-        query = data_source.query[:-1] if data_source.query.endswith(";") else data_source.query
-        query_params = data_source.parameters or {}
+        query, query_params = self._prepare_query(data_source)
         df = pandas_read_sql(
             query,
             con=connection,
@@ -104,3 +124,41 @@ class OracleSQLConnector(ToucanConnector, data_source_model=OracleSQLDataSource)
         connection.close()
 
         return df
+
+    def _retrieve_batches(self, data_source: OracleSQLDataSource, batch_size: int) -> Iterator["pd.DataFrame"]:
+        connection = oracledb.connect(**self.get_connection_params())
+
+        query, query_params = self._prepare_query(data_source)
+        try:
+            yield from pandas_iter_sql(
+                query,
+                con=connection,
+                chunksize=batch_size,
+                params=query_params,
+                convert_to_numeric=True,
+                convert_to_printf=True,
+            )
+        finally:
+            connection.close()
+
+    def _retrieve_arrow(self, data_source: OracleSQLDataSource) -> "pa.Table":
+        import pyarrow as pa
+
+        query, query_params = self._prepare_query(data_source)
+        query, params = convert_to_numeric_paramstyle(convert_to_printf_templating_style(query), query_params)
+        connection = oracledb.connect(**self.get_connection_params())
+        try:
+            # The results are fetched in the Arrow format by the driver, without python objects
+            table = pa.table(connection.fetch_df_all(query, list(params)))
+        finally:
+            connection.close()
+        # Same column names as `pandas_read_sql`
+        columns = pd.DataFrame(columns=table.column_names)
+        rename_duplicate_columns(columns)
+        return table.rename_columns([str(column) for column in columns.columns])
+
+    def _arrow_to_df(self, table: "pa.Table") -> "pd.DataFrame":
+        df = table.to_pandas()
+        # Same dtypes as `pandas_read_sql`, e.g. for DATE columns
+        infer_datetime_dtype(df)
+        return df
@@ -1,9 +1,16 @@
 # ruff: noqa: N802
+import json
+import re
 from ast import literal_eval
 from collections.abc import Callable
-from functools import wraps
+from functools import lru_cache, wraps
+from typing import TYPE_CHECKING, Any
 
-from toucan_connectors.condition_translator import ConditionTranslator, Number
+from toucan_connectors.common import nosql_apply_parameters_to_query
+from toucan_connectors.condition_translator import ConditionTranslator, LogicalOperator, Number, as_number
+
+if TYPE_CHECKING:  # pragma: no cover
+    import pandas as pd
 
 type FnTakingNumber = Callable[[type["PandasConditionTranslator"], str, Number], str]
 
@@ -78,3 +85,119 @@ class PandasConditionTranslator(ConditionTranslator):
     @classmethod
     def NOT_IN(cls, column: str, value: str | Number | list[str | Number]) -> str:
         return f"{column} not in {value}"
+
+
+type PandasMask = Callable[["pd.DataFrame"], "pd.Series"]
+
+
+class PandasMaskTranslator(ConditionTranslator):
+    """
+    Utility class to compile a condition object into a function computing a boolean mask
+
+    The mask of a dataframe selects the rows matching the condition. Unlike `pandas.query`
+    strings, the function is vectorized and nothing has to be parsed when it is applied.
+    Values must already be rendered with the parameters of the data source.
+    """
+
+    @classmethod
+    def join_clauses(cls, clauses: list[PandasMask], logical_operator: LogicalOperator) -> PandasMask:
+        if logical_operator == "and":
+
+            def mask(df: "pd.DataFrame") -> "pd.Series":
+                result = _constant_mask(df, True)
+                for clause in clauses:
+                    result &= clause(df)
+                return result
+
+        else:
+
+            def mask(df: "pd.DataFrame") -> "pd.Series":
+                result = _constant_mask(df, False)
+                for clause in clauses:
+                    result |= clause(df)
+                return result
+
+        return mask
+
+    @classmethod
+    def EQUAL(cls, column: str, value: str | Number) -> PandasMask:
+        return lambda df: df[column] == value
+
+    @classmethod
+    def NOT_EQUAL(cls, column: str, value: str | Number) -> PandasMask:
+        return lambda df: df[column] != value
+
+    @classmethod
+    def LOWER_THAN(cls, column: str, value: Number) -> PandasMask:
+        value = as_number(value)
+        return lambda df: df[column] < value
+
+    @classmethod
+    def LOWER_THAN_EQUAL(cls, column: str, value: Number) -> PandasMask:
+        value = as_number(value)
+        return lambda df: df[column] <= value
+
+    @classmethod
+    def GREATER_THAN(cls, column: str, value: Number) -> PandasMask:
+        value = as_number(value)
+        return lambda df: df[column] > value
+
+    @classmethod
+    def GREATER_THAN_EQUAL(cls, column: str, value: Number) -> PandasMask:
+        value = as_number(value)
+        return lambda df: df[column] >= value
+
+    @classmethod
+    def IN(cls, column: str, value: str | Number | list[str | Number]) -> PandasMask:
+        values = value if isinstance(value, list) else [value]
+        return lambda df: df[column].isin(values)
+
+    @classmethod
+    def NOT_IN(cls, column: str, value: str | Number | list[str | Number]) -> PandasMask:
+        values = value if isinstance(value, list) else [value]
+        return lambda df: ~df[column].isin(values)
+
+    @classmethod
+    def MATCHES(cls, column: str, value: str) -> PandasMask:
+        pattern = re.compile(str(value))
+        return lambda df: df[column].astype("string").str.contains(pattern, na=False).astype(bool)
+
+    @classmethod
+    def NOT_MATCHES(cls, column: str, value: str) -> PandasMask:
+        pattern = re.compile(str(value))
+        return lambda df: ~df[column].astype("string").str.contains(pattern, na=False).astype(bool)
+
+    @classmethod
+    def IS_NULL(cls, column: str, value=None) -> PandasMask:
+        return lambda df: df[column].isna()
+
+    @classmethod
+    def IS_NOT_NULL(cls, column: str, value=None) -> PandasMask:
+        return lambda df: df[column].notna()
+
+
+def _constant_mask(df: "pd.DataFrame", value: bool) -> "pd.Series":
+    import pandas as pd
+
+    return pd.Series(value, index=df.index, dtype=bool)
+
+
+@lru_cache(maxsize=256)
+def _compile_serialized_condition(serialized_condition: str) -> PandasMask:
+    return PandasMaskTranslator.translate(json.loads(serialized_condition))
+
+
+def compile_permissions_mask(permissions: dict, parameters: dict | None = None) -> PandasMask:
+    """
+    Compiles the permissions, rendered with `parameters`, into a boolean mask function
+
+    Compiled functions are cached by rendered permissions, as the same permissions
+    are applied to every request of a user.
+    """
+    condition: Any = nosql_apply_parameters_to_query(permissions, parameters)
+    try:
+        serialized_condition = json.dumps(condition, sort_keys=True)
+    except TypeError:
+        # Values that cannot be serialized (e.g. dates) are not cached
+        return PandasMaskTranslator.translate(condition)
+    return _compile_serialized_condition(serialized_condition)
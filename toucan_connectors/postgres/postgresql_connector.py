@@ -1,17 +1,33 @@
+from collections.abc import Callable, Iterator
+from functools import partial
 from logging import getLogger
-from typing import TYPE_CHECKING, Annotated, Any
+from typing import TYPE_CHECKING, Annotated, Any, cast
 
 from pydantic import Field, StringConstraints, create_model
 
 from toucan_connectors.common import (
     ConnectorStatus,
+    arrow_table_to_df,
     convert_jinja_params_to_sqlalchemy_named,
+    create_async_sqlalchemy_engine,
     create_sqlalchemy_engine,
+    pandas_iter_sqlalchemy_query,
     pandas_read_sqlalchemy_query,
+    pandas_read_sqlalchemy_query_async,
     pyformat_params_to_jinja,
+    rename_duplicate_columns,
     unnest_sql_jinja_parameters,
 )
-from toucan_connectors.postgres.utils import build_database_model_extraction_query, types
+from toucan_connectors.engine_registry import get_engine_registry
+from toucan_connectors.postgres.utils import (
+    CopyConversionError,
+    PreparedStatementCache,
+    build_database_model_extraction_query,
+    read_copy_table,
+    types,
+)
+from toucan_connectors.query_manager import RunningQuery, get_query_manager
+from toucan_connectors.sql_push_down import SqlPushDownMixin
 from toucan_connectors.toucan_connector import (
     DiscoverableConnector,
     PlainJsonSecretStr,
@@ -27,6 +43,8 @@ _LOGGER = getLogger(__name__)
 
 try:
     import pandas as pd
+    from psycopg.pq import TransactionStatus
+    from sqlalchemy import event
     from sqlalchemy import text as sa_text
     from sqlalchemy.engine import URL
     from sqlalchemy.exc import OperationalError
@@ -38,11 +56,82 @@ except ImportError as exc:  # pragma: no cover
     CONNECTOR_OK = False
 
 if TYPE_CHECKING:
+    import psycopg
     import sqlalchemy as sa
+    from sqlalchemy.ext.asyncio import AsyncEngine
 
 DEFAULT_DATABASE = "postgres"
 
 
+def _register_cancel(running_query: RunningQuery, conn: "sa.Connection") -> None:
+    """Registers how to cancel the query run by `conn`: with a cancel request of the protocol, sent on a dedicated
+    connection, so that it does not wait for a connection of the (possibly exhausted) pool"""
+    dbapi_connection = cast("psycopg.Connection", conn.connection.dbapi_connection)
+    running_query.set_backend_query(str(dbapi_connection.info.backend_pid), dbapi_connection.cancel_safe)
+
+
+def _register_async_cancel(running_query: RunningQuery, conn: "sa.Connection") -> None:
+    """Same as `_register_cancel`, for the connections of async engines: their cancel request is sent synchronously,
+    as the query can be cancelled from any thread"""
+    driver_connection = cast("psycopg.AsyncConnection", conn.connection.driver_connection)
+    running_query.set_backend_query(str(driver_connection.info.backend_pid), driver_connection.cancel)
+
+
+# Key of the `PreparedStatementCache` in the info of pooled connections, which lasts as long as the connection
+_PREPARED_STATEMENTS_INFO_KEY = "toucan_connectors.prepared_statements"
+# Key of the `prepare_threshold` and `prepared_max` a pooled connection had before a request with prepared statements
+_PREPARED_STATEMENTS_DEFAULTS_INFO_KEY = "toucan_connectors.prepared_statements_defaults"
+# Commands after which psycopg deallocates all its prepared statements, or the server drops them
+_PREPARED_STATEMENTS_DISCARDING_COMMANDS = ("DROP ", "ROLLBACK", "DISCARD", "DEALLOCATE")
+
+
+def _clear_prepared_statements(info: dict, dbapi_connection: "psycopg.Connection | None" = None) -> None:
+    """Clears the `PreparedStatementCache` of a connection, when psycopg deallocates its prepared statements.
+
+    With `dbapi_connection`, only if it is in a transaction: psycopg deallocates them when it rolls it back.
+    """
+    cache = info.get(_PREPARED_STATEMENTS_INFO_KEY)
+    if cache is not None and (
+        dbapi_connection is None or dbapi_connection.info.transaction_status != TransactionStatus.IDLE
+    ):
+        cache.clear()
+
+
+def _on_reset(dbapi_connection: "psycopg.Connection", connection_record: Any, reset_state: Any) -> None:
+    # Called before the connection is rolled back, when it is returned to the pool
+    _clear_prepared_statements(connection_record.info, dbapi_connection)
+
+
+def _on_rollback(conn: "sa.Connection") -> None:
+    # Called before the transaction of `conn` is rolled back, e.g. by a `Session` outside autocommit mode
+    _clear_prepared_statements(conn.connection.info, cast("psycopg.Connection", conn.connection.dbapi_connection))
+
+
+def _on_after_cursor_execute(conn: "sa.Connection", cursor: Any, *args: Any) -> None:
+    if (cursor.statusmessage or "").startswith(_PREPARED_STATEMENTS_DISCARDING_COMMANDS):
+        _clear_prepared_statements(conn.connection.info)
+
+
+def _on_checkin(dbapi_connection: "psycopg.Connection | None", connection_record: Any) -> None:
+    # The next requests on the connection use its previous settings, unless they enable prepared statements
+    defaults = connection_record.info.pop(_PREPARED_STATEMENTS_DEFAULTS_INFO_KEY, None)
+    if defaults is not None and dbapi_connection is not None:
+        dbapi_connection.prepare_threshold, dbapi_connection.prepared_max = defaults
+
+
+def _listen_prepared_statements(engine: "sa.Engine") -> None:
+    """Keeps the `PreparedStatementCache` of the connections of `engine` in sync with psycopg, and restores their
+    settings when they are checked in"""
+    for name, listener in (
+        ("reset", _on_reset),
+        ("rollback", _on_rollback),
+        ("after_cursor_execute", _on_after_cursor_execute),
+        ("checkin", _on_checkin),
+    ):
+        if not event.contains(engine, name, listener):
+            event.listen(engine, name, listener)
+
+
 class PostgresDataSource(ToucanDataSource):
     database: str = Field(DEFAULT_DATABASE, description="The name of the database you want to query")
     query: Annotated[str | None, StringConstraints(min_length=1)] = Field(  # type: ignore[call-overload]
@@ -111,6 +200,7 @@ def _replace_void_params(params: dict[str, Any]) -> dict[str, Any]:
 
 
 class PostgresConnector(
+    SqlPushDownMixin,
     ToucanConnector,
     DiscoverableConnector,
     VersionableEngineConnector,
@@ -137,35 +227,188 @@ class PostgresConnector(
     include_materialized_views: bool = Field(
         False, description="Wether materialized views should be listed in the query builder or not."
     )
+    copy_extraction: bool = Field(
+        False,
+        title="Extract data with COPY",
+        description="Retrieve the results of queries with COPY ... TO STDOUT, which is faster for large results. "
+        "Numerics are returned as floats, and values of types other than booleans, numbers, texts, dates and "
+        "timestamps as text.",
+    )
+    server_side_cursors: bool = Field(
+        False,
+        title="Use server-side cursors",
+        description="Fetch the results of queries from a server-side cursor, a few rows at a time, instead of "
+        "buffering them entirely before converting them.",
+    )
+    itersize: int = Field(
+        2000,
+        ge=1,
+        title="Rows fetched at a time",
+        description="Number of rows fetched at a time from server-side cursors",
+    )
+    prepared_statements: bool = Field(
+        False,
+        title="Reuse prepared statements",
+        description="Prepare the queries executed repeatedly on the server, so that they are not parsed and "
+        "planned again, even by later requests. Does not apply with server-side cursors or COPY.",
+    )
+    prepare_threshold: int = Field(
+        1,
+        ge=0,
+        title="Executions before preparing a query",
+        description="Number of executions of a query on a connection after which it is prepared",
+    )
+    prepared_statements_max: int = Field(
+        100,
+        ge=1,
+        title="Prepared statements per connection",
+        description="Maximum number of statements prepared on a connection, the least recently used ones are "
+        "deallocated first",
+    )
 
-    def create_engine(self, database: str | None, connect_timeout: int | None = None) -> "sa.Engine":
-        server = self.host
-        if connect_timeout is None:
-            connect_timeout = self.connect_timeout
-        connect_args = {"connect_timeout": connect_timeout} if connect_timeout else None
-
+    def _get_connection_url(self, database: str | None, drivername: str = "postgresql+psycopg") -> "sa.URL":
         query_params: dict[str, str] = {}
         if self.charset:
             query_params["client_encoding"] = self.charset
 
-        connection_url = URL.create(
-            "postgresql+psycopg",
+        return URL.create(
+            drivername,
             username=self.user,
             password=self.password.get_secret_value() if self.password else None,
-            host=server,
+            host=self.host,
             port=self.port,
             database=database or self.default_database,
             query=query_params,
         )
-        return create_sqlalchemy_engine(connection_url, connect_args)
 
-    def _retrieve_data(self, data_source: PostgresDataSource) -> "pd.DataFrame":
-        sa_engine = self.create_engine(database=data_source.database)
+    def _get_connect_args(self, connect_timeout: int | None = None) -> dict[str, Any] | None:
+        if connect_timeout is None:
+            connect_timeout = self.connect_timeout
+        return {"connect_timeout": connect_timeout} if connect_timeout else None
+
+    def create_engine(self, database: str | None, connect_timeout: int | None = None) -> "sa.Engine":
+        """Pooled engine of the registry, shared by the connectors with the same configuration.
+
+        With a specific `connect_timeout` (e.g. to check the status), the engine is not pooled.
+        """
+        url = self._get_connection_url(database)
+        if connect_timeout is not None:
+            return create_sqlalchemy_engine(url, self._get_connect_args(connect_timeout))
+        engine = get_engine_registry().get_engine(
+            (self.get_identifier(), database or self.default_database), url, self._get_connect_args()
+        )
+        if self.prepared_statements:
+            _listen_prepared_statements(engine)
+        return engine
+
+    def create_async_engine(self, database: str | None, connect_timeout: int | None = None) -> "AsyncEngine":
+        """Engine using psycopg's asyncio support"""
+        return create_async_sqlalchemy_engine(
+            self._get_connection_url(database, drivername="postgresql+psycopg_async"),
+            self._get_connect_args(connect_timeout),
+        )
+
+    @staticmethod
+    def _prepare_query(data_source: PostgresDataSource) -> tuple[str, dict[str, Any]]:
         jinja_query = pyformat_params_to_jinja(data_source.query or "")
         flattened_query, flattened_params = unnest_sql_jinja_parameters(jinja_query, data_source.parameters or {})
         params_no_void = _replace_void_params(flattened_params)
-        final_query = convert_jinja_params_to_sqlalchemy_named(flattened_query)
-        return pandas_read_sqlalchemy_query(query=final_query, engine=sa_engine, params=params_no_void)
+        return convert_jinja_params_to_sqlalchemy_named(flattened_query), params_no_void
+
+    @staticmethod
+    def _read_with_copy(
+        engine: "sa.Engine", query: str, params: dict[str, Any], running_query: RunningQuery
+    ) -> "pd.DataFrame":
+        copy_params = None
+        if params:
+            # Compiled to the paramstyle of psycopg, which binds the parameters of COPY statements itself
+            compiled = sa_text(query).compile(dialect=engine.dialect)
+            query, copy_params = str(compiled), compiled.construct_params(params)
+        with engine.connect() as conn:
+            _register_cancel(running_query, conn)
+            with cast("psycopg.Connection", conn.connection.dbapi_connection).cursor() as cursor:
+                table = read_copy_table(cursor, query, copy_params)
+        df = arrow_table_to_df(table)
+        rename_duplicate_columns(df)
+        return df
+
+    def _use_prepared_statements(
+        self, query: str, database: str | None, on_connect: Callable[["sa.Connection"], None], conn: "sa.Connection"
+    ) -> None:
+        """Lets psycopg prepare the queries executed on `conn`, records the execution of `query`, then calls
+        `on_connect`.
+
+        The query runs in autocommit mode: the pool rolls the connection back when it is returned, and psycopg
+        deallocates its prepared statements on rollback, so they would not outlive the request otherwise.
+        The previous settings of the connection are restored when it is checked in.
+        """
+        dbapi_connection = cast("psycopg.Connection", conn.connection.dbapi_connection)
+        info = conn.connection.info
+        info.setdefault(
+            _PREPARED_STATEMENTS_DEFAULTS_INFO_KEY, (dbapi_connection.prepare_threshold, dbapi_connection.prepared_max)
+        )
+        dbapi_connection.prepare_threshold = self.prepare_threshold
+        dbapi_connection.prepared_max = self.prepared_statements_max
+
+        cache = info.get(_PREPARED_STATEMENTS_INFO_KEY)
+        if cache is None:
+            cache = info[_PREPARED_STATEMENTS_INFO_KEY] = PreparedStatementCache(
+                self.prepare_threshold, self.prepared_statements_max, database=database or self.default_database
+            )
+        cache.record(query)
+        conn.execution_options(isolation_level="AUTOCOMMIT")
+        on_connect(conn)
+
+    def _retrieve_data(self, data_source: PostgresDataSource) -> "pd.DataFrame":
+        sa_engine = self.create_engine(database=data_source.database)
+        final_query, params = self._prepare_query(data_source)
+        with get_query_manager().track(self.name, final_query) as running_query:
+            if self.copy_extraction:
+                try:
+                    return self._read_with_copy(sa_engine, final_query, params, running_query)
+                except CopyConversionError as exc:
+                    _LOGGER.warning(f"Could not convert the results of COPY, retrieving them row by row: {exc}")
+
+            on_connect = partial(_register_cancel, running_query)
+            if self.prepared_statements and not self.server_side_cursors:
+                on_connect = partial(self._use_prepared_statements, final_query, data_source.database, on_connect)
+            return pandas_read_sqlalchemy_query(
+                query=final_query,
+                engine=sa_engine,
+                params=params,
+                on_connect=on_connect,
+                itersize=self._itersize,
+            )
+
+    async def _aretrieve_data(self, data_source: PostgresDataSource) -> "pd.DataFrame":
+        if self.copy_extraction or self.server_side_cursors or self.prepared_statements:
+            # These options are only implemented with the sync engine
+            return await self._run_in_executor(self._retrieve_data, data_source)
+
+        sa_engine = self.create_async_engine(database=data_source.database)
+        final_query, params = self._prepare_query(data_source)
+        with get_query_manager().track(self.name, final_query) as running_query:
+            return await pandas_read_sqlalchemy_query_async(
+                query=final_query,
+                engine=sa_engine,
+                params=params,
+                on_connect=partial(_register_async_cancel, running_query),
+            )
+
+    def _retrieve_batches(self, data_source: PostgresDataSource, batch_size: int) -> Iterator["pd.DataFrame"]:
+        sa_engine = self.create_engine(database=data_source.database)
+        final_query, params = self._prepare_query(data_source)
+        # The results are always streamed, so that only a few batches are held in memory at once
+        yield from pandas_iter_sqlalchemy_query(
+            query=final_query, engine=sa_engine, params=params, chunksize=batch_size, itersize=self.itersize
+        )
+
+    @property
+    def _itersize(self) -> int | None:
+        return self.itersize if self.server_side_cursors else None
+
+    def _can_slice_batches(self) -> bool:
+        return self.server_side_cursors
 
     @staticmethod
     def _get_details(index: int, status: bool | None):
@@ -1,3 +1,15 @@
+import io
+from collections import OrderedDict
+from collections.abc import Iterator, Mapping
+from typing import TYPE_CHECKING, Any
+
+from toucan_connectors.metrics import get_metrics
+from toucan_connectors.sql_rewriter import strip_trailing_semicolons
+
+if TYPE_CHECKING:  # pragma: no cover
+    import psycopg
+    import pyarrow as pa
+
 types = {
     16: "bool",
     17: "bytea",
@@ -717,3 +729,148 @@ def build_database_model_extraction_query(
         """
     else:
         return regular_tables_query + ";"
+
+
+# Types of the columns read with COPY, by type name. Columns of other types are read as text.
+_COPY_ARROW_TYPES = {
+    "bool": "bool_",
+    "int2": "int64",
+    "int4": "int64",
+    "int8": "int64",
+    "oid": "int64",
+    "float4": "float64",
+    "float8": "float64",
+    "numeric": "float64",
+    "date": "date32",
+}
+
+
+def _copy_arrow_type(type_code: int) -> "pa.DataType":
+    import pyarrow as pa
+
+    type_name = types.get(type_code)
+    if type_name == "timestamp":
+        return pa.timestamp("us")
+    if type_name == "timestamptz":
+        return pa.timestamp("us", tz="UTC")
+    return getattr(pa, _COPY_ARROW_TYPES.get(type_name or "", "string"))()
+
+
+class _CopyStream(io.RawIOBase):
+    """Readable stream of the data sent by a `COPY ... TO STDOUT`"""
+
+    def __init__(self, chunks: Iterator[Any]):
+        self._chunks = chunks
+        self._buffer = memoryview(next(self._chunks, b""))
+
+    @property
+    def empty(self) -> bool:
+        """Whether the COPY sent no data (checked before reading it)"""
+        return not self._buffer
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        while not self._buffer:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._buffer = memoryview(chunk)
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+class CopyConversionError(Exception):
+    """Raised when the data sent by a COPY cannot be converted to the types of its columns"""
+
+
+def read_copy_table(cursor: "psycopg.Cursor", query: str, params: Mapping[str, Any] | None = None) -> "pa.Table":
+    """Reads the results of `query` with `COPY (<query>) TO STDOUT` in the CSV format, decoded by Arrow.
+
+    The types of the columns are those of the description of the query: booleans, integers, floats and numerics
+    (as floats), dates and timestamps. Values of other types are read as their text representation.
+    Parameters are bound on the client side, in the psycopg paramstyle.
+
+    Raises `CopyConversionError` if a value cannot be converted (e.g. an `infinity` date).
+    """
+    import pyarrow as pa
+    from pyarrow import csv
+
+    query = strip_trailing_semicolons(query)
+    cursor.execute(f"SELECT * FROM ({query}) AS q LIMIT 0", params)  # noqa: S608
+    schema = pa.schema([(column.name, _copy_arrow_type(column.type_code)) for column in cursor.description or []])
+    # Columns are read by position, since several of them can have the same name
+    positional_names = [f"c{idx}" for idx in range(len(schema))]
+
+    with cursor.copy(f"COPY ({query}) TO STDOUT (FORMAT csv)", params) as copy:
+        stream = _CopyStream(iter(copy))
+        if stream.empty:
+            return schema.empty_table()
+        try:
+            table = csv.read_csv(
+                io.BufferedReader(stream),
+                read_options=csv.ReadOptions(column_names=positional_names),
+                convert_options=csv.ConvertOptions(
+                    column_types=dict(zip(positional_names, schema.types, strict=True)),
+                    true_values=["t"],
+                    false_values=["f"],
+                    # NULL values are unquoted empty strings
+                    null_values=[""],
+                    strings_can_be_null=True,
+                    quoted_strings_can_be_null=False,
+                ),
+            )
+        except pa.ArrowInvalid as exc:
+            raise CopyConversionError(str(exc)) from exc
+    return table.rename_columns(schema.names)
+
+
+class PreparedStatementCache:
+    """Queries executed on a connection, by normalized text, least recently used first.
+
+    It mirrors the cache of prepared statements of psycopg: a query is prepared on the server once it has been
+    executed `prepare_threshold` times, the least recently used statement is deallocated once there are more
+    than `max_size`, and all of them are deallocated on rollback (see `clear`). Hits (executions of a prepared
+    statement), misses and evictions are counted, and reported to `get_metrics()` as `postgres.prepared_statements.*`
+    with the given labels.
+    """
+
+    def __init__(self, prepare_threshold: int, max_size: int, **labels: str):
+        self.prepare_threshold = prepare_threshold
+        self.max_size = max_size
+        self.labels = labels
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Number of executions by query
+        self._executions: OrderedDict[str, int] = OrderedDict()
+
+    def record(self, query: str) -> bool:
+        """Records an execution of `query`, and returns whether it reuses a prepared statement"""
+        executions = self._executions.pop(query, 0)
+        self._executions[query] = executions + 1
+        hit = executions > self.prepare_threshold
+        if hit:
+            self.hits += 1
+            get_metrics().increment("postgres.prepared_statements.hits", **self.labels)
+        else:
+            self.misses += 1
+            get_metrics().increment("postgres.prepared_statements.misses", **self.labels)
+        while len(self._executions) > self.max_size:
+            self._executions.popitem(last=False)
+            self.evictions += 1
+            get_metrics().increment("postgres.prepared_statements.evictions", **self.labels)
+        return hit
+
+    def clear(self) -> None:
+        """Forgets the executed queries, when psycopg deallocates its prepared statements (e.g. on rollback)"""
+        self._executions.clear()
+
+    def __contains__(self, query: str) -> bool:
+        return query in self._executions
+
+    def __len__(self) -> int:
+        return len(self._executions)
@@ -1,14 +1,196 @@
+"""Registry of the queries being executed, which can be cancelled or timed out.
+
+Connectors track the queries they send to their backend with `get_query_manager().track(...)`, and register how
+to cancel them on the backend (e.g. `SYSTEM$CANCEL_ALL_QUERIES` on Snowflake, a cancel request on Postgres,
+`job.cancel()` on Google Big Query, `StopQueryExecution` on Amazon Athena).
+
+To cancel the queries of a request, or to stop them after a timeout, run it in a `query_context`:
+
+    with query_context(query_id="dashboard-42", timeout=120):
+        connector.get_df(data_source)
+
+    # in another thread
+    get_query_manager().cancel("dashboard-42")
+"""
+
+import contextlib
 import logging
+import threading
+import time
 import types
-
-from toucan_connectors import DataSlice
+import uuid
+from collections.abc import Callable, Iterator
+from contextvars import ContextVar
 
 logger = logging.getLogger(__name__)
 
 
+class QueryCancelledError(Exception):
+    """Raised when a query is cancelled with `QueryManager.cancel`"""
+
+
+class QueryTimeoutError(QueryCancelledError, TimeoutError):
+    """Raised when a query is cancelled because it ran for longer than the timeout of its `query_context`"""
+
+
+class _QueryContext:
+    def __init__(self, query_id: str, deadline: float | None):
+        self.query_id = query_id
+        self.deadline = deadline
+        # Set by `QueryManager.cancel`, so that the next queries of the context are not executed
+        self.cancelled = False
+
+
+_query_context: ContextVar[_QueryContext | None] = ContextVar("toucan_connectors_query_context", default=None)
+
+# Contexts being entered, by query id
+_active_contexts: dict[str, list[_QueryContext]] = {}
+_active_contexts_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def query_context(query_id: str | None = None, timeout: float | None = None) -> Iterator[str]:
+    """Queries tracked in this context get `query_id` (a random one by default, which is returned),
+    and are cancelled once `timeout` seconds have elapsed since entering it."""
+    context = _QueryContext(
+        query_id=query_id or uuid.uuid4().hex,
+        deadline=None if timeout is None else time.monotonic() + timeout,
+    )
+    token = _query_context.set(context)
+    with _active_contexts_lock:
+        _active_contexts.setdefault(context.query_id, []).append(context)
+    try:
+        yield context.query_id
+    finally:
+        with _active_contexts_lock:
+            contexts = _active_contexts[context.query_id]
+            contexts.remove(context)
+            if not contexts:
+                del _active_contexts[context.query_id]
+        _query_context.reset(token)
+
+
+class RunningQuery:
+    """A query being executed by a connector"""
+
+    def __init__(self, query_id: str, connector: str, query: str):
+        self.query_id = query_id
+        self.connector = connector
+        self.query = query
+        self.started_at = time.time()
+        # Id of the query (or session) on the backend, when the connector knows it
+        self.backend_query_id: str | None = None
+        # "cancelled" or "timeout" once the query has been cancelled
+        self.cancel_reason: str | None = None
+
+        self._cancel_method: Callable[[], None] | None = None
+        self._lock = threading.Lock()
+
+    def set_backend_query(self, backend_query_id: str | None, cancel_method: Callable[[], None]) -> None:
+        """Register how to cancel the query on the backend.
+
+        If the query is already cancelled, it is called now, and `QueryCancelledError` (or `QueryTimeoutError`)
+        is raised, so that a query which has not been executed yet is not.
+        """
+        with self._lock:
+            self.backend_query_id = backend_query_id
+            self._cancel_method = cancel_method
+            cancel_reason = self.cancel_reason
+        if cancel_reason is not None:
+            self._cancel_backend_query()
+            raise self.cancelled_error()
+
+    def cancelled_error(self) -> QueryCancelledError:
+        if self.cancel_reason == "timeout":
+            return QueryTimeoutError(f"Query {self.query_id} of {self.connector} timed out")
+        return QueryCancelledError(f"Query {self.query_id} of {self.connector} was cancelled")
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        with self._lock:
+            if self.cancel_reason is not None:
+                return
+            self.cancel_reason = reason
+        logger.info(f"Cancelling query {self.query_id} of {self.connector} ({reason})")
+        self._cancel_backend_query()
+
+    def _cancel_backend_query(self) -> None:
+        with self._lock:
+            cancel_method, self._cancel_method = self._cancel_method, None
+        if cancel_method is None:
+            return
+        try:
+            cancel_method()
+        except Exception:
+            logger.exception(f"Failed to cancel query {self.query_id} of {self.connector}")
+
+
 class QueryManager:
     def __init__(self):
-        self.query: dict[str, DataSlice] = {}
+        # Running queries by id. A request executing several queries (e.g. data and count) has several of them.
+        self.queries: dict[str, list[RunningQuery]] = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def track(self, connector: str, query: str) -> Iterator[RunningQuery]:
+        """Register a query while it runs.
+
+        If it fails after having been cancelled, `QueryCancelledError` (or `QueryTimeoutError`) is raised instead.
+        """
+        context = _query_context.get()
+        query_id = context.query_id if context is not None else uuid.uuid4().hex
+        running_query = RunningQuery(query_id, connector, query)
+
+        if context is not None and context.cancelled:
+            raise QueryCancelledError(f"Query {query_id} of {connector} was cancelled")
+
+        timer = None
+        if context is not None and context.deadline is not None:
+            remaining = context.deadline - time.monotonic()
+            if remaining <= 0:
+                raise QueryTimeoutError(f"Query {query_id} of {connector} timed out")
+            timer = threading.Timer(remaining, running_query.cancel, args=("timeout",))
+            timer.daemon = True
+            timer.start()
+
+        with self._lock:
+            self.queries.setdefault(query_id, []).append(running_query)
+        try:
+            yield running_query
+        except QueryCancelledError:
+            raise
+        except Exception as exc:
+            if running_query.cancel_reason is not None:
+                raise running_query.cancelled_error() from exc
+            raise
+        finally:
+            if timer is not None:
+                timer.cancel()
+            with self._lock:
+                running_queries = self.queries[query_id]
+                running_queries.remove(running_query)
+                if not running_queries:
+                    del self.queries[query_id]
+
+    def running(self) -> list[RunningQuery]:
+        """The queries being executed, the oldest first"""
+        with self._lock:
+            running_queries = [running_query for queries in self.queries.values() for running_query in queries]
+        return sorted(running_queries, key=lambda running_query: running_query.started_at)
+
+    def cancel(self, query_id: str) -> bool:
+        """Cancel the queries of `query_id`, and the next ones of its `query_context`.
+
+        Return False if no query is running, nor any context of `query_id` entered.
+        """
+        with _active_contexts_lock:
+            contexts = list(_active_contexts.get(query_id, []))
+        for context in contexts:
+            context.cancelled = True
+        with self._lock:
+            running_queries = list(self.queries.get(query_id, []))
+        for running_query in running_queries:
+            running_query.cancel()
+        return bool(running_queries or contexts)
 
     @staticmethod
     def _execute(execute_method, connection, query: str, parameters: dict | None = None):
@@ -35,3 +217,11 @@ class QueryManager:
     def describe(self, describe_method, connection, query: str):
         result = QueryManager._describe(describe_method, connection, query)
         return result
+
+
+_query_manager = QueryManager()
+
+
+def get_query_manager() -> QueryManager:
+    """The registry of the queries executed by the connectors"""
+    return _query_manager
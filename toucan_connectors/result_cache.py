@@ -0,0 +1,336 @@
+"""Opt-in cache of the results of connectors.
+
+`ResultCache` wraps the `get_df` and `get_slice` methods of connectors. Results are stored
+in a `CacheBackend`, for the `cache_ttl` of the data source or of the connector:
+
+- `MemoryCache`: a least recently used cache, bounded by the memory size of the dataframes
+- `DiskCache`: Arrow IPC files in a local directory
+- `TieredCache`: several backends, the fastest first (e.g. memory, then disk)
+
+Backends for shared stores can be plugged by implementing `CacheBackend`.
+With a `SingleFlight`, concurrent identical requests missing the cache are executed only once.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Callable
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+from toucan_connectors.pagination import PaginationInfo
+from toucan_connectors.single_flight import SingleFlight, get_request_key
+from toucan_connectors.toucan_connector import DataSlice, DataStats, ToucanConnector, ToucanDataSource
+
+if TYPE_CHECKING:  # pragma: no cover
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# In seconds, used when neither the data source nor the connector define a `cache_ttl`
+DEFAULT_CACHE_TTL = 300
+
+_ARROW_METADATA_KEY = b"toucan_result_cache"
+
+
+class CachedResult(NamedTuple):
+    """A result stored in a cache, which is valid until `expires_at` (a timestamp)"""
+
+    df: "pd.DataFrame"
+    expires_at: float
+    pagination_info: PaginationInfo | None = None
+    stats: DataStats | None = None
+
+    @property
+    def is_expired(self) -> bool:
+        return self.expires_at <= time.time()
+
+    @property
+    def memory_size(self) -> int:
+        """Memory size of the dataframe in bytes, as computed for `DataStats.df_memory_size`"""
+        return int(self.df.memory_usage().sum())
+
+
+class CacheBackend(ABC):
+    """Storage of cached results. Implementations must be thread-safe."""
+
+    @abstractmethod
+    def get(self, key: str) -> CachedResult | None:
+        """Returns the result stored for `key`, or None if it is missing or expired"""
+
+    @abstractmethod
+    def set(self, key: str, result: CachedResult) -> None:
+        """Stores `result` for `key`, until it expires"""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Removes the result stored for `key`, if any"""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Removes all the stored results"""
+
+
+class MemoryCache(CacheBackend):
+    """Least recently used cache, holding dataframes for at most `max_bytes` bytes"""
+
+    def __init__(self, max_bytes: int = 512 * 1024**2):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._results: OrderedDict[str, CachedResult] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> CachedResult | None:
+        with self._lock:
+            result = self._results.get(key)
+            if result is None:
+                return None
+            if result.is_expired:
+                self._remove(key)
+                return None
+            self._results.move_to_end(key)
+            return result
+
+    def set(self, key: str, result: CachedResult) -> None:
+        size = result.memory_size
+        with self._lock:
+            self._remove(key)
+            if size > self.max_bytes:
+                logger.debug(f"Result of {size} bytes is too large to be cached in memory")
+                return
+            self._results[key] = result
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                self._remove(next(iter(self._results)))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._results.clear()
+            self.current_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def _remove(self, key: str) -> None:
+        result = self._results.pop(key, None)
+        if result is not None:
+            self.current_bytes -= result.memory_size
+
+
+class DiskCache(CacheBackend):
+    """Cache storing results as Arrow IPC files in `directory`. Requires pyarrow.
+
+    Expired files are removed when they are read, or by `evict_expired`.
+    Dataframes which cannot be converted to Arrow are not cached.
+    """
+
+    def __init__(self, directory: str | os.PathLike):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.arrow"
+
+    def get(self, key: str) -> CachedResult | None:
+        import pyarrow as pa
+
+        path = self._path(key)
+        try:
+            # Read without memory mapping, as the file can be replaced or removed while it is used
+            with pa.OSFile(str(path)) as source:
+                table = pa.ipc.open_file(source).read_all()
+        except FileNotFoundError:
+            return None
+        except pa.ArrowInvalid:
+            logger.warning(f"Removing invalid cache file {path}")
+            path.unlink(missing_ok=True)
+            return None
+
+        metadata = json.loads(table.schema.metadata[_ARROW_METADATA_KEY])
+        if metadata["expires_at"] <= time.time():
+            path.unlink(missing_ok=True)
+            return None
+        return CachedResult(
+            df=table.to_pandas(),
+            expires_at=metadata["expires_at"],
+            pagination_info=PaginationInfo.model_validate(metadata["pagination_info"])
+            if metadata["pagination_info"] is not None
+            else None,
+            stats=DataStats.model_validate(metadata["stats"]) if metadata["stats"] is not None else None,
+        )
+
+    def set(self, key: str, result: CachedResult) -> None:
+        import pyarrow as pa
+
+        try:
+            table = pa.Table.from_pandas(result.df)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) as exc:
+            logger.debug(f"Result cannot be cached on disk: {exc}")
+            return
+        metadata = {
+            "expires_at": result.expires_at,
+            "pagination_info": result.pagination_info.model_dump(mode="json") if result.pagination_info else None,
+            "stats": result.stats.model_dump(mode="json") if result.stats else None,
+        }
+        table = table.replace_schema_metadata(
+            {**(table.schema.metadata or {}), _ARROW_METADATA_KEY: json.dumps(metadata)}
+        )
+
+        # Written in a temporary file first, so that readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def delete(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        for path in self.directory.glob("*.arrow"):
+            path.unlink(missing_ok=True)
+
+    def evict_expired(self) -> int:
+        """Removes the expired files, and returns how many were removed"""
+        import pyarrow as pa
+
+        now = time.time()
+        evicted = 0
+        for path in self.directory.glob("*.arrow"):
+            try:
+                with pa.OSFile(str(path)) as source:
+                    metadata = json.loads(pa.ipc.open_file(source).schema.metadata[_ARROW_METADATA_KEY])
+                expired = metadata["expires_at"] <= now
+            except FileNotFoundError:
+                continue
+            except (pa.ArrowInvalid, KeyError, TypeError, ValueError):
+                expired = True
+            if expired:
+                path.unlink(missing_ok=True)
+                evicted += 1
+        return evicted
+
+
+class TieredCache(CacheBackend):
+    """Chains several backends, the fastest first.
+
+    Results are written in every tier, and results found in a slower tier are copied to the faster ones.
+    """
+
+    def __init__(self, tiers: list[CacheBackend]):
+        self.tiers = tiers
+
+    def get(self, key: str) -> CachedResult | None:
+        for idx, tier in enumerate(self.tiers):
+            result = tier.get(key)
+            if result is not None:
+                for faster_tier in self.tiers[:idx]:
+                    faster_tier.set(key, result)
+                return result
+        return None
+
+    def set(self, key: str, result: CachedResult) -> None:
+        for tier in self.tiers:
+            tier.set(key, result)
+
+    def delete(self, key: str) -> None:
+        for tier in self.tiers:
+            tier.delete(key)
+
+    def clear(self) -> None:
+        for tier in self.tiers:
+            tier.clear()
+
+
+class ResultCache:
+    """Serves the results of `get_df` and `get_slice` from `backend` when they have already been retrieved.
+
+    Results are cached by `ToucanConnector.get_cache_key`, for the `cache_ttl` of the data source,
+    or else of the connector, or else `default_ttl`. A `cache_ttl` of 0 disables the cache.
+
+    Cached dataframes are shared between callers, and must not be modified in place.
+    """
+
+    def __init__(
+        self, backend: CacheBackend, default_ttl: int = DEFAULT_CACHE_TTL, single_flight: SingleFlight | None = None
+    ):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self.single_flight = single_flight
+
+    def get_ttl(self, connector: ToucanConnector, data_source: ToucanDataSource) -> int:
+        for ttl in (data_source.cache_ttl, connector.cache_ttl):
+            if ttl is not None:
+                return ttl
+        return self.default_ttl
+
+    def _run[T](self, key: str, fn: Callable[[], T]) -> T:
+        return fn() if self.single_flight is None else self.single_flight.do(key, fn)
+
+    def get_df(
+        self, connector: ToucanConnector, data_source: ToucanDataSource, permissions: dict | None = None
+    ) -> "pd.DataFrame":
+        ttl = self.get_ttl(connector, data_source)
+        if ttl <= 0:
+            return connector.get_df(data_source, permissions)
+
+        key = get_request_key(connector, data_source, permissions)
+        cached = self.backend.get(key)
+        if cached is not None:
+            return cached.df
+
+        def retrieve_df() -> "pd.DataFrame":
+            df = connector.get_df(data_source, permissions)
+            self.backend.set(key, CachedResult(df=df, expires_at=time.time() + ttl))
+            return df
+
+        return self._run(key, retrieve_df)
+
+    def get_slice(
+        self,
+        connector: ToucanConnector,
+        data_source: ToucanDataSource,
+        permissions: dict | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+        get_row_count: bool | None = False,
+    ) -> DataSlice:
+        ttl = self.get_ttl(connector, data_source)
+        if ttl <= 0:
+            return connector.get_slice(
+                data_source, permissions=permissions, offset=offset, limit=limit, get_row_count=get_row_count
+            )
+
+        key = get_request_key(connector, data_source, permissions, offset, limit, get_row_count)
+        cached = self.backend.get(key)
+        if cached is not None and cached.pagination_info is not None:
+            return DataSlice(cached.df, pagination_info=cached.pagination_info, stats=cached.stats)
+
+        def retrieve_slice() -> DataSlice:
+            data_slice = connector.get_slice(
+                data_source, permissions=permissions, offset=offset, limit=limit, get_row_count=get_row_count
+            )
+            self.backend.set(
+                key,
+                CachedResult(
+                    df=data_slice.df,
+                    expires_at=time.time() + ttl,
+                    pagination_info=data_slice.pagination_info,
+                    stats=data_slice.stats,
+                ),
+            )
+            return data_slice
+
+        return self._run(key, retrieve_slice)
@@ -13,6 +13,7 @@ except ImportError as exc:  # pragma: no cover
 
 
 from toucan_connectors.common import pandas_read_sql
+from toucan_connectors.sql_push_down import SqlPushDownMixin
 from toucan_connectors.toucan_connector import PlainJsonSecretStr, ToucanConnector, ToucanDataSource
 
 
@@ -22,7 +23,7 @@ class SapHanaDataSource(ToucanDataSource):
     )
 
 
-class SapHanaConnector(ToucanConnector, data_source_model=SapHanaDataSource):
+class SapHanaConnector(SqlPushDownMixin, ToucanConnector, data_source_model=SapHanaDataSource):
     """
     Import data from Sap Hana.
     """
@@ -37,6 +38,10 @@ class SapHanaConnector(ToucanConnector, data_source_model=SapHanaDataSource):
     user: str = Field(..., description="Your login username")
     password: PlainJsonSecretStr = Field("", description="Your login password")
 
+    def _can_push_down_permissions(self, query: str) -> bool:
+        # Queries are not parameterized, so permission values cannot be bound
+        return False
+
     def _retrieve_data(self, data_source):
         connection = pyhdb.connect(
             self.host,
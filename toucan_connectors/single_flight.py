@@ -0,0 +1,109 @@
+"""Coalescing of identical concurrent requests.
+
+When the same request is made several times concurrently (e.g. by all the tiles of a dashboard
+being opened), `SingleFlight` executes it only once: the first caller executes it, and the others
+wait for its result, or its exception.
+"""
+
+import asyncio
+import threading
+from collections.abc import Awaitable, Callable
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any
+
+from toucan_connectors.toucan_connector import DataSlice, ToucanConnector, ToucanDataSource
+
+if TYPE_CHECKING:  # pragma: no cover
+    import pandas as pd
+
+
+def get_request_key(
+    connector: ToucanConnector,
+    data_source: ToucanDataSource,
+    permissions: dict | None = None,
+    offset: int | None = None,
+    limit: int | None = None,
+    get_row_count: bool | None = False,
+) -> str:
+    """Key of a `get_df` request (without `offset`), or of a `get_slice` request"""
+    if offset is None:
+        return f"df-{connector.get_cache_key(data_source, permissions)}"
+    key = f"slice-{connector.get_cache_key(data_source, permissions, offset, limit)}"
+    return f"{key}-count" if get_row_count else key
+
+
+class SingleFlight:
+    """Executes a function once for all the concurrent calls sharing the same key.
+
+    Works with threads (`do`) and with asyncio (`do_async`). Results are shared between
+    callers, and must not be modified in place.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._futures: dict[str, Future] = {}
+        self._tasks: dict[tuple[asyncio.AbstractEventLoop, str], asyncio.Future] = {}
+
+    def do[T](self, key: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Calls `fn(*args, **kwargs)`, unless a call for `key` is in progress, whose result is then returned"""
+        with self._lock:
+            future = self._futures.get(key)
+            is_leader = future is None
+            if future is None:
+                future = self._futures[key] = Future()
+
+        if not is_leader:
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._futures[key]
+
+    async def do_async[T](self, key: str, fn: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+        """Awaits `fn(*args, **kwargs)`, unless a call for `key` is in progress in the same event loop"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            task = self._tasks.get((loop, key))
+            if task is None:
+                task = self._tasks[(loop, key)] = asyncio.ensure_future(fn(*args, **kwargs))
+                task.add_done_callback(lambda _: self._forget_task(loop, key))
+        # A cancelled caller must not cancel the call awaited by the others
+        return await asyncio.shield(task)
+
+    def _forget_task(self, loop: asyncio.AbstractEventLoop, key: str) -> None:
+        with self._lock:
+            self._tasks.pop((loop, key), None)
+
+    def get_df(
+        self, connector: ToucanConnector, data_source: ToucanDataSource, permissions: dict | None = None
+    ) -> "pd.DataFrame":
+        key = get_request_key(connector, data_source, permissions)
+        return self.do(key, connector.get_df, data_source, permissions)
+
+    def get_slice(
+        self,
+        connector: ToucanConnector,
+        data_source: ToucanDataSource,
+        permissions: dict | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+        get_row_count: bool | None = False,
+    ) -> DataSlice:
+        key = get_request_key(connector, data_source, permissions, offset, limit, get_row_count)
+        return self.do(
+            key,
+            connector.get_slice,
+            data_source,
+            permissions=permissions,
+            offset=offset,
+            limit=limit,
+            get_row_count=get_row_count,
+        )
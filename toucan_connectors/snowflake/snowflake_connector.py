@@ -1,27 +1,35 @@
 import logging
-from collections.abc import Generator
-from contextlib import AbstractContextManager, contextmanager, suppress
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, suppress
 from datetime import datetime
 from enum import StrEnum
-from tempfile import NamedTemporaryFile
-from typing import Any, Literal, overload
+from functools import lru_cache
+from typing import Any, Literal, NamedTuple, cast, overload
 
 from pydantic import Field, create_model, model_validator
 from pydantic.json_schema import DEFAULT_REF_TEMPLATE, GenerateJsonSchema, JsonSchemaMode
 
-from toucan_connectors.common import UI_HIDDEN, ConnectorStatus
+from toucan_connectors.common import UI_HIDDEN, ConnectorStatus, arrow_table_to_df
+from toucan_connectors.connection_manager import ConnectionManager
 from toucan_connectors.pagination import build_pagination_info
+from toucan_connectors.single_flight import SingleFlight
 from toucan_connectors.sql_query_helper import SqlQueryHelper
+from toucan_connectors.sql_rewriter import normalize_query
 from toucan_connectors.toucan_connector import (
     Category,
     DataSlice,
     DiscoverableConnector,
     PlainJsonSecretStr,
+    QueryMetadata,
     TableInfo,
     ToucanConnector,
     ToucanDataSource,
     strlist_to_enum,
 )
+from toucan_connectors.utils.cache_key import stable_digest
 from toucan_connectors.utils.pem import sanitize_spaces_pem
 
 _LOGGER = logging.getLogger(__name__)
@@ -29,20 +37,29 @@ _LOGGER = logging.getLogger(__name__)
 try:
     import jwt
     import pandas as pd
+    import pyarrow as pa
     import requests
     import snowflake
     from jinja2.sandbox import ImmutableSandboxedEnvironment
     from snowflake import connector as sf_connector
     from snowflake.connector import SnowflakeConnection
     from snowflake.connector.cursor import DictCursor as SfDictCursor
+    from snowflake.connector.result_batch import ArrowResultBatch, ResultBatch
 
     from toucan_connectors.snowflake_common import (
+        CATALOG_MAX_CONCURRENCY,
         build_database_model_extraction_query,
+        execute_async_tracked,
+        execute_tracked,
+        extract_databases_model,
+        fetch_arrow_table,
+        get_column_types,
+        is_session_changed,
+        iter_arrow_batches,
+        slice_result_batches,
         type_code_mapping,
     )
 
-    # TODO: Once we remove SnowflakeCommon, directly assign the query block here
-    _DB_MODEL_EXTRACTION_QUERY = build_database_model_extraction_query()
     # TODO: Once we remove SnowflakeCommon, declare the mapping here
     _TYPE_CODE_MAPPING = type_code_mapping
 
@@ -105,22 +122,87 @@ class AuthenticationMethodValue(StrEnum):
     OAUTH = "oauth"
 
 
-@contextmanager
-def _snowflake_connection(
-    *,
-    private_key_file: Any | None,
-    connect_args: dict[str, str | int | None],
-) -> Generator["SnowflakeConnection"]:
-    """Returns a Snowflake connection and automatically closes it."""
-    sf_connector.paramstyle = "qmark"
-    conn = SnowflakeConnection(**connect_args)  # type:ignore[arg-type]
-    try:
-        yield conn
-    finally:
-        # Entire method is already wrapped in a try/except block
-        conn.close()
-        if private_key_file is not None:
-            private_key_file.close()
+# In seconds. Sessions unused for longer are checked with `SnowflakeConnection.is_valid` before being reused.
+_HEARTBEAT_FREQUENCY = 59
+# In seconds. Without heartbeats, the master token of a session expires after 4 hours.
+_SESSION_MAX_LIFETIME = 3 * 3600
+
+# Sessions of SnowflakeConnector, by connector identifier, user, role, database and warehouse
+connection_manager = ConnectionManager(
+    name="snowflake",
+    time_between_clean=_HEARTBEAT_FREQUENCY,
+    time_keep_alive=600,
+    max_lifetime=_SESSION_MAX_LIFETIME,
+    health_check_interval=_HEARTBEAT_FREQUENCY,
+)
+
+
+@lru_cache(maxsize=64)
+def _load_private_key(private_key: str, password: str | None) -> bytes:
+    """Loads a PEM private key once, and returns it in the DER format expected by the Snowflake connector"""
+    from cryptography.hazmat.primitives import serialization
+
+    key = serialization.load_pem_private_key(
+        sanitize_spaces_pem(private_key).encode(), password.encode() if password is not None else None
+    )
+    return key.private_bytes(
+        encoding=serialization.Encoding.DER,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    )
+
+
+# In seconds. Snowflake keeps the results of queries for 24 hours, but the URLs of their batches expire sooner.
+_QUERY_RESULT_TTL = 3600
+
+
+class _QueryResult(NamedTuple):
+    """Result of a query kept by Snowflake, which is read until `expires_at` (a monotonic time)"""
+
+    query_id: str
+    batches: list["ResultBatch"]
+    column_types: dict[str, str]
+    expires_at: float
+
+    @property
+    def total_rows(self) -> int:
+        return sum(batch.rowcount for batch in self.batches)
+
+
+class _QueryResults:
+    """Least recently used results of paginated queries, by session and query"""
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._results: OrderedDict[str, _QueryResult] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> _QueryResult | None:
+        with self._lock:
+            result = self._results.get(key)
+            if result is None:
+                return None
+            if result.expires_at <= time.monotonic():
+                del self._results[key]
+                return None
+            self._results.move_to_end(key)
+            return result
+
+    def set(self, key: str, result: _QueryResult) -> None:
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_size:
+                self._results.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._results.clear()
+
+
+query_results = _QueryResults()
+# Concurrent requests for the first pages of a query submit it once
+_query_flights = SingleFlight()
 
 
 _SCHEMA_ORDERED_KEYS = (
@@ -196,6 +278,18 @@ class SnowflakeConnector(
         title="category",
         ui={"checkbox": False},
     )
+    paginate_from_query_results: bool = Field(
+        False,
+        description="Execute paginated queries once, and read their pages and row count from the results kept "
+        "by Snowflake for one hour, instead of executing them for each page",
+        **UI_HIDDEN,
+    )
+    catalog_max_concurrency: int = Field(
+        CATALOG_MAX_CONCURRENCY,
+        ge=1,
+        description="Number of databases whose tables are listed concurrently",
+        **UI_HIDDEN,
+    )
 
     @model_validator(mode="after")
     def _validate_private_key(self) -> "SnowflakeConnector":
@@ -285,15 +379,15 @@ class SnowflakeConnector(
 
         return ConnectorStatus(status=True, details=self._get_status_details(1, True), error=None)
 
-    def get_connection_params(self) -> tuple[dict[str, str | int | None], Any | None]:
-        """Returns connection params and an optional private key file"""
-        params: dict[str, str | int | None] = {
+    def get_connection_params(self) -> dict[str, str | int | bytes | None]:
+        """Returns connection params"""
+        params: dict[str, str | int | bytes | None] = {
             "user": ImmutableSandboxedEnvironment().from_string(self.user).render(),
             "account": self.account,
             "authenticator": self.authentication_method,
             # hard Snowflake params
             "application": "ToucanToco",
-            "client_session_keep_alive_heartbeat_frequency": 59,
+            "client_session_keep_alive_heartbeat_frequency": _HEARTBEAT_FREQUENCY,
             "client_prefetch_threads": 5,
             "session_id": self.identifier,
         }
@@ -307,26 +401,20 @@ class SnowflakeConnector(
                 params["token"] = self.access_token
             params["authenticator"] = AuthenticationMethodValue.OAUTH
 
-        private_key_file = None
         if self.authentication_method == AuthenticationMethod.KEYPAIR:
             if self.private_key is None:
                 raise ValueError("private_key is required when the selected auth method is KeyPair")
 
-            private_key_file = NamedTemporaryFile(prefix="sf_private_key", delete=False)
-            sanitized = sanitize_spaces_pem(self.private_key.get_secret_value())
-            private_key_file.write(sanitized.encode())
-            private_key_file.seek(0)
-
-            params["private_key_file"] = private_key_file.name
+            params["private_key"] = _load_private_key(
+                self.private_key.get_secret_value(),
+                self.password.get_secret_value() if self.password is not None else None,
+            )
             params["authenticator"] = "SNOWFLAKE_JWT"
 
-            if self.password is not None:
-                params["private_key_file_pwd"] = self.password.get_secret_value()
-
         if self.role:
             params["role"] = self.role
 
-        return params, private_key_file
+        return params
 
     def _refresh_oauth_token(self):
         """Regenerates an oauth token.
@@ -378,10 +466,40 @@ class SnowflakeConnector(
             self._refresh_oauth_token()
             _LOGGER.info("Done refreshing OAuth token")
 
-        connect_args, private_key_file = self.get_connection_params()
-        return _snowflake_connection(
-            private_key_file=private_key_file,
-            connect_args=connect_args | {"database": database, "warehouse": warehouse},
+        connect_args = self._get_connect_args(database, warehouse)
+
+        def connect() -> "SnowflakeConnection":
+            sf_connector.paramstyle = "qmark"
+            return SnowflakeConnection(**connect_args)  # type:ignore[arg-type]
+
+        def alive(conn: "SnowflakeConnection") -> bool:
+            return conn.is_valid()
+
+        def close(conn: "SnowflakeConnection") -> None:
+            conn.close()
+
+        def reset(conn: "SnowflakeConnection") -> bool:
+            # Sessions whose database, warehouse, role or parameters may have been changed by a query (USE, SET,
+            # ALTER SESSION...) are closed, as the state of a session cannot be fully restored
+            return not is_session_changed(conn)
+
+        return connection_manager.checkout(
+            identifier=self._get_session_key(connect_args),
+            connect_method=connect,
+            alive_method=alive,
+            close_method=close,
+            reset_method=reset,
+        )
+
+    def _get_connect_args(self, database: str | None, warehouse: str | None) -> dict[str, str | int | bytes | None]:
+        return self.get_connection_params() | {"database": database, "warehouse": warehouse}
+
+    @staticmethod
+    def _get_session_key(connect_args: dict[str, str | int | bytes | None]) -> str:
+        # Sessions are reused by the requests with the same connector identifier, account, credentials (the user
+        # depends on the OAuth token), role, database and warehouse
+        return stable_digest(
+            {key: value.hex() if isinstance(value, bytes) else value for key, value in connect_args.items()}
         )
 
     def _set_warehouse(self, data_source: SnowflakeDataSource):
@@ -425,10 +543,12 @@ class SnowflakeConnector(
     ) -> "pd.DataFrame | list[dict]":
         def _execute(conn: SnowflakeConnection) -> pd.DataFrame | list[dict]:
             curs = conn.cursor(SfDictCursor)
-            query_result = curs.execute(query, parameters)
+            query_result = execute_tracked(self.name, curs, query, parameters)
             assert query_result is not None
+            if as_df and (table := fetch_arrow_table(query_result)) is not None:
+                return arrow_table_to_df(table)
             # snowflake typing is incomplete for DictCursor
-            results: list[dict] = query_result.fetchall()
+            results = cast(list[dict], query_result.fetchall())
             return pd.DataFrame(results) if as_df else results
 
         if snowflake_connection is not None:
@@ -436,6 +556,42 @@ class SnowflakeConnector(
         with self._get_connection(database=database, warehouse=warehouse) as conn:
             return _execute(conn)
 
+    def _execute_arrow_query(
+        self,
+        query: str,
+        parameters: dict | list[str] | None = None,
+        *,
+        warehouse: str | None = None,
+        database: str | None = None,
+    ) -> tuple["pa.Table", dict[str, str]]:
+        """Returns the results of the query and the types of its columns"""
+        with self._get_connection(database=database, warehouse=warehouse) as conn:
+            curs = conn.cursor(SfDictCursor)
+            query_result = execute_tracked(self.name, curs, query, parameters)
+            assert query_result is not None
+            column_types = get_column_types(query_result)
+            if (table := fetch_arrow_table(query_result)) is not None:
+                return table, column_types
+            # Results of statements such as SHOW are not in the Arrow format
+            return pa.Table.from_pandas(pd.DataFrame(query_result.fetchall()), preserve_index=False), column_types
+
+    def _iter_query_batches(
+        self,
+        query: str,
+        parameters: dict | list[str] | None,
+        batch_size: int,
+        *,
+        warehouse: str | None = None,
+        database: str | None = None,
+    ) -> Iterator["pd.DataFrame"]:
+        # The connection is kept open until the iterator is exhausted or closed
+        with self._get_connection(database=database, warehouse=warehouse) as conn:
+            curs = conn.cursor(SfDictCursor)
+            query_result = execute_tracked(self.name, curs, query, parameters)
+            assert query_result is not None
+            for table in iter_arrow_batches(query_result, batch_size):
+                yield arrow_table_to_df(table)
+
     def _describe_query(self, query: str) -> dict[str, str]:
         with self._get_connection() as conn:
             curs = conn.cursor(SfDictCursor)
@@ -475,9 +631,121 @@ class SnowflakeConnector(
             warehouse=data_source.warehouse,
         )
 
+    def _fetch_arrow(
+        self,
+        data_source: SnowflakeDataSource,
+        offset: int | None = None,
+        limit: int | None = None,
+    ) -> tuple["pa.Table", dict[str, str]]:
+        data_source = self._set_warehouse(data_source)
+
+        prepared_query, prepared_params = SqlQueryHelper.prepare_limit_query(
+            data_source.query, data_source.parameters, offset=offset, limit=limit
+        )
+        return self._execute_arrow_query(
+            prepared_query,
+            prepared_params,
+            database=data_source.database,
+            warehouse=data_source.warehouse,
+        )
+
     def _retrieve_data(self, data_source: SnowflakeDataSource) -> "pd.DataFrame":
         return self._fetch_data(data_source)
 
+    def _retrieve_arrow(self, data_source: SnowflakeDataSource) -> "pa.Table":
+        table, _ = self._fetch_arrow(data_source)
+        return table
+
+    def _retrieve_batches(self, data_source: SnowflakeDataSource, batch_size: int) -> Iterator["pd.DataFrame"]:
+        data_source = self._set_warehouse(data_source)
+        prepared_query, prepared_params = SqlQueryHelper.prepare_query(data_source.query, data_source.parameters)
+        yield from self._iter_query_batches(
+            prepared_query,
+            prepared_params,
+            batch_size,
+            database=data_source.database,
+            warehouse=data_source.warehouse,
+        )
+
+    def _submit_query(
+        self,
+        query: str,
+        parameters: dict | list[str] | None,
+        *,
+        warehouse: str | None = None,
+        database: str | None = None,
+    ) -> _QueryResult:
+        with self._get_connection(database=database, warehouse=warehouse) as conn:
+            curs = conn.cursor()
+            query_id = execute_async_tracked(self.name, curs, query, parameters)
+            return _QueryResult(
+                query_id=query_id,
+                batches=curs.get_result_batches() or [],
+                column_types=get_column_types(curs),
+                expires_at=time.monotonic() + _QUERY_RESULT_TTL,
+            )
+
+    def _read_query_result(
+        self,
+        result: _QueryResult,
+        offset: int,
+        limit: int | None,
+        *,
+        warehouse: str | None = None,
+        database: str | None = None,
+    ) -> "pa.Table":
+        """Rows of a page, downloaded from the batches of the result, or read with RESULT_SCAN"""
+        if all(isinstance(batch, ArrowResultBatch) for batch in result.batches):
+            try:
+                return slice_result_batches(result.batches, offset, limit, list(result.column_types))
+            except Exception:
+                _LOGGER.warning(f"Could not download the results of query {result.query_id}", exc_info=True)
+
+        page_query, page_params = SqlQueryHelper.prepare_limit_query(
+            f"SELECT * FROM TABLE(RESULT_SCAN('{result.query_id}'))",  # noqa: S608
+            offset=offset,
+            limit=limit,
+        )
+        table, _ = self._execute_arrow_query(page_query, page_params, database=database, warehouse=warehouse)
+        return table
+
+    def _get_slice_from_query_result(
+        self, data_source: SnowflakeDataSource, offset: int, limit: int | None
+    ) -> DataSlice:
+        data_source = self._set_warehouse(data_source)
+        query, parameters = SqlQueryHelper.prepare_query(data_source.query, data_source.parameters)
+        key = stable_digest(
+            {
+                "session": self._get_session_key(self._get_connect_args(data_source.database, data_source.warehouse)),
+                "query": query,
+                "parameters": parameters,
+            }
+        )
+        result = query_results.get(key)
+        if result is None:
+            result = _query_flights.do(
+                key,
+                self._submit_query,
+                query,
+                parameters,
+                database=data_source.database,
+                warehouse=data_source.warehouse,
+            )
+            query_results.set(key, result)
+
+        table = self._read_query_result(
+            result, offset, limit, database=data_source.database, warehouse=data_source.warehouse
+        )
+        df = table.to_pandas()
+        return DataSlice(
+            df=df,
+            pagination_info=build_pagination_info(
+                offset=offset, limit=limit, total_rows=result.total_rows, retrieved_rows=len(df)
+            ),
+            query_metadata=QueryMetadata(columns=result.column_types),
+            table=table,
+        )
+
     def get_slice(
         self,
         data_source: SnowflakeDataSource,
@@ -487,10 +755,15 @@ class SnowflakeConnector(
         get_row_count: bool | None = False,
     ) -> DataSlice:
         # We assume permissions have been applied earlier
-        df = self._fetch_data(data_source, offset=offset, limit=limit)
+        if self.paginate_from_query_results:
+            return self._get_slice_from_query_result(data_source, offset, limit)
+        table, column_types = self._fetch_arrow(data_source, offset=offset, limit=limit)
+        df = table.to_pandas()
         return DataSlice(
             df=df,
             pagination_info=build_pagination_info(offset=0, limit=limit, total_rows=None, retrieved_rows=len(df)),
+            query_metadata=QueryMetadata(columns=column_types),
+            table=table,
         )
 
     def describe(self, data_source: SnowflakeDataSource) -> dict[str, str]:
@@ -503,10 +776,24 @@ class SnowflakeConnector(
         return {
             "warehouse": data_source.warehouse,
             "database": data_source.database,
-            "query": prepared_query,
+            "query": normalize_query(prepared_query),
             "parameters": prepared_query_parameters,
         }
 
+    def _get_database_model(self, database: str) -> list[tuple]:
+        rows = self._execute_query(
+            build_database_model_extraction_query(database), warehouse=self.default_warehouse, as_df=False
+        )
+        return [tuple(row.values()) for row in rows]
+
+    def _extract_model(self, db_name: str | None) -> tuple[list[TableInfo], list[str]]:
+        databases = self._get_databases() if db_name is None else [db_name]
+        # Information schemas are fully qualified, so the databases share the sessions of the default warehouse
+        values, failed_databases = extract_databases_model(
+            databases, self._get_database_model, max_concurrency=self.catalog_max_concurrency
+        )
+        return self.format_db_model(values), failed_databases
+
     def get_model(
         self,
         db_name: str | None = None,
@@ -514,25 +801,18 @@ class SnowflakeConnector(
         table_name: str | None = None,
         exclude_columns: bool = False,
     ) -> list[TableInfo]:
-        if db_name is None:
-            databases = self._get_databases()
-        else:
-            databases = [db_name]
-
-        # We need to execute the query for every database in case None is specified
-        values: list[tuple] = []
-        for db in databases:
-            with self._get_connection(database=db, warehouse=self.default_warehouse) as conn:
-                values.extend(
-                    [
-                        tuple(elem.values())
-                        for elem in self._execute_query(
-                            _DB_MODEL_EXTRACTION_QUERY,
-                            database=db_name,
-                            as_df=False,
-                            snowflake_connection=conn,
-                        )
-                    ]
-                )
+        tables_info, _ = self._extract_model(db_name)
+        return tables_info
 
-        return self.format_db_model(values)
+    def get_model_with_info(
+        self,
+        db_name: str | None = None,
+        schema_name: str | None = None,
+        table_name: str | None = None,
+        exclude_columns: bool = False,
+    ) -> tuple[list[TableInfo], dict]:
+        tables_info, failed_databases = self._extract_model(db_name)
+        metadata = {}
+        if failed_databases:
+            metadata["info"] = {"Could not reach databases": failed_databases}
+        return tables_info, metadata
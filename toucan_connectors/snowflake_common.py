@@ -1,19 +1,34 @@
 import concurrent
 import json
 import logging
+import time
+import weakref
+from collections.abc import Callable, Iterator
+from contextvars import copy_context
+from functools import partial
 from timeit import default_timer as timer
-from typing import TYPE_CHECKING, Annotated, Any
+from typing import TYPE_CHECKING, Annotated
 
 from pydantic import Field, StringConstraints
 
+from toucan_connectors.common import arrow_table_to_df
 from toucan_connectors.pagination import build_pagination_info
-from toucan_connectors.query_manager import QueryManager
+from toucan_connectors.query_manager import get_query_manager
 from toucan_connectors.sql_query_helper import SqlQueryHelper
-from toucan_connectors.toucan_connector import DataSlice, DataStats, QueryMetadata, ToucanDataSource
+from toucan_connectors.sql_rewriter import tokenize
+from toucan_connectors.toucan_connector import DataSlice, DataStats, QueryMetadata, ToucanDataSource, run_batch
 
 if TYPE_CHECKING:  # pragma: no cover
     import pandas as pd
+    import pyarrow as pa
     from snowflake.connector import SnowflakeConnection
+    from snowflake.connector.cursor import SnowflakeCursor, SnowflakeCursorBase
+    from snowflake.connector.result_batch import ResultBatch
+
+_LOGGER = logging.getLogger(__name__)
+
+# Default number of databases whose model is extracted concurrently
+CATALOG_MAX_CONCURRENCY = 4
 
 type_code_mapping = {
     0: "float",
@@ -60,23 +75,209 @@ class SfDataSource(ToucanDataSource):
     language: str = Field("sql", **{"ui.hidden": True})
 
 
-def build_database_model_extraction_query() -> str:
-    return """SELECT t.table_catalog AS database, t.table_schema AS schema,
+def fetch_arrow_table(cursor: "SnowflakeCursorBase") -> "pa.Table | None":
+    """Fetches the results of an executed query as an Arrow table.
+
+    Returns None if the results are not in the Arrow format, which is the case
+    of SHOW or USE statements for example.
+    """
+    from snowflake.connector.errors import NotSupportedError
+
+    try:
+        return cursor.fetch_arrow_all(force_return_table=True)
+    except NotSupportedError:
+        return None
+
+
+def iter_arrow_batches(cursor: "SnowflakeCursorBase", batch_size: int) -> Iterator["pa.Table"]:
+    """Fetches the results of an executed query as Arrow tables of at most `batch_size` rows.
+
+    The result chunks are downloaded ahead by the `client_prefetch_threads` of the connection.
+    Results which are not in the Arrow format (e.g. of SHOW statements) are fetched `batch_size` rows at a time.
+    """
+    import pyarrow as pa
+    from snowflake.connector.errors import NotSupportedError
+
+    try:
+        batches = cursor.fetch_arrow_batches()
+    except NotSupportedError:
+        while rows := cursor.fetchmany(batch_size):
+            yield pa.Table.from_pylist(rows)
+        return
+
+    empty = True
+    for batch in batches:
+        for offset in range(0, batch.num_rows, batch_size):
+            empty = False
+            yield batch.slice(offset, batch_size)
+    if empty:
+        # Keeps the columns of empty results
+        yield pa.table({column.name: pa.nulls(0) for column in cursor.description or []})
+
+
+def get_column_types(cursor: "SnowflakeCursorBase") -> dict[str, str]:
+    """Types of the columns of an executed query, from its description"""
+    return {column.name: type_code_mapping.get(column.type_code) for column in cursor.description or []}
+
+
+# In seconds, between the checks of the status of a query executed asynchronously
+_ASYNC_POLL_INTERVALS = (0.5, 0.5, 1, 1.5, 2, 4, 5)
+
+
+# Statements which may change the state of their session: its database, warehouse, role, parameters, variables,
+# transaction or temporary objects
+_SESSION_STATEMENT_WORDS = ("use", "set", "unset", "alter", "begin", "start", "create", "call", "execute")
+
+# Sessions in which a statement changing their state was executed
+_changed_sessions: "weakref.WeakSet[SnowflakeConnection]" = weakref.WeakSet()
+
+
+def may_change_session(query: str) -> bool:
+    """Whether `query` has a statement which may change the state of its session"""
+    statement_start = True
+    for token in tokenize(query):
+        if not token.is_significant or token.depth > 0:
+            continue
+        if statement_start and token.is_word(*_SESSION_STATEMENT_WORDS):
+            return True
+        statement_start = token.value == ";"
+    return False
+
+
+def is_session_changed(connection: "SnowflakeConnection") -> bool:
+    """Whether a query executed with `execute_tracked` or `execute_async_tracked` may have changed the state of the
+    session of `connection`, which should then not be reused by other requests"""
+    return connection in _changed_sessions
+
+
+def _record_session_change(connection: "SnowflakeConnection", query: str) -> None:
+    if may_change_session(query):
+        _changed_sessions.add(connection)
+
+
+def _cancel_session_queries(connection: "SnowflakeConnection") -> None:
+    # Ids are inlined, the connections using either the qmark or the pyformat paramstyle
+    connection.cursor().execute(f"SELECT SYSTEM$CANCEL_ALL_QUERIES({int(connection.session_id)})")
+
+
+def _cancel_query(connection: "SnowflakeConnection", query_id: str) -> None:
+    connection.cursor().execute(f"SELECT SYSTEM$CANCEL_QUERY('{query_id}')")
+
+
+def execute_tracked[C: "SnowflakeCursorBase"](
+    connector: str, cursor: C, query: str, parameters: dict | list | None = None
+) -> C | None:
+    """Executes `query` with `cursor`, tracked by `get_query_manager()`.
+
+    The id of a query executed synchronously is only known once it is done, so cancelling it cancels the
+    queries of its session, which is not shared with other requests.
+    """
+    connection = cursor.connection
+    _record_session_change(connection, query)
+    with get_query_manager().track(connector, query) as running_query:
+        running_query.set_backend_query(str(connection.session_id), partial(_cancel_session_queries, connection))
+        result = cursor.execute(query, parameters)
+        running_query.backend_query_id = cursor.sfqid
+        return result
+
+
+def execute_async_tracked(
+    connector: str, cursor: "SnowflakeCursor", query: str, parameters: dict | list | None = None
+) -> str:
+    """Submits `query` with `cursor.execute_async`, tracked by `get_query_manager()`, and waits for its results,
+    which are then available in `cursor`. Returns the id of the query.
+
+    Unlike `execute_tracked`, the id of the query is known while it runs, so cancelling it only cancels this query.
+    """
+    connection = cursor.connection
+    _record_session_change(connection, query)
+    with get_query_manager().track(connector, query) as running_query:
+        cursor.execute_async(query, parameters)
+        query_id = cursor.sfqid
+        running_query.set_backend_query(query_id, partial(_cancel_query, connection, query_id))
+        attempt = 0
+        while connection.is_still_running(connection.get_query_status_throw_if_error(query_id)):
+            time.sleep(_ASYNC_POLL_INTERVALS[min(attempt, len(_ASYNC_POLL_INTERVALS) - 1)])
+            attempt += 1
+        cursor.query_result(query_id)
+        return query_id
+
+
+def slice_result_batches(
+    batches: list["ResultBatch"], offset: int, limit: int | None, column_names: list[str]
+) -> "pa.Table":
+    """Rows [offset, offset + limit) of a query result, downloading only the Arrow batches containing them"""
+    import pyarrow as pa
+
+    tables: list[pa.Table] = []
+    first_row = None
+    batch_start = 0
+    for batch in batches:
+        batch_end = batch_start + batch.rowcount
+        if batch_end > offset and (limit is None or batch_start < offset + limit):
+            if first_row is None:
+                first_row = batch_start
+            tables.append(batch.to_arrow())
+        batch_start = batch_end
+
+    if not tables:
+        # Keeps the columns of empty results
+        return pa.table({name: pa.nulls(0) for name in column_names})
+    return pa.concat_tables(tables).slice(offset - first_row, limit)
+
+
+def build_database_model_extraction_query(database: str | None = None) -> str:
+    """Query listing the tables of `database`, or of the database of the session.
+
+    With a database, its information schema is fully qualified, so the query can be executed by any session.
+    """
+    information_schema = "information_schema"
+    if database is not None:
+        quoted_database = database.replace('"', '""')
+        information_schema = f'"{quoted_database}".information_schema'
+    return f"""SELECT t.table_catalog AS database, t.table_schema AS schema,
     CASE WHEN t.table_type = 'BASE TABLE' THEN 'table' ELSE lower(t.table_type) END AS type,
     t.table_name AS name,
     ARRAY_AGG(object_construct('name', c.column_name, 'type', c.data_type)) AS columns
     FROM
-        information_schema.tables t
-    INNER JOIN information_schema.columns c ON
+        {information_schema}.tables t
+    INNER JOIN {information_schema}.columns c ON
         t.table_name = c.table_name AND t.table_schema = c.table_schema
     WHERE t.table_type IN ('BASE TABLE', 'VIEW')
     AND t.table_schema NOT IN  ('PG_CATALOG', 'INFORMATION_SCHEMA', 'PG_INTERNAL')
     AND t.table_name NOT IN ('LOAD_HISTORY')
-    GROUP BY t.table_catalog, t.table_schema, t.table_name, t.table_type;"""
+    GROUP BY t.table_catalog, t.table_schema, t.table_name, t.table_type;"""  # noqa: S608
+
+
+def extract_databases_model[T](
+    databases: list[str], extract: Callable[[str], list[T]], max_concurrency: int = CATALOG_MAX_CONCURRENCY
+) -> tuple[list[T], list[str]]:
+    """Calls `extract(database)` for each database, `max_concurrency` at a time.
+
+    Returns the extracted rows, and the databases whose extraction failed.
+    If the extraction of every database failed, the error of the first one is raised.
+    """
+    results = run_batch([partial(extract, database) for database in databases], max_concurrency=max_concurrency)
+    rows: list[T] = []
+    failed_databases: list[str] = []
+    for database, result in zip(databases, results, strict=True):
+        if result.ok:
+            rows.extend(result.result or [])
+        else:
+            _LOGGER.warning(
+                f"Could not extract the model of database {database}: {result.error}", exc_info=result.error
+            )
+            failed_databases.append(database)
+    if results and len(failed_databases) == len(results):
+        assert results[0].error is not None
+        raise results[0].error
+    return rows, failed_databases
 
 
 class SnowflakeCommon:
-    def __init__(self):
+    def __init__(self, connector: str = "snowflake"):
+        # Name of the connector, reported to the query manager
+        self.connector = connector
         self.logger = logging.getLogger(__name__)
         self.data: pd.DataFrame
         self.total_rows_count: int | None = -1
@@ -87,6 +288,8 @@ class SnowflakeCommon:
         self.data_filtered_from_permission_time: float | None = None
         self.compute_stats_time: float | None = None
         self.column_names_and_types: dict[str, str] | None = None
+        # Column types of the executed queries, by query
+        self._column_types: dict[str, dict[str, str]] = {}
 
     def set_data(self, data):
         self.data = data.result()
@@ -104,7 +307,7 @@ class SnowflakeCommon:
         self.data_conversion_time = data_conversion_time
 
     def _execute_query(self, connection, query: str, query_parameters: dict | None = None):
-        return QueryManager().execute(
+        return get_query_manager().execute(
             execute_method=self._execute_query_internal,
             connection=connection,
             query=query,
@@ -122,7 +325,8 @@ class SnowflakeCommon:
 
         execution_start = timer()
         cursor = connection.cursor(DictCursor)
-        query_res = cursor.execute(query, query_parameters)
+        query_res = execute_tracked(self.connector, cursor, query, query_parameters)
+        self._column_types[query] = get_column_types(cursor)
 
         query_generation_time = timer() - execution_start
         self.logger.info(
@@ -138,8 +342,11 @@ class SnowflakeCommon:
         )
         self.set_query_generation_time(query_generation_time)
         convert_start = timer()
-        # Here call our customized fetch
-        values = DataFrame.from_dict(query_res.fetchall())
+        table = fetch_arrow_table(query_res)
+        if table is not None:
+            values = arrow_table_to_df(table)
+        else:
+            values = DataFrame.from_dict(query_res.fetchall())
 
         data_conversion_time = timer() - convert_start
         self.logger.info(
@@ -184,7 +391,9 @@ class SnowflakeCommon:
             prepared_query, prepared_query_parameters = SqlQueryHelper.prepare_limit_query(
                 query, query_parameters, offset, limit
             )
+            # Runs the queries in the context of the caller, e.g. its `query_context`
             future_1 = executor.submit(
+                copy_context().run,
                 self._execute_query,
                 connection,
                 prepared_query,
@@ -199,6 +408,7 @@ class SnowflakeCommon:
                     prepared_query_parameters_count,
                 ) = SqlQueryHelper.prepare_count_query(query, query_parameters)
                 future_2 = executor.submit(
+                    copy_context().run,
                     self._execute_query,
                     connection,
                     prepared_query_count,
@@ -211,6 +421,7 @@ class SnowflakeCommon:
                     raise future.exception()
                 else:
                     self.logger.info("query finish")
+            self.column_names_and_types = self._column_types.get(prepared_query)
 
         if run_count_request:
             total_rows = self.total_rows_count
@@ -230,6 +441,14 @@ class SnowflakeCommon:
             ),
         )
 
+    def _use_database_and_warehouse(self, connection: "SnowflakeConnection", data_source: SfDataSource):
+        if data_source.database != connection.database:
+            self.logger.info(f"Connection changed to use database {connection.database}")
+            self._execute_query(connection, f"USE DATABASE {data_source.database}")
+        if data_source.warehouse and data_source.warehouse != connection.warehouse:
+            self.logger.info(f"Connection changed to use  warehouse {connection.warehouse}")
+            self._execute_query(connection, f"USE WAREHOUSE {data_source.warehouse}")
+
     def fetch_data(
         self,
         connection: "SnowflakeConnection",
@@ -239,12 +458,7 @@ class SnowflakeCommon:
         get_row_count: bool = False,
     ) -> DataSlice:
         extraction_start = timer()
-        if data_source.database != connection.database:
-            self.logger.info(f"Connection changed to use database {connection.database}")
-            self._execute_query(connection, f"USE DATABASE {data_source.database}")
-        if data_source.warehouse and data_source.warehouse != connection.warehouse:
-            self.logger.info(f"Connection changed to use  warehouse {connection.warehouse}")
-            self._execute_query(connection, f"USE WAREHOUSE {data_source.warehouse}")
+        self._use_database_and_warehouse(connection, data_source)
 
         ds = self._execute_parallelized_queries(
             connection, data_source.query, data_source.parameters, offset, limit, get_row_count
@@ -253,6 +467,19 @@ class SnowflakeCommon:
 
         return ds
 
+    def iter_batches(
+        self, connection: "SnowflakeConnection", data_source: SfDataSource, batch_size: int
+    ) -> Iterator["pd.DataFrame"]:
+        """Streams the results of the query as dataframes of at most `batch_size` rows"""
+        from snowflake.connector import DictCursor
+
+        self._use_database_and_warehouse(connection, data_source)
+        query, query_parameters = SqlQueryHelper.prepare_query(data_source.query, data_source.parameters)
+        cursor = connection.cursor(DictCursor)
+        execute_tracked(self.connector, cursor, query, query_parameters)
+        for table in iter_arrow_batches(cursor, batch_size):
+            yield arrow_table_to_df(table)
+
     def retrieve_data(
         self, connection: "SnowflakeConnection", data_source: SfDataSource, get_row_count: bool = None
     ) -> "pd.DataFrame":
@@ -302,7 +529,7 @@ class SnowflakeCommon:
         return list(res.values()) if res else []
 
     def describe(self, connection, query):
-        return QueryManager().describe(
+        return get_query_manager().describe(
             describe_method=self._describe,
             connection=connection,
             query=query,
@@ -335,6 +562,6 @@ class SnowflakeCommon:
         res = {r.name: type_code_mapping.get(r.type_code) for r in describe_res}
         return res
 
-    def get_db_content(self, connection: "SnowflakeConnection") -> list[dict[str, Any]]:
-        query = build_database_model_extraction_query()
+    def get_db_content(self, connection: "SnowflakeConnection", database: str | None = None) -> "pd.DataFrame":
+        query = build_database_model_extraction_query(database)
         return self._execute_query(connection, query)
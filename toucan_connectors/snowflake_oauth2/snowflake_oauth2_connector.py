@@ -1,9 +1,9 @@
-import concurrent
 import logging
 import uuid
-from contextlib import suppress
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, suppress
 from timeit import default_timer as timer
-from typing import Any
+from typing import Any, cast
 
 from pydantic import Field, PrivateAttr, create_model
 
@@ -15,9 +15,10 @@ from toucan_connectors.oauth2_connector.oauth2connector import (
 )
 from toucan_connectors.snowflake.snowflake_connector import AuthenticationMethod
 from toucan_connectors.snowflake_common import (
+    CATALOG_MAX_CONCURRENCY,
     SfDataSource,
     SnowflakeCommon,
-    build_database_model_extraction_query,
+    extract_databases_model,
 )
 from toucan_connectors.toucan_connector import (
     Category,
@@ -109,6 +110,12 @@ class SnowflakeoAuth2Connector(ToucanConnector, data_source_model=SnowflakeoAuth
     )
     default_warehouse: str = Field(..., description="The default warehouse that shall be used for any data source")
     category: Category = Field(Category.SNOWFLAKE, title="category", **{"ui": {"checkbox": False}})  # type: ignore[call-overload]
+    catalog_max_concurrency: int = Field(  # type: ignore[call-overload]
+        CATALOG_MAX_CONCURRENCY,
+        ge=1,
+        description="Number of databases whose tables are listed concurrently",
+        **{"ui.hidden": True},
+    )
 
     def __init__(self, **kwargs):
         super().__init__(**{k: v for k, v in kwargs.items() if k != "secrets_keeper"})
@@ -136,7 +143,9 @@ class SnowflakeoAuth2Connector(ToucanConnector, data_source_model=SnowflakeoAuth
     def get_access_token(self):
         return self._oauth2_connector.get_access_token()
 
-    def _get_connection(self, database: str | None = None, warehouse: str | None = None) -> "SnowflakeConnection":
+    def _get_connection(
+        self, database: str | None = None, warehouse: str | None = None
+    ) -> AbstractContextManager["SnowflakeConnection"]:
         def connect_function() -> "SnowflakeConnection":
             _LOGGER.info("Connect at Snowflake")
             token_start = timer()
@@ -209,16 +218,15 @@ class SnowflakeoAuth2Connector(ToucanConnector, data_source_model=SnowflakeoAuth
                     raise TypeError("close is not a function") from exc
 
         assert connection_manager is not None
-        connection: SnowflakeConnection = connection_manager.get(
+        return connection_manager.checkout(
             identifier=f"{self.get_identifier()}{database}{warehouse}",
             connect_method=connect_function,
             alive_method=alive_function,
             close_method=close_function,
-            save=True if database and warehouse else False,
+            # Sessions of a warehouse without database are used to list the tables of all the databases
+            save=True if warehouse else False,
         )
 
-        return connection
-
     def get_identifier(self):
         json_uid = JsonWrapper.dumps(
             {
@@ -254,9 +262,14 @@ class SnowflakeoAuth2Connector(ToucanConnector, data_source_model=SnowflakeoAuth
 
     def _retrieve_data(self, data_source: SnowflakeoAuth2DataSource) -> "pd.DataFrame":
         with self._get_connection(database=data_source.database, warehouse=data_source.warehouse) as connection:
-            result = SnowflakeCommon().retrieve_data(connection, data_source)
+            result = SnowflakeCommon(connector=self.name).retrieve_data(connection, data_source)
         return result
 
+    def _retrieve_batches(self, data_source: SnowflakeoAuth2DataSource, batch_size: int) -> Iterator["pd.DataFrame"]:
+        # The connection is checked out until the iterator is exhausted or closed
+        with self._get_connection(database=data_source.database, warehouse=data_source.warehouse) as connection:
+            yield from SnowflakeCommon(connector=self.name).iter_batches(connection, data_source, batch_size)
+
     def get_slice(
         self,
         data_source: SnowflakeoAuth2DataSource,
@@ -266,7 +279,7 @@ class SnowflakeoAuth2Connector(ToucanConnector, data_source_model=SnowflakeoAuth
         get_row_count: bool | None = False,
     ) -> DataSlice:
         with self._get_connection(database=data_source.database, warehouse=data_source.warehouse) as connection:
-            result = SnowflakeCommon().get_slice(
+            result = SnowflakeCommon(connector=self.name).get_slice(
                 connection,
                 data_source,
                 offset=offset,
@@ -285,9 +298,11 @@ class SnowflakeoAuth2Connector(ToucanConnector, data_source_model=SnowflakeoAuth
     def get_connection_manager():
         return connection_manager
 
-    def _get_connection_and_db_content(self, database: str, db_contents: list[dict[str, Any]]):
-        with self._get_connection(database=database, warehouse=self.default_warehouse) as connection:
-            db_contents += SnowflakeCommon().get_db_content(connection).to_dict("records")  # type: ignore
+    def _get_db_content(self, database: str) -> list[dict[str, Any]]:
+        with self._get_connection(warehouse=self.default_warehouse) as connection:
+            db_content = SnowflakeCommon(connector=self.name).get_db_content(connection, database)
+            # Column names of the db content query are strings
+            return cast(list[dict[str, Any]], db_content.to_dict("records"))
 
     def get_model(
         self,
@@ -298,15 +313,7 @@ class SnowflakeoAuth2Connector(ToucanConnector, data_source_model=SnowflakeoAuth
     ) -> list[TableInfo]:
         with self._get_connection() as connection:
             databases = SnowflakeCommon().get_databases(connection=connection)
-        content_queries = []
-        for _ in databases:
-            content_queries.append(build_database_model_extraction_query())
-        db_contents: list[dict[str, Any]] = []
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            futures = [executor.submit(self._get_connection_and_db_content, db, db_contents) for db in databases]
-            for future in concurrent.futures.as_completed(futures):
-                if future.exception():
-                    raise future.exception()  # type: ignore[misc]
-                else:
-                    _LOGGER.info("query finished")
+        db_contents, _ = extract_databases_model(
+            databases, self._get_db_content, max_concurrency=self.catalog_max_concurrency
+        )
         return DiscoverableConnector.format_db_model(db_contents)
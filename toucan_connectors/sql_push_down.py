@@ -0,0 +1,314 @@
+import asyncio
+import datetime
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from functools import partial
+from typing import TYPE_CHECKING, Any, ClassVar
+
+from toucan_connectors.common import nosql_apply_parameters_to_query
+from toucan_connectors.pagination import build_pagination_info
+from toucan_connectors.sql_rewriter import (
+    DEFAULT_DIALECT,
+    SqlDialect,
+    build_bounds_query,
+    build_count_query,
+    build_filtered_query,
+    build_slice_query,
+    normalize_query,
+)
+from toucan_connectors.sql_translator import SqlConditionTranslator
+from toucan_connectors.toucan_connector import (
+    BATCH_MAX_CONCURRENCY,
+    DEFAULT_BATCH_SIZE,
+    DataSlice,
+    DataStats,
+    run_batch,
+)
+
+if TYPE_CHECKING:  # pragma: no cover
+    import pandas as pd
+    import pyarrow as pa
+
+PartitionBound = int | datetime.date | datetime.datetime
+
+
+def _as_datetime(value: datetime.date, tzinfo: datetime.tzinfo | None) -> datetime.datetime:
+    if isinstance(value, datetime.datetime):
+        return value
+    return datetime.datetime.combine(value, datetime.time(), tzinfo=tzinfo)
+
+
+def split_partition_range(lower: PartitionBound, upper: PartitionBound, partitions: int) -> list[PartitionBound]:
+    """The values splitting the range from `lower` to `upper` into at most `partitions` ranges of equal size
+
+    Integer ranges are split on integers, and date ranges on days. A date bound of a timestamp range
+    stands for the start of the day, in the timezone of the other bound.
+    """
+    if partitions < 1:
+        raise ValueError(f"partitions must be positive, got {partitions}")
+    if isinstance(lower, datetime.datetime) and isinstance(upper, datetime.date):
+        upper = _as_datetime(upper, lower.tzinfo)
+    elif isinstance(upper, datetime.datetime) and isinstance(lower, datetime.date):
+        lower = _as_datetime(lower, upper.tzinfo)
+    if isinstance(lower, bool) or type(lower) is not type(upper):
+        raise TypeError(f"Cannot partition a range from {lower!r} to {upper!r}")
+    if isinstance(lower, int):
+        span = upper - lower + 1  # type: ignore[operator]
+        boundaries = [lower + span * i // partitions for i in range(1, partitions)]
+    elif isinstance(lower, datetime.date):
+        span = upper - lower  # type: ignore[operator]
+        boundaries = [lower + span * i / partitions for i in range(1, partitions)]
+    else:
+        raise TypeError(f"Cannot partition a range from {lower!r} to {upper!r}")
+    return sorted({boundary for boundary in boundaries if lower < boundary <= upper})
+
+
+def _as_partition_bound(value: Any) -> PartitionBound | None:
+    """Converts a bound read by pandas (e.g. a numpy integer or a timestamp) to a python value"""
+    import pandas as pd
+
+    if value is None or value is pd.NaT or (isinstance(value, float) and value != value):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+class SqlPushDownMixin:
+    """Applies the permissions and the pagination of the requests in the database.
+
+    Meant for SQL connectors, and must come before `ToucanConnector` in their bases.
+    The connector's `_retrieve_data` is called with a copy of the data source, whose query
+    is rewritten in `_sql_dialect` to select only the allowed rows, or the rows of the slice.
+    Permission values are bound as query parameters.
+    """
+
+    _sql_dialect: ClassVar[SqlDialect] = DEFAULT_DIALECT
+
+    def _can_push_down_pagination(self, query: str) -> bool:
+        """Whether the query can be rewritten to be paginated by the database"""
+        return True
+
+    def _can_push_down_permissions(self, query: str) -> bool:
+        """Whether the query can be rewritten to be filtered by the database"""
+        return True
+
+    def _push_down_permissions(self, data_source: Any, permissions: dict | None) -> tuple[Any, dict | None]:
+        """Returns the data source with the permissions applied in its query, and the permissions left to apply"""
+        query = getattr(data_source, "query", None)
+        if permissions is None or not query or not self._can_push_down_permissions(query):
+            return data_source, permissions
+
+        condition = nosql_apply_parameters_to_query(permissions, data_source.parameters)
+        try:
+            sql_condition, parameters = SqlConditionTranslator.for_dialect(self._sql_dialect).translate_to_sql(
+                condition
+            )
+        except NotImplementedError:
+            return data_source, permissions
+
+        filtered_query = build_filtered_query(query, sql_condition, dialect=self._sql_dialect)
+        if filtered_query is None:
+            return data_source, permissions
+        filtered_data_source = data_source.model_copy(
+            update={"query": filtered_query, "parameters": {**(data_source.parameters or {}), **parameters}}
+        )
+        return filtered_data_source, None
+
+    def _get_unique_datasource_identifier(self, data_source: Any) -> dict:
+        identifier = super()._get_unique_datasource_identifier(data_source)  # type: ignore[misc]
+        # Queries differing only by their formatting share their cache key
+        if isinstance(identifier.get("query"), str):
+            identifier["query"] = normalize_query(identifier["query"], dialect=self._sql_dialect)
+        return identifier
+
+    def _retrieve_data_with_query(self, data_source: Any, query: str) -> "pd.DataFrame":
+        return self._retrieve_data(data_source.model_copy(update={"query": query}))  # type: ignore[attr-defined]
+
+    def get_df(self, data_source: Any, permissions: dict | None = None) -> "pd.DataFrame":
+        data_source, permissions = self._push_down_permissions(data_source, permissions)
+        return super().get_df(data_source, permissions)  # type: ignore[misc]
+
+    def get_arrow(self, data_source: Any, permissions: dict | None = None) -> "pa.Table":
+        data_source, permissions = self._push_down_permissions(data_source, permissions)
+        return super().get_arrow(data_source, permissions)  # type: ignore[misc]
+
+    def iter_batches(
+        self, data_source: Any, permissions: dict | None = None, batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> Iterator["pd.DataFrame"]:
+        data_source, permissions = self._push_down_permissions(data_source, permissions)
+        return super().iter_batches(data_source, permissions, batch_size)  # type: ignore[misc]
+
+    def get_partitioned_df(
+        self,
+        data_source: Any,
+        partition_column: str,
+        partitions: int,
+        permissions: dict | None = None,
+        lower_bound: PartitionBound | None = None,
+        upper_bound: PartitionBound | None = None,
+        max_concurrency: int = BATCH_MAX_CONCURRENCY,
+    ) -> "pd.DataFrame":
+        """Same as `get_df`, reading the data in `partitions` queries executed in parallel.
+
+        The range of the integer, date or timestamp `partition_column`, from the minimum to the maximum value
+        returned by the query unless `lower_bound` and `upper_bound` are given, is split into ranges of equal
+        size, each of them read by a query filtered on it. The first and the last ones are open, and the last
+        one also reads the NULL values, so that no row is missed. At most `max_concurrency` queries run at once.
+        Rows are returned partition by partition, and the ORDER BY clause of the query is not applied within
+        partitions.
+        """
+        import pandas as pd
+
+        if partitions < 1:
+            raise ValueError(f"partitions must be positive, got {partitions}")
+        data_source, permissions = self._push_down_permissions(data_source, permissions)
+        query = getattr(data_source, "query", None)
+        bounds_query = build_bounds_query(query, partition_column, dialect=self._sql_dialect) if query else None
+        if bounds_query is None:
+            raise ValueError("Only SELECT queries can be partitioned")
+
+        if lower_bound is None or upper_bound is None:
+            bounds = self._retrieve_data_with_query(data_source, bounds_query)
+            lower_bound = _as_partition_bound(bounds.iloc[0, 0]) if lower_bound is None else lower_bound
+            upper_bound = _as_partition_bound(bounds.iloc[0, 1]) if upper_bound is None else upper_bound
+        if lower_bound is None or upper_bound is None:
+            # The query returns no row, or only NULL values in the partition column
+            boundaries: list[PartitionBound] = []
+        else:
+            boundaries = split_partition_range(lower_bound, upper_bound, partitions)
+
+        column_ref = self._sql_dialect.quote_identifier(partition_column)
+        conditions: list[tuple[str, dict[str, Any]]] = []
+        for idx in range(len(boundaries) + 1):
+            clauses, parameters = [], {}
+            if idx > 0:
+                clauses.append(f"{column_ref} >= {{{{ __partition_lower__ }}}}")
+                parameters["__partition_lower__"] = boundaries[idx - 1]
+            if idx < len(boundaries):
+                clauses.append(f"{column_ref} < {{{{ __partition_upper__ }}}}")
+                parameters["__partition_upper__"] = boundaries[idx]
+            else:
+                clauses = [f"({' AND '.join(clauses) or '1 = 1'} OR {column_ref} IS NULL)"]
+            conditions.append((" AND ".join(clauses), parameters))
+
+        partition_data_sources = []
+        for condition, parameters in conditions:
+            partition_query = build_filtered_query(
+                query,  # type: ignore[arg-type]
+                condition,
+                dialect=self._sql_dialect,
+                keep_order=False,
+            )
+            partition_data_sources.append(
+                data_source.model_copy(
+                    update={"query": partition_query, "parameters": {**(data_source.parameters or {}), **parameters}}
+                )
+            )
+        results = run_batch(
+            [partial(self._retrieve_data, partition) for partition in partition_data_sources],  # type: ignore[attr-defined]
+            max_concurrency=max_concurrency,
+        )
+        for result in results:
+            if result.error is not None:
+                raise result.error
+        dfs = [result.result for result in results]
+        # Empty partitions would change the types of the concatenated columns
+        df = pd.concat([partition_df for partition_df in dfs if not partition_df.empty] or dfs[:1], ignore_index=True)
+        return self._prepare_df(df, data_source, permissions)  # type: ignore[attr-defined]
+
+    def _get_slice_query(
+        self, data_source: Any, permissions: dict | None, offset: int, limit: int | None
+    ) -> str | None:
+        """The query retrieving only the rows of the slice, if it can be built"""
+        query = getattr(data_source, "query", None)
+        # Permissions must be applied before slicing, and without a limit all the rows are retrieved anyway
+        if permissions is None and limit is not None and query and self._can_push_down_pagination(query):
+            return build_slice_query(query, offset, limit, dialect=self._sql_dialect)
+        return None
+
+    def _build_data_slice(
+        self, df: "pd.DataFrame", data_source: Any, offset: int, limit: int, total_rows: int | None
+    ) -> DataSlice:
+        df = self._prepare_df(df, data_source)  # type: ignore[attr-defined]
+        return DataSlice(
+            df,
+            pagination_info=build_pagination_info(
+                offset=offset, limit=limit, retrieved_rows=len(df), total_rows=total_rows
+            ),
+            stats=DataStats(df_memory_size=df.memory_usage().sum()),
+        )
+
+    def get_slice(
+        self,
+        data_source: Any,
+        permissions: dict | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+        get_row_count: bool | None = False,
+    ) -> DataSlice:
+        data_source, permissions = self._push_down_permissions(data_source, permissions)
+        slice_query = self._get_slice_query(data_source, permissions, offset, limit)
+        if slice_query is None:
+            return super().get_slice(  # type: ignore[misc]
+                data_source, permissions=permissions, offset=offset, limit=limit, get_row_count=get_row_count
+            )
+
+        total_rows: int | None = None
+        if get_row_count:
+            count_query = build_count_query(data_source.query, dialect=self._sql_dialect)
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                # Runs the queries in the context of the caller, e.g. its `query_context`
+                df_future = executor.submit(
+                    copy_context().run, self._retrieve_data_with_query, data_source, slice_query
+                )
+                count_future = executor.submit(
+                    copy_context().run, self._retrieve_data_with_query, data_source, count_query
+                )
+                df = df_future.result()
+                total_rows = int(count_future.result().iloc[0, 0])
+        else:
+            df = self._retrieve_data_with_query(data_source, slice_query)
+        return self._build_data_slice(df, data_source, offset, limit, total_rows)  # type: ignore[arg-type]
+
+    async def _aretrieve_data_with_query(self, data_source: Any, query: str) -> "pd.DataFrame":
+        return await self._aretrieve_data(data_source.model_copy(update={"query": query}))  # type: ignore[attr-defined]
+
+    async def aget_df(self, data_source: Any, permissions: dict | None = None) -> "pd.DataFrame":
+        if self._has_native_async_support():  # type: ignore[attr-defined]
+            data_source, permissions = self._push_down_permissions(data_source, permissions)
+        return await super().aget_df(data_source, permissions)  # type: ignore[misc]
+
+    async def aget_slice(
+        self,
+        data_source: Any,
+        permissions: dict | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+        get_row_count: bool | None = False,
+    ) -> DataSlice:
+        slice_query = None
+        if self._has_native_async_support():  # type: ignore[attr-defined]
+            data_source, permissions = self._push_down_permissions(data_source, permissions)
+            slice_query = self._get_slice_query(data_source, permissions, offset, limit)
+        if slice_query is None:
+            return await super().aget_slice(  # type: ignore[misc]
+                data_source, permissions=permissions, offset=offset, limit=limit, get_row_count=get_row_count
+            )
+
+        total_rows: int | None = None
+        if get_row_count:
+            count_query = build_count_query(data_source.query, dialect=self._sql_dialect)
+            df, count_df = await asyncio.gather(
+                self._aretrieve_data_with_query(data_source, slice_query),
+                self._aretrieve_data_with_query(data_source, count_query),
+            )
+            total_rows = int(count_df.iloc[0, 0])
+        else:
+            df = await self._aretrieve_data_with_query(data_source, slice_query)
+        return self._build_data_slice(df, data_source, offset, limit, total_rows)  # type: ignore[arg-type]
@@ -1,6 +1,12 @@
 import re
 
 from toucan_connectors.common import convert_to_printf_templating_style, convert_to_qmark_paramstyle
+from toucan_connectors.sql_rewriter import (
+    build_count_query,
+    build_slice_query,
+    is_select_query,
+    strip_trailing_semicolons,
+)
 
 
 class SqlQueryHelper:
@@ -10,16 +16,16 @@ class SqlQueryHelper:
     ) -> bool:
         # We can process all type of SQL queries and some return payload for which we don't want
         # or cannot get the total row count, like DESCRIBE or SHOW
-        return bool(re.search(r"select.*", query, re.I))
+        return is_select_query(query)
 
     @staticmethod
     def prepare_count_query(query_string: str, query_parameters: dict | None = None) -> tuple[str, list]:
-        """Build the count(*) query by removing the limit and the offset and adding a count query above from input
-        query"""
+        """Build the count(*) query by adding a count query above from input query, without its ORDER BY clause"""
         prepared_query, prepared_values = SqlQueryHelper.prepare_query(query_string, query_parameters)
-        prepared_query = prepared_query.replace(";", "")
-        prepared_query = f"SELECT COUNT(*) AS TOTAL_ROWS FROM ({prepared_query});"  # noqa: S608
-        return prepared_query, prepared_values
+        count_query = build_count_query(prepared_query, column="TOTAL_ROWS")
+        if count_query is None:
+            count_query = f"SELECT COUNT(*) AS TOTAL_ROWS FROM ({strip_trailing_semicolons(prepared_query)})"  # noqa: S608
+        return f"{count_query};", prepared_values
 
     @staticmethod
     def prepare_limit_query(
@@ -28,16 +34,12 @@ class SqlQueryHelper:
         offset: int | None = None,
         limit: int | None = None,
     ) -> tuple[str, list]:
-        """Build a new query by adding a select query with a limit above from input query"""
+        """Build a new query returning only `limit` rows from `offset`. Queries other than SELECT are left untouched"""
         prepared_query, prepared_values = SqlQueryHelper.prepare_query(query_string, query_parameters)
-        query_check = prepared_query.strip().lower()
-        if not query_check.startswith("show") and not query_check.startswith("describe"):
-            if limit and offset:
-                prepared_query = prepared_query.replace(";", "")
-                prepared_query = f"SELECT * FROM ({prepared_query}) LIMIT {limit} OFFSET {offset};"  # noqa: S608
-            elif limit:
-                prepared_query = prepared_query.replace(";", "")
-                prepared_query = f"SELECT * FROM ({prepared_query}) LIMIT {limit};"  # noqa: S608
+        if limit:
+            limit_query = build_slice_query(prepared_query, offset or 0, limit)
+            if limit_query is not None:
+                prepared_query = f"{limit_query};"
 
         return prepared_query, prepared_values
 
@@ -0,0 +1,378 @@
+"""Rewrites SELECT statements to filter, paginate or count their results in the database.
+
+Queries are split into tokens, so that string literals, quoted identifiers, comments, jinja
+templates and subqueries are never mistaken for clauses of the statement itself.
+"""
+
+import re
+from typing import ClassVar, NamedTuple
+
+_TOKEN_PATTERNS = {
+    "comment": r"--[^\n]*|/\*.*?\*/",
+    "template": r"\{\{.*?\}\}|\{%.*?%\}|\{#.*?#\}",
+    # Strings, quoted identifiers and PostgreSQL's dollar-quoted strings
+    "literal": r"'(?:''|[^'])*'|\"(?:\"\"|[^\"])*\"|`(?:``|[^`])*`|\[[^\]]*\]"
+    r"|\$(?P<dollar_tag>\w*)\$.*?\$(?P=dollar_tag)\$",
+    "word": r"[^\W\d][\w$]*",
+    "number": r"\d+(?:\.\d*)?",
+    "space": r"\s+",
+    "punctuation": r".",
+}
+_BACKSLASH_ESCAPED_STRING_PATTERN = r"'(?:''|\\.|[^'\\])*'|\"(?:\"\"|\\.|[^\"\\])*\"|"
+
+
+def _compile_tokenizer(literal_prefix: str = "") -> re.Pattern:
+    patterns = dict(_TOKEN_PATTERNS, literal=literal_prefix + _TOKEN_PATTERNS["literal"])
+    return re.compile("|".join(f"(?P<{kind}>{pattern})" for kind, pattern in patterns.items()), re.DOTALL)
+
+
+_TOKENIZER = _compile_tokenizer()
+_BACKSLASH_ESCAPES_TOKENIZER = _compile_tokenizer(_BACKSLASH_ESCAPED_STRING_PATTERN)
+
+# Words that can be part of a pagination clause, along with numbers and commas
+_PAGINATION_WORDS = {"limit", "offset", "fetch", "first", "next", "row", "rows", "only", "all"}
+# Clauses that can follow an ORDER BY, which prevent appending a pagination clause after it
+_AFTER_ORDER_BY_WORDS = {"for", "settings", "format", "into", "lock", "option"}
+_STATEMENT_WORDS = {"select", "insert", "update", "delete", "merge", "upsert", "replace"}
+
+
+class Token(NamedTuple):
+    kind: str | None
+    value: str
+    depth: int
+
+    @property
+    def is_significant(self) -> bool:
+        return self.kind not in ("space", "comment")
+
+    def is_word(self, *words: str) -> bool:
+        return self.kind == "word" and self.value.lower() in words
+
+
+def tokenize(query: str, backslash_escapes: bool = False) -> list[Token]:
+    """Splits a query into tokens, each one knowing its parentheses depth"""
+    tokenizer = _BACKSLASH_ESCAPES_TOKENIZER if backslash_escapes else _TOKENIZER
+    tokens: list[Token] = []
+    depth = 0
+    for match in tokenizer.finditer(query):
+        kind, value = match.lastgroup, match.group()
+        if value == ")":
+            depth = max(depth - 1, 0)
+        tokens.append(Token(kind, value, depth))
+        if value == "(":
+            depth += 1
+    return tokens
+
+
+class SqlDialect:
+    """Syntax of the dialects supporting LIMIT and OFFSET, and quoting identifiers with double quotes
+    (PostgreSQL, Snowflake, Redshift...)"""
+
+    backslash_escapes: ClassVar[bool] = False
+    identifier_quotes: ClassVar[tuple[str, str]] = ('"', '"')
+    # Whether SELECT statements can be limited with TOP, which cannot be combined with OFFSET
+    supports_top: ClassVar[bool] = False
+
+    def quote_identifier(self, identifier: str) -> str:
+        opening, closing = self.identifier_quotes
+        return f"{opening}{identifier.replace(closing, closing * 2)}{closing}"
+
+    def pagination_clause(self, offset: int, limit: int) -> str:
+        return f"LIMIT {limit} OFFSET {offset}" if offset else f"LIMIT {limit}"
+
+    def unordered_pagination_clause(self, offset: int, limit: int) -> str:
+        """Pagination clause of a query without any ORDER BY"""
+        return self.pagination_clause(offset, limit)
+
+    def table_alias(self, alias: str) -> str:
+        return f" AS {alias}"
+
+
+class MySQLDialect(SqlDialect):
+    backslash_escapes = True
+    identifier_quotes = ("`", "`")
+
+
+class DatabricksDialect(MySQLDialect):
+    """Spark SQL escapes strings with backslashes and quotes identifiers with backticks, like MySQL"""
+
+
+class MSSQLDialect(SqlDialect):
+    supports_top = True
+
+    def pagination_clause(self, offset: int, limit: int) -> str:
+        return f"OFFSET {offset} ROWS FETCH NEXT {limit} ROWS ONLY"
+
+    def unordered_pagination_clause(self, offset: int, limit: int) -> str:
+        # OFFSET and FETCH are part of the ORDER BY clause in SQL Server
+        return f"ORDER BY (SELECT NULL) {self.pagination_clause(offset, limit)}"
+
+
+class OracleDialect(SqlDialect):
+    def pagination_clause(self, offset: int, limit: int) -> str:
+        if offset:
+            return f"OFFSET {offset} ROWS FETCH NEXT {limit} ROWS ONLY"
+        return f"FETCH FIRST {limit} ROWS ONLY"
+
+    def table_alias(self, alias: str) -> str:
+        # Oracle neither accepts AS before table aliases nor identifiers starting with an underscore
+        return ""
+
+
+DEFAULT_DIALECT = SqlDialect()
+
+
+def _parse_pagination(tokens: list[Token]) -> tuple[int, int | None] | None:
+    """Parses LIMIT, OFFSET and FETCH clauses, returning the offset and the limit they set"""
+    words = [t.value.lower() for t in tokens]
+    offset, limit = 0, None
+    i = 0
+
+    def number_at(index: int) -> int | None:
+        return int(words[index]) if index < len(words) and words[index].isdigit() else None
+
+    while i < len(words):
+        if words[i] == "limit":
+            if words[i + 1 : i + 2] == ["all"]:
+                i += 2
+                continue
+            first = number_at(i + 1)
+            if first is None:
+                return None
+            # MySQL's LIMIT offset, count
+            if words[i + 2 : i + 3] == [","]:
+                second = number_at(i + 3)
+                if second is None:
+                    return None
+                offset, limit = first, second
+                i += 4
+            else:
+                limit = first
+                i += 2
+        elif words[i] == "offset":
+            value = number_at(i + 1)
+            if value is None:
+                return None
+            offset = value
+            i += 3 if words[i + 2 : i + 3] in (["row"], ["rows"]) else 2
+        elif words[i] == "fetch":
+            value = number_at(i + 2)
+            if words[i + 1 : i + 2] not in (["first"], ["next"]) or value is None:
+                return None
+            if words[i + 3 : i + 5] not in (["rows", "only"], ["row", "only"]):
+                return None
+            limit = value
+            i += 5
+        else:
+            return None
+    return offset, limit
+
+
+class SelectStatement:
+    """A single SELECT statement, possibly starting with common table expressions"""
+
+    def __init__(self, tokens: list[Token]) -> None:
+        significant = [i for i, t in enumerate(tokens) if t.is_significant and t.depth == 0]
+        while tokens[significant[-1]].value == ";":
+            significant.pop()
+        self.tokens = tokens
+        self.start = significant[0]
+        self.end = significant[-1] + 1
+        # Index of the main SELECT, after the common table expressions
+        self.main_start = next(i for i in significant if tokens[i].is_word(*_STATEMENT_WORDS))
+        # Whether the main SELECT is limited with TOP (after an optional DISTINCT or ALL)
+        self.has_top = any(tokens[i].is_word("top") for i in [i for i in significant if i > self.main_start][:2])
+
+        # Trailing pagination clause, made of pagination words, numbers and commas
+        pagination_start = self.end
+        for i in reversed(significant):
+            token = tokens[i]
+            if not (token.is_word(*_PAGINATION_WORDS) or token.kind == "number" or token.value == ","):
+                break
+            pagination_start = i
+        while pagination_start < self.end and not tokens[pagination_start].is_word("limit", "offset", "fetch"):
+            pagination_start += 1
+        pagination_tokens = [tokens[i] for i in significant if i >= pagination_start]
+        self.pagination = _parse_pagination(pagination_tokens) if pagination_tokens else None
+        self.body_end = pagination_start if self.pagination is not None else self.end
+
+        last_from = max((i for i in significant if tokens[i].is_word("from")), default=self.main_start)
+        self.has_other_pagination = any(
+            tokens[i].is_word("limit", "offset", "fetch") for i in significant if last_from < i < self.body_end
+        )
+
+        order_by_candidates = [
+            i
+            for i, next_i in zip(significant, significant[1:], strict=False)
+            if i < self.body_end and tokens[i].is_word("order") and tokens[next_i].is_word("by")
+        ]
+        self.order_by_start = order_by_candidates[-1] if order_by_candidates else None
+        # Whether the statement ends with its ORDER BY clause, so that a pagination clause can follow it
+        self.ends_with_order_by = self.order_by_start is not None and not any(
+            tokens[i].is_word(*_AFTER_ORDER_BY_WORDS)
+            for i in significant
+            if self.order_by_start < i < self.body_end  # type: ignore[operator]
+        )
+
+    def text(self, start: int | None = None, end: int | None = None) -> str:
+        """Text of the tokens between `start` and `end`, without the surrounding spaces and comments"""
+        tokens = self.tokens[self.start if start is None else start : self.end if end is None else end]
+        significant = [i for i, t in enumerate(tokens) if t.is_significant]
+        return "".join(t.value for t in tokens[significant[0] : significant[-1] + 1]) if significant else ""
+
+    @property
+    def cte_prefix(self) -> str:
+        """The WITH clause of the statement, followed by a space"""
+        return f"{self.text(self.start, self.main_start)} " if self.main_start != self.start else ""
+
+
+def parse_select_statement(query: str, dialect: SqlDialect = DEFAULT_DIALECT) -> SelectStatement | None:
+    """Returns the parsed statement if the query is a single SELECT statement, None otherwise"""
+    tokens = tokenize(query, backslash_escapes=dialect.backslash_escapes)
+    significant = [t for t in tokens if t.is_significant]
+    while significant and significant[-1].value == ";":
+        significant.pop()
+    if not significant or any(t.value == ";" and t.depth == 0 for t in significant):
+        return None
+    if significant[0].is_word("select"):
+        pass
+    elif significant[0].is_word("with"):
+        # The statement following the common table expressions can be an INSERT, UPDATE...
+        main = next((t for t in significant if t.depth == 0 and t.is_word(*_STATEMENT_WORDS)), None)
+        if main is None or not main.is_word("select"):
+            return None
+    else:
+        return None
+    return SelectStatement(tokens)
+
+
+def is_select_query(query: str, dialect: SqlDialect = DEFAULT_DIALECT) -> bool:
+    return parse_select_statement(query, dialect) is not None
+
+
+def strip_trailing_semicolons(query: str, dialect: SqlDialect = DEFAULT_DIALECT) -> str:
+    tokens = tokenize(query, backslash_escapes=dialect.backslash_escapes)
+    while tokens and (not tokens[-1].is_significant or tokens[-1].value == ";"):
+        tokens.pop()
+    return "".join(t.value for t in tokens).strip()
+
+
+def normalize_query(query: str, dialect: SqlDialect = DEFAULT_DIALECT) -> str:
+    """Drops the comments and the trailing semicolons of a query, and collapses its whitespace.
+
+    Queries differing only by their formatting have the same normalized form.
+    """
+    tokens = [t for t in tokenize(query, backslash_escapes=dialect.backslash_escapes) if t.is_significant]
+    while tokens and tokens[-1].value == ";":
+        tokens.pop()
+    return " ".join(t.value for t in tokens)
+
+
+def _unordered_end(statement: SelectStatement, dialect: SqlDialect) -> int:
+    """End of the statement without its ORDER BY clause, if it can be dropped without changing the rows"""
+    if (
+        statement.ends_with_order_by
+        and statement.pagination is None
+        and not statement.has_other_pagination
+        and not (dialect.supports_top and statement.has_top)
+    ):
+        return statement.order_by_start  # type: ignore[return-value]
+    return statement.end
+
+
+def build_slice_query(
+    query: str, offset: int, limit: int, dialect: SqlDialect = DEFAULT_DIALECT, alias: str = "_toucan_slice"
+) -> str | None:
+    """Rewrites a SELECT statement so that it only returns `limit` rows, starting from `offset`.
+
+    A trailing pagination clause is merged with the requested one, and the pagination clause is appended
+    to queries ending with an ORDER BY, so that the database can keep only the top rows while sorting.
+    Other queries are wrapped in a subquery. Returns None if the query is not a single SELECT statement, or
+    if it ends with an ORDER BY and is limited with TOP, which cannot be combined with a pagination clause.
+    """
+    statement = parse_select_statement(query, dialect)
+    if statement is None:
+        return None
+
+    if statement.pagination is not None and not statement.has_other_pagination:
+        inner_offset, inner_limit = statement.pagination
+        if inner_limit is not None:
+            limit = min(limit, max(inner_limit - offset, 0))
+        body = statement.text(0, statement.body_end)
+        if statement.ends_with_order_by:
+            return f"{body} {dialect.pagination_clause(inner_offset + offset, limit)}"
+        return f"{body} {dialect.unordered_pagination_clause(inner_offset + offset, limit)}"
+
+    if statement.ends_with_order_by and not statement.has_other_pagination:
+        if dialect.supports_top and statement.has_top:
+            # The order would be lost in a subquery
+            return None
+        return f"{statement.text()} {dialect.pagination_clause(offset, limit)}"
+
+    main = statement.text(statement.main_start)
+    return (
+        f"{statement.cte_prefix}SELECT * FROM ({main}){dialect.table_alias(alias)} "  # noqa: S608
+        f"{dialect.unordered_pagination_clause(offset, limit)}"
+    )
+
+
+def build_count_query(
+    query: str,
+    dialect: SqlDialect = DEFAULT_DIALECT,
+    column: str = "total_rows",
+    alias: str = "_toucan_count",
+) -> str | None:
+    """Rewrites a SELECT statement so that it returns its number of rows, in the `column` column.
+
+    The ORDER BY clause is dropped when the query is not paginated, since it does not change the count.
+    Returns None if the query is not a single SELECT statement.
+    """
+    statement = parse_select_statement(query, dialect)
+    if statement is None:
+        return None
+
+    end = _unordered_end(statement, dialect)
+    main = statement.text(statement.main_start, end)
+    return f"{statement.cte_prefix}SELECT COUNT(*) AS {column} FROM ({main}){dialect.table_alias(alias)}"  # noqa: S608
+
+
+def build_bounds_query(
+    query: str, column: str, dialect: SqlDialect = DEFAULT_DIALECT, alias: str = "_toucan_bounds"
+) -> str | None:
+    """Rewrites a SELECT statement so that it returns the minimum and the maximum values of `column`.
+
+    Returns None if the query is not a single SELECT statement.
+    """
+    statement = parse_select_statement(query, dialect)
+    if statement is None:
+        return None
+
+    end = _unordered_end(statement, dialect)
+    main = statement.text(statement.main_start, end)
+    column_ref = dialect.quote_identifier(column)
+    return (
+        f"{statement.cte_prefix}SELECT MIN({column_ref}) AS lower_bound, MAX({column_ref}) AS upper_bound "  # noqa: S608
+        f"FROM ({main}){dialect.table_alias(alias)}"
+    )
+
+
+def build_filtered_query(
+    query: str,
+    condition: str,
+    dialect: SqlDialect = DEFAULT_DIALECT,
+    alias: str = "_toucan_filtered",
+    keep_order: bool = True,
+) -> str | None:
+    """Rewrites a SELECT statement so that it only returns the rows matching the SQL `condition`.
+
+    The order of the rows is not kept by a subquery, so ordered queries cannot be filtered if `keep_order` is set.
+    Otherwise, their ORDER BY clause is dropped when the query is not paginated, as it does not change the rows.
+    Returns None if the query is not a single SELECT statement, or if it is ordered and `keep_order` is set.
+    """
+    statement = parse_select_statement(query, dialect)
+    if statement is None or (keep_order and statement.order_by_start is not None):
+        return None
+
+    end = _unordered_end(statement, dialect)
+    main = statement.text(statement.main_start, end)
+    return f"{statement.cte_prefix}SELECT * FROM ({main}){dialect.table_alias(alias)} WHERE {condition}"  # noqa: S608
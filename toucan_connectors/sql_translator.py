@@ -0,0 +1,116 @@
+# ruff: noqa: N802
+from functools import cache
+from typing import Any, ClassVar, NamedTuple
+
+from toucan_connectors.condition_translator import ConditionTranslator, LogicalOperator, Number, as_number
+from toucan_connectors.sql_rewriter import DEFAULT_DIALECT, SqlDialect
+
+# Position of a bound value in the SQL of a clause
+_VALUE_MARKER = "\x00"
+
+
+class SqlClause(NamedTuple):
+    """A SQL boolean expression, whose values are bound in order to its value markers"""
+
+    sql: str
+    values: list[Any]
+
+
+class SqlConditionTranslator(ConditionTranslator):
+    """
+    Utility class to convert a condition object into a SQL boolean expression
+
+    Values are never interpolated in the expression: `translate_to_sql` returns them as parameters,
+    referenced by jinja placeholders that SQL connectors bind with their driver.
+    """
+
+    dialect: ClassVar[SqlDialect] = DEFAULT_DIALECT
+
+    @classmethod
+    def for_dialect(cls, dialect: SqlDialect) -> type["SqlConditionTranslator"]:
+        """The translator quoting column names as `dialect` does"""
+        return _translator_for_dialect(cls, dialect)
+
+    @classmethod
+    def translate_to_sql(cls, condition: dict, parameters_prefix: str = "__permission_") -> tuple[str, dict[str, Any]]:
+        """Translates the condition into a SQL expression and the parameters it references"""
+        clause: SqlClause = cls.translate(condition)
+        sql_parts = clause.sql.split(_VALUE_MARKER)
+        parameters = {f"{parameters_prefix}{idx}__": value for idx, value in enumerate(clause.values)}
+        sql = sql_parts[0] + "".join(
+            f"{{{{ {name} }}}}{sql_part}" for name, sql_part in zip(parameters, sql_parts[1:], strict=True)
+        )
+        return sql, parameters
+
+    @classmethod
+    def get_column_ref(cls, column: str) -> str:
+        return cls.dialect.quote_identifier(column)
+
+    @classmethod
+    def join_clauses(cls, clauses: list[SqlClause], logical_operator: LogicalOperator) -> SqlClause:
+        if not clauses:
+            return SqlClause("1 = 1" if logical_operator == "and" else "1 = 0", [])
+        return SqlClause(
+            "(" + f" {logical_operator.upper()} ".join(clause.sql for clause in clauses) + ")",
+            [value for clause in clauses for value in clause.values],
+        )
+
+    @classmethod
+    def _compare(cls, column: str, operator: str, value: Any) -> SqlClause:
+        return SqlClause(f"{column} {operator} {_VALUE_MARKER}", [value])
+
+    @classmethod
+    def EQUAL(cls, column: str, value: str | Number) -> SqlClause:
+        return cls._compare(column, "=", value)
+
+    @classmethod
+    def NOT_EQUAL(cls, column: str, value: str | Number) -> SqlClause:
+        # `<>` is unknown for NULLs, which would filter them out, unlike the pandas translator
+        return SqlClause(f"({column} <> {_VALUE_MARKER} OR {column} IS NULL)", [value])
+
+    @classmethod
+    def LOWER_THAN(cls, column: str, value: Number) -> SqlClause:
+        return cls._compare(column, "<", as_number(value))
+
+    @classmethod
+    def LOWER_THAN_EQUAL(cls, column: str, value: Number) -> SqlClause:
+        return cls._compare(column, "<=", as_number(value))
+
+    @classmethod
+    def GREATER_THAN(cls, column: str, value: Number) -> SqlClause:
+        return cls._compare(column, ">", as_number(value))
+
+    @classmethod
+    def GREATER_THAN_EQUAL(cls, column: str, value: Number) -> SqlClause:
+        return cls._compare(column, ">=", as_number(value))
+
+    @classmethod
+    def IN(cls, column: str, value: str | Number | list[str | Number]) -> SqlClause:
+        values = value if isinstance(value, list) else [value]
+        if not values:
+            return SqlClause("1 = 0", [])
+        return SqlClause(f"{column} IN ({', '.join(_VALUE_MARKER for _ in values)})", values)
+
+    @classmethod
+    def NOT_IN(cls, column: str, value: str | Number | list[str | Number]) -> SqlClause:
+        values = value if isinstance(value, list) else [value]
+        if not values:
+            return SqlClause("1 = 1", [])
+        return SqlClause(f"({column} NOT IN ({', '.join(_VALUE_MARKER for _ in values)}) OR {column} IS NULL)", values)
+
+    @classmethod
+    def IS_NULL(cls, column: str, value=None) -> SqlClause:
+        return SqlClause(f"{column} IS NULL", [])
+
+    @classmethod
+    def IS_NOT_NULL(cls, column: str, value=None) -> SqlClause:
+        return SqlClause(f"{column} IS NOT NULL", [])
+
+
+@cache
+def _translator_for_dialect(
+    translator: type[SqlConditionTranslator], dialect: SqlDialect
+) -> type[SqlConditionTranslator]:
+    if dialect is translator.dialect:
+        return translator
+    return type(translator.__name__, (translator,), {"dialect": dialect})
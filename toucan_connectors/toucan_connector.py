@@ -1,35 +1,46 @@
+import asyncio
 import json
 import logging
 import operator
 import re
 import socket
+import threading
 import uuid
 from abc import ABC, ABCMeta, abstractmethod
-from collections.abc import Iterable
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
 from enum import StrEnum
-from functools import reduce, wraps
+from functools import partial, reduce, wraps
 from types import ModuleType
 from typing import TYPE_CHECKING, Annotated, Any, NamedTuple, TypeVar
 
-from pydantic import BaseModel, ConfigDict, Field, PlainSerializer, SecretStr
+from pydantic import BaseModel, ConfigDict, Field, PlainSerializer, PrivateAttr, SecretStr
 from pydantic.fields import ModelPrivateAttr
 
 from toucan_connectors.common import (
     UI_HIDDEN,
     ConnectorStatus,
-    apply_query_parameters,
     nosql_apply_parameters_to_query,
 )
 from toucan_connectors.json_wrapper import JsonWrapper
 from toucan_connectors.pagination import PaginationInfo, build_pagination_info
-from toucan_connectors.pandas_translator import PandasConditionTranslator
+from toucan_connectors.pandas_translator import compile_permissions_mask
+from toucan_connectors.utils.cache_key import identity_snapshot, same_snapshot, stable_digest
 from toucan_connectors.utils.datetime import sanitize_df_dates
 
 if TYPE_CHECKING:  # pragma: no cover
     import pandas as pd
+    import pyarrow as pa
 
 TIMEOUT_CHECK_PORT = 10  # consider port closed if > 10 seconds
 
+DEFAULT_BATCH_SIZE = 10_000  # default number of rows per batch yielded by `iter_batches`
+
+ASYNC_MAX_WORKERS = 16  # default number of threads running the async methods of connectors without native support
+
+BATCH_MAX_CONCURRENCY = 8  # default number of requests of a batch (`get_dfs` / `get_slices`) executed concurrently
+
 
 LOGGER = logging.getLogger(__name__)
 
@@ -65,6 +76,74 @@ class DataSlice(NamedTuple):
     stats: DataStats | None = None
     # TODO: name is kinda misleading. what others information than `columns` will it contain ?
     query_metadata: QueryMetadata | None = None
+    table: "pa.Table | None" = None  # the Arrow table of the slice, for connectors retrieving Arrow data natively
+
+
+class DfRequest(NamedTuple):
+    """A `get_df` request of a batch (see `get_dfs`)"""
+
+    data_source: "ToucanDataSource"
+    permissions: dict | None = None
+
+
+class SliceRequest(NamedTuple):
+    """A `get_slice` request of a batch (see `get_slices`)"""
+
+    data_source: "ToucanDataSource"
+    permissions: dict | None = None
+    offset: int = 0
+    limit: int | None = None
+    get_row_count: bool | None = False
+
+
+class BatchResult[T](NamedTuple):
+    """Outcome of a request of a batch: its `result`, or the `error` it raised"""
+
+    result: T | None = None
+    error: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def run_batch[T](
+    calls: Sequence[Callable[[], T]], max_concurrency: int = BATCH_MAX_CONCURRENCY
+) -> list[BatchResult[T]]:
+    """Executes `calls` in at most `max_concurrency` threads.
+
+    Results are returned in the order of `calls`. An exception raised by a call does not
+    interrupt the others: it is returned as the `error` of its result.
+    """
+
+    def run(call: Callable[[], T]) -> BatchResult[T]:
+        try:
+            return BatchResult(result=call())
+        except Exception as exc:
+            return BatchResult(error=exc)
+
+    if max_concurrency < 1:
+        raise ValueError(f"max_concurrency must be positive, got {max_concurrency}")
+    if len(calls) <= 1 or max_concurrency == 1:
+        return [run(call) for call in calls]
+    with ThreadPoolExecutor(
+        max_workers=min(max_concurrency, len(calls)), thread_name_prefix="toucan-connectors-batch"
+    ) as executor:
+        # Each call runs in a copy of the caller's context, e.g. its `query_context`
+        contexts = [copy_context() for _ in calls]
+        return list(executor.map(lambda context, call: context.run(run, call), contexts, calls))
+
+
+def iter_df_chunks(df: "pd.DataFrame", batch_size: int) -> Iterator["pd.DataFrame"]:
+    """Splits a dataframe in chunks of at most `batch_size` rows.
+
+    An empty dataframe is yielded as is, in order to keep its columns.
+    """
+    if df.empty:
+        yield df
+        return
+    for start in range(0, len(df), batch_size):
+        yield df.iloc[start : start + batch_size]
 
 
 def strlist_to_enum(field: str, strlist: list[str], default_value=...) -> tuple[StrEnum, Any]:
@@ -202,6 +281,26 @@ class RetryPolicy(BaseModel):
         return f
 
 
+_async_executor: ThreadPoolExecutor | None = None
+_async_executor_lock = threading.Lock()
+
+
+def get_async_executor() -> ThreadPoolExecutor:
+    """The thread pool running the async methods of connectors whose drivers do not support asyncio"""
+    global _async_executor
+    with _async_executor_lock:
+        if _async_executor is None:
+            _async_executor = ThreadPoolExecutor(max_workers=ASYNC_MAX_WORKERS, thread_name_prefix="toucan-connectors")
+        return _async_executor
+
+
+def set_async_executor(executor: ThreadPoolExecutor) -> None:
+    """Replaces the thread pool of `get_async_executor`, e.g. to bound the number of concurrent queries"""
+    global _async_executor
+    with _async_executor_lock:
+        _async_executor = executor
+
+
 def decorate_func_with_retry(func):
     """wrap `func` with the retry policy defined on the connector.
     If the retry policy is None, just leave the `get_df` implementation as is.
@@ -298,7 +397,7 @@ class ToucanConnector[DS: ToucanDataSource](BaseModel, metaclass=ABCMeta):
     secrets_storage_version: str = Field("1", **UI_HIDDEN)
 
     # Default ttl for all connector's queries (overridable at the data_source level)
-    # /!\ cache ttl is used by the caching system which is not implemented in toucan_connectors.
+    # cache ttl is used by the opt-in `toucan_connectors.result_cache.ResultCache`, or by the caching system of the app
     cache_ttl: int | None = Field(
         None,
         title="Slow Queries' Cache Expiration Time",
@@ -309,6 +408,9 @@ class ToucanConnector[DS: ToucanDataSource](BaseModel, metaclass=ABCMeta):
     identifier: str | None = Field(None, **UI_HIDDEN)
     model_config = ConfigDict(extra="forbid", validate_assignment=True)
 
+    # `get_unique_identifier`, and the snapshot of the fields it was computed from
+    _unique_identifier_memo: tuple[list, str] | None = PrivateAttr(None)
+
     @property
     def retry_decorator(self):
         kwargs = {**self.retry_policy.dict(), "retry_on": self._retry_on, "logger": self.logger}
@@ -318,6 +420,39 @@ class ToucanConnector[DS: ToucanDataSource](BaseModel, metaclass=ABCMeta):
     def _retrieve_data(self, data_source: DS):
         """Main method to retrieve a pandas dataframe"""
 
+    def _retrieve_batches(self, data_source: DS, batch_size: int) -> Iterator["pd.DataFrame"]:
+        """Retrieves the data as pandas dataframes of at most `batch_size` rows.
+
+        Connectors able to stream results from their backend should override this method.
+        By default, the whole dataframe is retrieved and then split in chunks.
+        """
+        yield from iter_df_chunks(self._retrieve_data(data_source), batch_size)
+
+    def _retrieve_arrow(self, data_source: DS) -> "pa.Table":
+        """Retrieves the data as a pyarrow Table.
+
+        Connectors whose driver returns Arrow data should override this method, in order
+        to skip the conversion of the results to python objects.
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def _has_native_arrow_support(cls) -> bool:
+        return cls._retrieve_arrow is not ToucanConnector._retrieve_arrow
+
+    def _arrow_to_df(self, table: "pa.Table") -> "pd.DataFrame":
+        """Converts a table returned by `_retrieve_arrow` to a pandas dataframe"""
+        return table.to_pandas()
+
+    def _prepare_df(self, df: "pd.DataFrame", data_source: DS, permissions: dict | None = None) -> "pd.DataFrame":
+        """Normalizes the columns and dates of a retrieved dataframe and filters it with permissions"""
+        df.columns = df.columns.astype(str)
+        df = sanitize_df_dates(df)
+
+        if permissions is not None:
+            df = df[compile_permissions_mask(permissions, data_source.parameters)(df)]
+        return df
+
     @decorate_func_with_retry
     def get_df(self, data_source: DS, permissions: dict | None = None) -> "pd.DataFrame":
         """
@@ -325,14 +460,38 @@ class ToucanConnector[DS: ToucanDataSource](BaseModel, metaclass=ABCMeta):
         filtered by permissions
         """
         res = self._retrieve_data(data_source)
-        res.columns = res.columns.astype(str)
-        res = sanitize_df_dates(res)
+        return self._prepare_df(res, data_source, permissions)
 
-        if permissions is not None:
-            permissions_query = PandasConditionTranslator.translate(permissions)
-            permissions_query = apply_query_parameters(permissions_query, data_source.parameters or {})
-            res = res.query(permissions_query)
-        return res
+    @decorate_func_with_retry
+    def get_arrow(self, data_source: DS, permissions: dict | None = None) -> "pa.Table":
+        """
+        Method to retrieve the data as a pyarrow Table filtered by permissions
+
+        If the connector retrieves Arrow data natively, the data goes through pandas
+        only when permissions have to be applied.
+        """
+        import pyarrow as pa
+
+        if permissions is None and self._has_native_arrow_support():
+            return self._retrieve_arrow(data_source)
+        df = self._prepare_df(self._retrieve_data(data_source), data_source, permissions)
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+    def iter_batches(
+        self, data_source: DS, permissions: dict | None = None, batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> Iterator["pd.DataFrame"]:
+        """
+        Method to retrieve the data as an iterator of pandas dataframes
+        of at most `batch_size` rows, filtered by permissions.
+
+        For connectors streaming their results, the peak memory is proportional to
+        `batch_size` rather than to the size of the whole result.
+        Permissions are applied batch by batch, so filtered batches can be smaller than `batch_size`.
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be a positive integer, got {batch_size}")
+        for batch in self._retrieve_batches(data_source, batch_size):
+            yield self._prepare_df(batch, data_source, permissions)
 
     def get_slice(
         self,
@@ -354,7 +513,67 @@ class ToucanConnector[DS: ToucanDataSource](BaseModel, metaclass=ABCMeta):
           get_row_count: used in some connectors to optionally get the total number of
             rows from a request, before limit (Snowflake)
         """
-        df = self.get_df(data_source, permissions)
+        if permissions is None and self._has_native_arrow_support():
+            # Only the rows of the slice are converted to pandas
+            table = self.get_arrow(data_source)
+            sliced_table = table.slice(offset, limit)
+            sliced_df = self._prepare_df(self._arrow_to_df(sliced_table), data_source)
+            return DataSlice(
+                sliced_df,
+                pagination_info=build_pagination_info(
+                    offset=offset, limit=limit, retrieved_rows=len(sliced_df), total_rows=table.num_rows
+                ),
+                stats=DataStats(df_memory_size=sliced_df.memory_usage().sum()),
+                table=sliced_table,
+            )
+
+        if self._can_slice_batches():
+            return self._slice_batches(data_source, permissions, offset, limit, get_row_count)
+        return self._slice_df(self.get_df(data_source, permissions), offset, limit)
+
+    def _can_slice_batches(self) -> bool:
+        """Whether `get_slice` reads the batches of `iter_batches` until the slice is complete.
+
+        Connectors streaming their results from the backend should return True: the query then stops being read
+        once the rows of the slice are retrieved, instead of being fully retrieved and then sliced.
+        """
+        return False
+
+    def _slice_batches(
+        self, data_source: DS, permissions: dict | None, offset: int, limit: int | None, get_row_count: bool | None
+    ) -> DataSlice:
+        import pandas as pd
+
+        end = None if limit is None else offset + limit
+        sliced_batches: list[pd.DataFrame] = []
+        read_rows = 0
+        exhausted = True
+        batches = self.iter_batches(data_source, permissions)
+        try:
+            for batch in batches:
+                batch_start, read_rows = read_rows, read_rows + len(batch)
+                if end is None or batch_start < end:
+                    stop = None if end is None else end - batch_start
+                    sliced_batches.append(batch.iloc[max(offset - batch_start, 0) : stop])
+                # Remaining rows are only read to be counted
+                if end is not None and read_rows >= end and not get_row_count:
+                    exhausted = False
+                    break
+        finally:
+            # Closes the cursor of the query when it is not fully read
+            batches.close()  # type: ignore[attr-defined]
+
+        df = pd.concat(sliced_batches, ignore_index=True) if sliced_batches else pd.DataFrame()
+        return DataSlice(
+            df,
+            pagination_info=build_pagination_info(
+                offset=offset, limit=limit, retrieved_rows=len(df), total_rows=read_rows if exhausted else None
+            ),
+            stats=DataStats(df_memory_size=df.memory_usage().sum()),
+        )
+
+    @staticmethod
+    def _slice_df(df: "pd.DataFrame", offset: int, limit: int | None) -> DataSlice:
         truncated_df = df[offset : offset + limit] if limit is not None else df[offset:]
 
         pagination_info = build_pagination_info(
@@ -367,6 +586,71 @@ class ToucanConnector[DS: ToucanDataSource](BaseModel, metaclass=ABCMeta):
             stats=DataStats(df_memory_size=df.memory_usage().sum()),
         )
 
+    def get_dfs(
+        self, requests: Sequence[DfRequest], max_concurrency: int = BATCH_MAX_CONCURRENCY
+    ) -> list[BatchResult["pd.DataFrame"]]:
+        """Executes several `get_df` requests concurrently. See `run_batch`."""
+        return get_dfs([(self, request) for request in requests], max_concurrency=max_concurrency)
+
+    def get_slices(
+        self, requests: Sequence[SliceRequest], max_concurrency: int = BATCH_MAX_CONCURRENCY
+    ) -> list[BatchResult[DataSlice]]:
+        """Executes several `get_slice` requests concurrently. See `run_batch`."""
+        return get_slices([(self, request) for request in requests], max_concurrency=max_concurrency)
+
+    async def _aretrieve_data(self, data_source: DS) -> "pd.DataFrame":
+        """Natively async counterpart of `_retrieve_data`.
+
+        Connectors whose driver supports asyncio should override this method. Otherwise,
+        the async methods run their sync counterpart in the thread pool of `get_async_executor`.
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def _has_native_async_support(cls) -> bool:
+        return cls._aretrieve_data is not ToucanConnector._aretrieve_data
+
+    async def _run_in_executor[T](self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await asyncio.get_running_loop().run_in_executor(
+            get_async_executor(), partial(copy_context().run, fn, *args, **kwargs)
+        )
+
+    async def aget_df(self, data_source: DS, permissions: dict | None = None) -> "pd.DataFrame":
+        """Async counterpart of `get_df`"""
+        if not self._has_native_async_support():
+            # `get_df` is retried by itself
+            return await self._run_in_executor(self.get_df, data_source, permissions)
+        return await self._aget_df_natively(data_source, permissions)
+
+    @decorate_func_with_retry
+    async def _aget_df_natively(self, data_source: DS, permissions: dict | None = None) -> "pd.DataFrame":
+        res = await self._aretrieve_data(data_source)
+        return self._prepare_df(res, data_source, permissions)
+
+    async def aget_slice(
+        self,
+        data_source: DS,
+        permissions: dict | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+        get_row_count: bool | None = False,
+    ) -> DataSlice:
+        """Async counterpart of `get_slice`"""
+        if not self._has_native_async_support():
+            return await self._run_in_executor(
+                self.get_slice,
+                data_source,
+                permissions=permissions,
+                offset=offset,
+                limit=limit,
+                get_row_count=get_row_count,
+            )
+        return self._slice_df(await self.aget_df(data_source, permissions), offset, limit)
+
+    async def aget_status(self) -> ConnectorStatus:
+        """Async counterpart of `get_status`"""
+        return await self._run_in_executor(self.get_status)
+
     def explain(self, data_source: DS, permissions: dict | None = None):
         """Method to give metrics about the query"""
         return None
@@ -415,6 +699,16 @@ class ToucanConnector[DS: ToucanDataSource](BaseModel, metaclass=ABCMeta):
         """
         return self.model_dump_json()
 
+    def _get_memoized_unique_identifier(self) -> str:
+        """`get_unique_identifier`, computed again only when a field of the connector is assigned or changed in place"""
+        snapshot = identity_snapshot(self.__dict__)
+        memo = self._unique_identifier_memo
+        if snapshot is not None and memo is not None and same_snapshot(memo[0], snapshot):
+            return memo[1]
+        unique_identifier = self.get_unique_identifier()
+        self._unique_identifier_memo = None if snapshot is None else (snapshot, unique_identifier)
+        return unique_identifier
+
     def _get_unique_datasource_identifier(self, data_source: DS) -> dict:
         # By default we don't know which variable syntax is be supported by the inheriting connector,
         # so calling `nosql_apply_parameters_to_query` is wrong and will produce the same cache key
@@ -434,23 +728,29 @@ class ToucanConnector[DS: ToucanDataSource](BaseModel, metaclass=ABCMeta):
         (if no parameters are supplied) or for a given couple connector/query
         configuration (if `data_source` parameter is supplied).
         This identifier will then be used as a cache key.
+
+        It is stable across processes and restarts: values are encoded in a canonical way
+        before being hashed.
         """
+        if data_source is None:
+            rendered_permissions = permissions
+        elif permissions:
+            rendered_permissions = nosql_apply_parameters_to_query(permissions, data_source.parameters)
+        else:
+            # Same key without permissions as with empty permissions
+            rendered_permissions = {}
         unique_identifier = {
-            "connector": self.get_unique_identifier(),
-            "permissions": nosql_apply_parameters_to_query(permissions or {}, data_source.parameters)
-            if data_source
-            else permissions,
+            "connector": self._get_memoized_unique_identifier(),
+            "permissions": rendered_permissions,
             "offset": offset,
             "limit": limit,
         }
         if data_source is not None:
             unique_identifier["datasource"] = self._get_unique_datasource_identifier(data_source)
-        json_uid = JsonWrapper.dumps(unique_identifier, sort_keys=True, default=hash)
-        string_uid = str(uuid.uuid3(uuid.NAMESPACE_OID, json_uid))
-        return string_uid
+        return stable_digest(unique_identifier)
 
     def get_identifier(self):
-        json_uid = JsonWrapper.dumps(self.get_unique_identifier(), sort_keys=True)
+        json_uid = JsonWrapper.dumps(self._get_memoized_unique_identifier(), sort_keys=True)
         string_uid = str(uuid.uuid3(uuid.NAMESPACE_OID, json_uid))
         return string_uid
 
@@ -458,6 +758,36 @@ class ToucanConnector[DS: ToucanDataSource](BaseModel, metaclass=ABCMeta):
         """ """
 
 
+def get_dfs(
+    requests: Sequence[tuple[ToucanConnector, DfRequest]], max_concurrency: int = BATCH_MAX_CONCURRENCY
+) -> list[BatchResult["pd.DataFrame"]]:
+    """Executes `get_df` requests of any connectors concurrently. See `run_batch`."""
+    return run_batch(
+        [partial(connector.get_df, request.data_source, request.permissions) for connector, request in requests],
+        max_concurrency=max_concurrency,
+    )
+
+
+def get_slices(
+    requests: Sequence[tuple[ToucanConnector, SliceRequest]], max_concurrency: int = BATCH_MAX_CONCURRENCY
+) -> list[BatchResult[DataSlice]]:
+    """Executes `get_slice` requests of any connectors concurrently. See `run_batch`."""
+    return run_batch(
+        [
+            partial(
+                connector.get_slice,
+                request.data_source,
+                permissions=request.permissions,
+                offset=request.offset,
+                limit=request.limit,
+                get_row_count=request.get_row_count,
+            )
+            for connector, request in requests
+        ],
+        max_concurrency=max_concurrency,
+    )
+
+
 TableInfo = dict[str, str | list[dict[str, str]]]
 
 
@@ -0,0 +1,106 @@
+import datetime
+import json
+import uuid
+from collections.abc import Mapping
+from decimal import Decimal
+from enum import Enum
+from hashlib import blake2b
+from pathlib import PurePath
+from typing import Any
+
+from pydantic import AnyUrl, BaseModel, SecretBytes, SecretStr
+
+
+def canonicalize(obj: Any) -> Any:
+    """Converts `obj` to JSON-compatible values which do not depend on the process.
+
+    Models are converted to dicts, secrets to their value, enums to their value and dates to ISO strings.
+    Objects without a canonical form raise a TypeError.
+    """
+    if obj is None or isinstance(obj, bool | int | float | str):
+        return obj
+    if isinstance(obj, Enum):
+        return canonicalize(obj.value)
+    if isinstance(obj, BaseModel):
+        return canonicalize(obj.model_dump())
+    if isinstance(obj, Mapping):
+        return {str(key): canonicalize(value) for key, value in obj.items()}
+    if isinstance(obj, list | tuple):
+        return [canonicalize(value) for value in obj]
+    if isinstance(obj, set | frozenset):
+        return sorted((canonicalize(value) for value in obj), key=canonical_dumps)
+    if isinstance(obj, SecretStr | SecretBytes):
+        return canonicalize(obj.get_secret_value())
+    if isinstance(obj, datetime.date | datetime.time):
+        return obj.isoformat()
+    if isinstance(obj, datetime.timedelta):
+        return obj.total_seconds()
+    if isinstance(obj, bytes):
+        return obj.hex()
+    if isinstance(obj, Decimal | uuid.UUID | PurePath | AnyUrl):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} has no canonical form")
+
+
+def canonical_dumps(obj: Any) -> str:
+    """Serializes `obj` to a JSON string, which is the same for equal objects in every process"""
+    return json.dumps(canonicalize(obj), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def stable_digest(obj: Any) -> str:
+    """Hashes the canonical form of `obj` into a UUID-formatted string"""
+    return str(uuid.UUID(bytes=blake2b(canonical_dumps(obj).encode(), digest_size=16).digest()))
+
+
+_IMMUTABLE_TYPES = (
+    type(None),
+    bool,
+    int,
+    float,
+    str,
+    bytes,
+    Enum,
+    SecretStr,
+    SecretBytes,
+    datetime.date,
+    datetime.time,
+    datetime.timedelta,
+    Decimal,
+    uuid.UUID,
+    PurePath,
+    AnyUrl,
+)
+
+
+def identity_snapshot(obj: Any) -> list | None:
+    """Flattens `obj` into its immutable leaves and the shape of its containers, to detect changes cheaply.
+
+    Two snapshots are equal (see `same_snapshot`) only if no value has been assigned or changed in place in between.
+    Returns None if `obj` contains objects which could change without being noticed.
+    """
+    snapshot: list = []
+    stack = [obj]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, _IMMUTABLE_TYPES):
+            snapshot.append(value)
+        elif isinstance(value, BaseModel):
+            snapshot.append(type(value))
+            stack.extend(value.__dict__.values())
+        elif isinstance(value, Mapping):
+            snapshot.extend((type(value), len(value), *value.keys()))
+            stack.extend(value.values())
+        elif isinstance(value, list | tuple | set | frozenset):
+            snapshot.extend((type(value), len(value)))
+            stack.extend(value)
+        else:
+            return None
+    return snapshot
+
+
+def same_snapshot(snapshot: list, other: list) -> bool:
+    """Whether two `identity_snapshot` are made of the same objects (equal numbers are not always the same objects)"""
+    return len(snapshot) == len(other) and all(
+        value is other_value or (type(value) is int and type(other_value) is int and value == other_value)
+        for value, other_value in zip(snapshot, other, strict=True)
+    )